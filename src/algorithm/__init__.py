@@ -1,21 +1,29 @@
 from algorithm.dtw.dynamic_time_warping_base import DynamicTimeWarpingBase
 from algorithm.dtw.dynamic_time_warping_lug import DynamicTimeWarpingLugaresi
+from algorithm.dtw.dynamic_time_warping_search import DynamicTimeWarpingSearch
 from algorithm.dtw.dynamic_time_warping_snaps import DynamicTimeWarpingSnaps
 from algorithm.lcss.longes_common_subsequence_events import LongestCommonSubsequenceEvents
 from algorithm.lcss.longes_common_subsequence_kpi import LongestCommonSubsequenceKPI
 from algorithm.lcss.longest_common_subsequence_base import LongestCommonSubsequenceBase
+from algorithm.lcss.longest_common_subsequence_batch import LongestCommonSubsequenceBatch
 from algorithm.ndw.needleman_wunsch_affine_gap import NeedlemanWunschAffineGap
 from algorithm.ndw.needleman_wunsch_base import NeedlemanWunschBase
+from algorithm.ndw.needleman_wunsch_batch import NeedlemanWunschBatch
+from algorithm.ndw.needleman_wunsch_incremental import IncrementalNeedlemanWunsch
 from algorithm.ndw.needleman_wunsch_tolerance import NeedlemanWunschTolerance
 from .alignment_algorithm import AlignmentAlgorithm
 
 __all__ = ["NeedlemanWunschBase",
            "NeedlemanWunschTolerance",
            "NeedlemanWunschAffineGap",
+           "NeedlemanWunschBatch",
+           "IncrementalNeedlemanWunsch",
            "AlignmentAlgorithm",
            "DynamicTimeWarpingLugaresi",
            "DynamicTimeWarpingSnaps",
            "DynamicTimeWarpingBase",
+           "DynamicTimeWarpingSearch",
            "LongestCommonSubsequenceKPI",
            "LongestCommonSubsequenceBase",
+           "LongestCommonSubsequenceBatch",
            "LongestCommonSubsequenceEvents"]
@@ -14,7 +14,11 @@ class AlignmentAlgorithm(metaclass=ABCMeta):
     Methods:
         calculate_alignment(self) -> (list, list): Calculate the alignment between two sequences
         or data sets and return the alignment result as a DataFrame.
+        calculate_score(self) -> float: Calculate only the score of the alignment, without
+        storing the table to build it.
     """
+    # Whether a higher score means a better alignment (a similarity instead of a distance)
+    HIGHER_SCORE_IS_BETTER = True
 
     @classmethod
     def __subclasshook__(cls, subclass):
@@ -30,6 +34,17 @@ class AlignmentAlgorithm(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def calculate_score(self) -> float:
+        """
+        Calculate only the score of the alignment, keeping two rows of the table in memory
+        instead of the whole table. The score is the same as the one of `calculate_alignment`.
+        The rows span the PT trace, so the memory is O(len(pt_trace)) rather than
+        O(min(n, m)): transposing the table would change how ties are broken, and the score.
+        :return: A float value that contains the score
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def score(self) -> float:
         """
@@ -3,23 +3,246 @@ from abc import ABC, abstractmethod
 import numpy as np
 
 from algorithm.alignment_algorithm import AlignmentAlgorithm
+from algorithm.dtw.dynamic_time_warping_kernels import envelope, sweep_dtw_band, trace_dtw
+from systems.system import CHUNK_CELLS
+from util.band_util import band_chunks, band_offsets, itakura_band, path_band, \
+    sakoe_chiba_band
+from util.traceback_util import new_traceback
 
 
 class DynamicTimeWarpingBase(ABC, AlignmentAlgorithm):
+    """
+    The warping path can be restricted by a global constraint: the Sakoe-Chiba band [2], of a
+    half width given as a fraction of the length of the longest trace, or the Itakura
+    parallelogram [3], given by the maximum slope of the path relative to the diagonal. Only
+    the constrained region of the table is calculated, in the band layout of
+    `util.band_util.band_offsets`, so time and memory scale with its size.
+
+    With a radius, the alignment is approximated as in FastDTW [1]: both traces are coarsened
+    recursively to half their snapshots, the warping path of the coarsest ones is calculated
+    exactly, and the path of each level is projected to the next finer one and only refined
+    inside a corridor of `radius` snapshots around it. Time and memory are O(n * radius) and
+    the cost is an upper bound of the exact one.
+
+    [1] Stan Salvador, Philip Chan: Toward accurate dynamic time warping in linear time and
+    space. Intell. Data Anal. 11(5): 561-580 (2007)
+    [2] Hiroaki Sakoe, Seibi Chiba: Dynamic programming algorithm optimization for spoken word
+    recognition. IEEE Trans. Acoust. Speech Signal Process. 26(1): 43-49 (1978)
+    [3] Fumitada Itakura: Minimum prediction residual principle applied to speech
+    recognition. IEEE Trans. Acoust. Speech Signal Process. 23(1): 67-72 (1975)
+    """
+    # The score is the cost of the warping path
+    HIGHER_SCORE_IS_BETTER = False
+    # Tolerance of the comparison of the costs of the exact alignment
+    TOLERANCE = 0.0001
+
     def __init__(self, dt_trace: dict,
-                 pt_trace: dict):
+                 pt_trace: dict,
+                 radius: int = None,
+                 sakoe_chiba_width: float = None,
+                 itakura_slope: float = None,
+                 early_abandon: float = None):
+        """
+        :param radius: Radius of the corridor of the approximate alignment, exact if None
+        :param sakoe_chiba_width: Half width of the Sakoe-Chiba band, as a fraction of the
+            length of the longest trace, unconstrained if None
+        :param itakura_slope: Maximum slope (at least 1) of the Itakura parallelogram,
+            unconstrained if None
+        :param early_abandon: If not None, the calculation of the score stops once the cost
+            exceeds this bound, and the score is inf
+        """
+        if radius is not None and radius < 0:
+            raise ValueError(f'Invalid radius {radius}.')
+        if sakoe_chiba_width is not None and not 0 <= sakoe_chiba_width <= 1:
+            raise ValueError(f'Invalid Sakoe-Chiba width {sakoe_chiba_width}.')
+        if itakura_slope is not None and not itakura_slope >= 1:
+            raise ValueError(f'Invalid Itakura slope {itakura_slope}.')
+        if sum(value is not None for value in (radius, sakoe_chiba_width, itakura_slope)) > 1:
+            raise ValueError(f'Invalid radius {radius}, Sakoe-Chiba width {sakoe_chiba_width} '
+                             f'and Itakura slope {itakura_slope}, only one can be used.')
         self._dt_trace = dt_trace
         self._pt_trace = pt_trace
+        self._radius = radius
+        self._sakoe_chiba_width = sakoe_chiba_width
+        self._itakura_slope = itakura_slope
+        self._early_abandon = early_abandon
 
         self._n_dt_trace = len(dt_trace) + 1
         self._m_pt_trace = len(pt_trace) + 1
 
-        self._table = np.zeros((self._n_dt_trace, self._m_pt_trace))
+        self._score = None
 
     @abstractmethod
     def calculate_matrix(self):
         pass
 
+    @abstractmethod
+    def _distance_matrix(self, dt_trace, pt_trace) -> np.ndarray:
+        """
+        Distance between every snapshot of a slice of the DT trace and every snapshot of a
+        slice of the PT trace, coarsened or not.
+        """
+
+    @abstractmethod
+    def _coarsen(self, trace):
+        """
+        Trace with half the snapshots, see `util.trace.Trace.coarsen`.
+        """
+
+    @abstractmethod
+    def _bound_columns(self, trace) -> list:
+        """
+        Numerical columns of a trace whose weighted absolute differences are added up by the
+        distance, see `_bound_weights`. The lower bounds of the cost only use them.
+        """
+
+    @abstractmethod
+    def _bound_weights(self) -> list:
+        """
+        Weight of each column of `_bound_columns` in the distance of the traces.
+        """
+
+    def lower_bound_kim(self) -> float:
+        """
+        Lower bound of the cost (LB_Kim, see `DynamicTimeWarpingSearch`): the distance of the
+        first and of the last pair of snapshots, which every warping path aligns.
+        """
+        if len(self._dt_trace) == 0 or len(self._pt_trace) == 0:
+            return 0.0
+        bound = 0.0
+        for dt_values, pt_values, weight in zip(self._bound_columns(self._dt_trace),
+                                                self._bound_columns(self._pt_trace),
+                                                self._bound_weights()):
+            bound += weight * abs(dt_values[0] - pt_values[0])
+            if len(dt_values) > 1 or len(pt_values) > 1:
+                bound += weight * abs(dt_values[-1] - pt_values[-1])
+        return float(np.nan_to_num(bound))
+
+    def envelopes(self) -> list:
+        """
+        Lower and upper envelopes of each column of `_bound_columns` of the DT trace: the
+        minimum and the maximum of the DT snapshots that each PT snapshot can be aligned with
+        inside the global constraint. They only depend on the DT trace and on the length of
+        the PT trace, so they can be shared by the PT traces of the same length.
+        """
+        dt_size, pt_size = len(self._dt_trace), len(self._pt_trace)
+        lo, hi = self._constraint_band(dt_size, pt_size)
+        columns = np.arange(1, pt_size + 1)
+        first = np.searchsorted(hi[1:], columns, side='left')
+        last = np.searchsorted(lo[1:], columns, side='right') - 1
+        return [envelope(values, first, last) for values in self._bound_columns(self._dt_trace)]
+
+    def lower_bound_keogh(self, envelopes: list = None) -> float:
+        """
+        Lower bound of the cost (LB_Keogh, see `DynamicTimeWarpingSearch`): the distance of
+        each PT snapshot to the envelopes of the DT trace, as every PT snapshot is aligned with
+        at least one of the DT snapshots of its window.
+        :param envelopes: Envelopes of the DT trace, see `envelopes`, calculated if None
+        """
+        if len(self._dt_trace) == 0 or len(self._pt_trace) == 0:
+            return 0.0
+        envelopes = self.envelopes() if envelopes is None else envelopes
+        bound = 0.0
+        for pt_values, (lower, upper), weight in zip(self._bound_columns(self._pt_trace),
+                                                     envelopes, self._bound_weights()):
+            bound += weight * np.nansum(np.maximum(pt_values - upper, 0)
+                                        + np.maximum(lower - pt_values, 0))
+        return float(bound)
+
+    @staticmethod
+    def _full_band(dt_size: int, pt_size: int) -> (np.ndarray, np.ndarray):
+        """
+        The whole table as a band whose rows (but row 0) span all the columns but column 0.
+        """
+        lo = np.ones(dt_size + 1, dtype=np.int64)
+        hi = np.full(dt_size + 1, pt_size, dtype=np.int64)
+        lo[0], hi[0] = 0, 0
+        return lo, hi
+
+    def _constrained(self) -> bool:
+        return self._sakoe_chiba_width is not None or self._itakura_slope is not None
+
+    def _constraint_band(self, dt_size: int, pt_size: int) -> (np.ndarray, np.ndarray):
+        """
+        First and last column of each row of the table inside the global constraint, see
+        `_table_band`, or the whole table if there is none.
+        """
+        if self._sakoe_chiba_width is not None:
+            lower, upper = sakoe_chiba_band(dt_size, pt_size, self._sakoe_chiba_width)
+        elif self._itakura_slope is not None:
+            lower, upper = itakura_band(dt_size, pt_size, self._itakura_slope)
+        else:
+            return self._full_band(dt_size, pt_size)
+        return self._table_band(lower, upper, dt_size, pt_size)
+
+    @staticmethod
+    def _table_band(lower: np.ndarray, upper: np.ndarray, dt_size: int,
+                    pt_size: int) -> (np.ndarray, np.ndarray):
+        """
+        First and last column of each row of the table with the range [lower, upper) of PT
+        snapshots of each DT snapshot, widened so that the band is connected and contains the
+        cells where the traceback starts and ends.
+        """
+        lo = np.zeros(dt_size + 1, dtype=np.int64)
+        hi = np.zeros(dt_size + 1, dtype=np.int64)
+        lo[1:] = np.minimum(lower + 1, pt_size)
+        hi[1:] = upper
+        lo[1] = 1
+        hi[-1] = pt_size
+        if dt_size > 1:
+            lo[-2] = min(lo[-2], max(pt_size - 1, 1))
+            hi[-2] = max(hi[-2], pt_size - 1)
+
+        lo[1:] = np.minimum.accumulate(lo[1:][::-1])[::-1]
+        hi = np.maximum.accumulate(hi)
+        lo[2:] = np.minimum(lo[2:], hi[1:-1] + 1)
+        hi = np.maximum(hi, lo)
+        return lo, hi
+
+    def _sweep_band(self, dt_trace, pt_trace, lo: np.ndarray, hi: np.ndarray,
+                    offsets: np.ndarray, decisions: np.ndarray = None,
+                    bound: float = np.inf, tolerance: float = None) -> float:
+        """
+        Fills the band of the table of the traces row by row, calculating its distance
+        matrix in chunks of rows. The row spans the PT trace, O(len(pt_trace)) memory besides
+        the chunks and decisions.
+        :param bound: The sweep stops once every cell of a row costs more than this bound,
+            as the costs never decrease along a warping path
+        :param tolerance: Tolerance of the comparison of the costs, TOLERANCE if None. The
+            approximate alignment takes the plain minimum (0.0) to project the paths of the
+            coarse traces, as its decisions always follow the costs.
+        :return: The cost of the last cell of the table, or inf if it exceeds the bound
+        """
+        tolerance = self.TOLERANCE if tolerance is None else tolerance
+        row = np.full(len(pt_trace) + 1, np.inf)
+        row[0] = 0
+        for start, end in band_chunks(lo, hi, 1, len(dt_trace) + 1, CHUNK_CELLS):
+            distance = self._distance_matrix(dt_trace[start - 1:end - 1],
+                                             pt_trace[lo[start] - 1:hi[end - 1]])
+            if sweep_dtw_band(distance, start, lo[start], lo, hi, offsets, row, decisions,
+                              tolerance, bound):
+                return np.inf
+        return row[-1]
+
+    def _approximate_band(self, dt_trace, pt_trace) -> (np.ndarray, np.ndarray):
+        """
+        Band of the table of the traces around the projection of the warping path of the
+        coarsened traces, see FastDTW.
+        """
+        dt_size, pt_size = len(dt_trace), len(pt_trace)
+        if min(dt_size, pt_size) < self._radius + 2:
+            return self._full_band(dt_size, pt_size)
+
+        coarse_dt, coarse_pt = self._coarsen(dt_trace), self._coarsen(pt_trace)
+        lo, hi = self._approximate_band(coarse_dt, coarse_pt)
+        offsets = band_offsets(lo, hi)
+        decisions = new_traceback(offsets[-1])
+        self._sweep_band(coarse_dt, coarse_pt, lo, hi, offsets, decisions, tolerance=0.0)
+        dt_indices, pt_indices = trace_dtw(lo, offsets, decisions,
+                                           len(coarse_dt), len(coarse_pt))
+        lower, upper = path_band(dt_indices, pt_indices, dt_size, pt_size, self._radius)
+        return self._table_band(lower, upper, dt_size, pt_size)
+
     @property
     def score(self):
-        return self._table[-1, -1]
+        return self._score
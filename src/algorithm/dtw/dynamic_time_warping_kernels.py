@@ -0,0 +1,186 @@
+"""
+Compiled kernels to fill the dynamic programming tables of the Dynamic Time Warping variants.
+
+The kernels receive the distance matrix already calculated with `SystemBase.distance_matrix`,
+so that the only work done per cell is the recurrence. They reproduce exactly the
+tie-breaking of `util.float_util.min_tolerance`.
+"""
+import numpy as np
+from numba import jit
+
+from util.float_util import min_tolerance
+from util.traceback_util import get_operation, set_operation
+
+# The same function used by the interpreted code, compiled, to keep identical decisions
+_min_tolerance = jit(nopython=True, cache=True)(min_tolerance)
+
+
+@jit(nopython=True, cache=True)
+def _min_cost(diagonal, up, left):
+    """
+    Minimum of the costs of the previous cells and its decision, preferring the diagonal and
+    then i-1 on ties, so that the decisions always follow the costs.
+    """
+    if diagonal <= up and diagonal <= left:
+        return diagonal, 1
+    if up <= left:
+        return up, 2
+    return left, 3
+
+
+@jit(nopython=True, cache=True)
+def sweep_dtw_band(distance, first_row, first_column, lo, hi, offsets, row, decisions,
+                   tolerance, bound):
+    """
+    Fills consecutive rows of a banded Dynamic Time Warping table, where row i only has the
+    cells from column lo[i] (greater than 0) to hi[i]. The cells outside the band cost inf.
+
+    :param distance: Distance between the snapshots of the rows, where
+        [i - first_row, j - first_column] belongs to cell (i, j)
+    :param first_row: First row to fill, greater than 0
+    :param first_column: Column of the first cell of the distance matrix
+    :param lo: First column of each row of the band
+    :param hi: Last column of each row of the band
+    :param offsets: Position of the first cell of each row in decisions
+    :param row: (len(PT) + 1) costs of the row above, inf outside its band. It is updated in
+        place.
+    :param decisions: Output packed decisions of the band {diagonal : 1, i-1 : 2, j-1 : 3}
+        (see `util.traceback_util`), where cell (i, j) is at position offsets[i] + j - lo[i],
+        if not None
+    :param tolerance: Tolerance of the comparison of the costs, see
+        `util.float_util.min_tolerance`. With 0, the plain minimum is taken instead.
+    :param bound: Bound of the cost, np.inf for none. The sweep stops once every cell of a row
+        costs more than the bound, see `dtw_cost`.
+    :return: Whether the sweep stopped because a row exceeded the bound
+    """
+    for r in range(distance.shape[0]):
+        i = first_row + r
+        diagonal = row[lo[i] - 1]
+        previous = np.inf
+        row_min = np.inf
+
+        for j in range(lo[i], hi[i] + 1):
+            if tolerance > 0:
+                last_min, decision = _min_tolerance(diagonal, row[j], previous, tolerance)
+            else:
+                last_min, decision = _min_cost(diagonal, row[j], previous)
+            diagonal = row[j]
+            row[j] = distance[r, j - first_column] + last_min
+            previous = row[j]
+            if previous < row_min:
+                row_min = previous
+            if decisions is not None:
+                set_operation(decisions, offsets[i] + j - lo[i], decision)
+
+        # Cells of the row above that are on the left of this row's band
+        for j in range(lo[i - 1], lo[i]):
+            row[j] = np.inf
+        if row_min > bound:
+            return True
+    return False
+
+
+@jit(nopython=True, cache=True)
+def trace_dtw(lo, offsets, decisions, dt_size, pt_size):
+    """
+    Traceback of the Dynamic Time Warping table from cell (dt_size, pt_size) to the first
+    row or column.
+
+    :param decisions: Packed decisions of the band, see `sweep_dtw_band`
+    :return: The positions of the DT and PT snapshots of each pair from the first one to the
+        last one. Position -1 stands for the last snapshot of the trace.
+    """
+    dt_indices = np.empty(dt_size + pt_size, dtype=np.int64)
+    pt_indices = np.empty(dt_size + pt_size, dtype=np.int64)
+    size = 0
+    while dt_size > 0 or pt_size > 0:
+        if dt_size == 0:
+            dt_indices[size] = dt_size - 1
+            pt_indices[size] = pt_size
+            pt_size -= 1
+        elif pt_size == 0:
+            dt_indices[size] = dt_size
+            pt_indices[size] = pt_size - 1
+            dt_size -= 1
+        else:
+            # Table meaning: {diagonal : 1, i-1 : 2, j-1 : 3}
+            decision = get_operation(decisions, offsets[dt_size] + pt_size - lo[dt_size])
+            if decision == 1:  # diagonal
+                dt_indices[size] = dt_size - 1
+                pt_indices[size] = pt_size - 1
+                dt_size -= 1
+                pt_size -= 1
+            elif decision == 2:  # i-1
+                dt_indices[size] = dt_size - 1
+                pt_indices[size] = pt_size
+                dt_size -= 1
+            else:  # j-1
+                dt_indices[size] = dt_size
+                pt_indices[size] = pt_size - 1
+                pt_size -= 1
+        size += 1
+    return dt_indices[:size][::-1].copy(), pt_indices[:size][::-1].copy()
+
+
+@jit(nopython=True, cache=True)
+def dtw_cost(dt_values, pt_values, early_abandon):
+    """
+    Cost of the Dynamic Time Warping of two 1-D signals, with the absolute difference as the
+    distance, keeping only two rows of the table, of len(pt_values) + 1 cells.
+
+    :param early_abandon: Bound of the cost, np.inf for none. As the costs never decrease
+        along a warping path, once every cell of a row costs more than the bound so does the
+        last cell, and the sweep stops.
+    :return: The cost of the last cell of the table, or np.inf if it exceeds early_abandon
+    """
+    previous = np.full(len(pt_values) + 1, np.inf)
+    previous[0] = 0
+    current = np.empty(len(pt_values) + 1)
+    for i in range(1, len(dt_values) + 1):
+        current[0] = np.inf
+        row_min = np.inf
+        for j in range(1, len(pt_values) + 1):
+            last_min = min(previous[j], current[j - 1], previous[j - 1])
+            current[j] = abs(dt_values[i - 1] - pt_values[j - 1]) + last_min
+            if current[j] < row_min:
+                row_min = current[j]
+        if row_min > early_abandon:
+            return np.inf
+        previous, current = current, previous
+    return previous[-1]
+
+
+@jit(nopython=True, cache=True)
+def envelope(values, first, last):
+    """
+    Minimum and maximum of the windows [first[j], last[j]] of values, for windows whose both
+    ends never decrease, with monotonic queues in O(len(values) + len(first)) time.
+
+    :return: The lower and the upper envelope, inf and -inf for the empty windows
+    """
+    lower = np.full(len(first), np.inf)
+    upper = np.full(len(first), -np.inf)
+    # Positions of the candidates to the minimum and the maximum of the window
+    min_queue = np.empty(len(values), dtype=np.int64)
+    max_queue = np.empty(len(values), dtype=np.int64)
+    min_head = min_tail = max_head = max_tail = 0
+    end = 0  # First position not pushed yet
+    for j in range(len(first)):
+        while end <= last[j]:
+            while min_tail > min_head and values[min_queue[min_tail - 1]] >= values[end]:
+                min_tail -= 1
+            min_queue[min_tail] = end
+            min_tail += 1
+            while max_tail > max_head and values[max_queue[max_tail - 1]] <= values[end]:
+                max_tail -= 1
+            max_queue[max_tail] = end
+            max_tail += 1
+            end += 1
+        while min_head < min_tail and min_queue[min_head] < first[j]:
+            min_head += 1
+        while max_head < max_tail and max_queue[max_head] < first[j]:
+            max_head += 1
+        if min_head < min_tail:
+            lower[j] = values[min_queue[min_head]]
+            upper[j] = values[max_queue[max_head]]
+    return lower, upper
@@ -2,6 +2,9 @@ import numpy as np
 import pandas as pd
 
 from algorithm.dtw.dynamic_time_warping_base import DynamicTimeWarpingBase
+from algorithm.dtw.dynamic_time_warping_kernels import dtw_cost
+from util.band_util import band_offsets
+from util.trace import coarsen_values, trace_column
 
 """
 Taken from for comparison purposes:
@@ -10,41 +13,66 @@ Online validation of digital twins for manufacturing systems. Comput. Ind. 150:
 """
 
 class DynamicTimeWarpingLugaresi(DynamicTimeWarpingBase):
+    # The plain minimum of the costs, as in `dtw_cost`
+    TOLERANCE = 0.0
 
     def __init__(self, dt_trace: dict,
                  pt_trace: dict,
-                 param_interest: str):
-        super().__init__(dt_trace, pt_trace)
-        self._dt_trace = [x[param_interest] for x in self._dt_trace]
-        self._pt_trace = [x[param_interest] for x in self._pt_trace]
+                 param_interest: str,
+                 early_abandon: float = None,
+                 radius: int = None,
+                 sakoe_chiba_width: float = None,
+                 itakura_slope: float = None):
+        """
+        :param early_abandon: If not None, the sweep stops once the cost exceeds this bound,
+            and the score is inf
+        :param radius: If not None, the cost is approximated with this radius
+        :param sakoe_chiba_width: Global constraint of the warping path, see
+            `DynamicTimeWarpingBase`
+        :param itakura_slope: Global constraint of the warping path, see
+            `DynamicTimeWarpingBase`
+        """
+        super().__init__(dt_trace, pt_trace, radius, sakoe_chiba_width, itakura_slope,
+                         early_abandon)
+        self._dt_trace = np.asarray(trace_column(self._dt_trace, param_interest), dtype=np.float64)
+        self._pt_trace = np.asarray(trace_column(self._pt_trace, param_interest), dtype=np.float64)
+        # The costs are of the normalized traces, the lower bounds read the original ones
+        self._dt_values, self._pt_values = self._normalized_traces()
 
-    def _normalize_traces(self):
-        max_value = max((max(self._dt_trace), max(self._pt_trace)))
-        self._dt_trace[:] = [value / max_value for value in self._dt_trace]
-        self._pt_trace[:] = [value / max_value for value in self._pt_trace]
+    def _normalized_traces(self) -> (np.ndarray, np.ndarray):
+        max_value = max(np.max(self._dt_trace), np.max(self._pt_trace))
+        return self._dt_trace / max_value, self._pt_trace / max_value
 
     def calculate_matrix(self):
-        # Table initialization
-        for i in range(self._n_dt_trace):
-            for j in range(self._m_pt_trace):
-                self._table[i, j] = np.inf
-        self._table[0, 0] = 0
-
-        for i in range(1, self._n_dt_trace):
-            for j in range(1, self._m_pt_trace):
-                distance = abs(self._dt_trace[i - 1] - self._pt_trace[j - 1])
-                # np.min is slower than min for small arrays because:
-                # - constructs a ndarray from the list
-                # - determines that the correct call is minimum.reduce to do the operation
-                # - call minimum.reduce (which itself is still much slower than the
-                # straight python call)
-                # Taken from: https://github.com/numpy/numpy/issues/12350
-                last_min = np.min(
-                    [self._table[i - 1, j], self._table[i, j - 1], self._table[i - 1, j - 1]])
-                self._table[i, j] = distance + last_min
+        dt_values, pt_values = self._dt_values, self._pt_values
+        bound = np.inf if self._early_abandon is None else float(self._early_abandon)
+        if self._radius is not None or self._constrained():
+            lo, hi = self._approximate_band(dt_values, pt_values) if self._radius is not None \
+                else self._constraint_band(len(dt_values), len(pt_values))
+            self._score = self._sweep_band(dt_values, pt_values, lo, hi, band_offsets(lo, hi),
+                                           bound=bound)
+            return
+        # The alignment is not built, so only two rows of the table are kept
+        self._score = dtw_cost(dt_values, pt_values, bound)
+
+    def _distance_matrix(self, dt_values: np.ndarray, pt_values: np.ndarray) -> np.ndarray:
+        return np.abs(dt_values[:, np.newaxis] - pt_values[np.newaxis, :])
+
+    def _coarsen(self, values: np.ndarray) -> np.ndarray:
+        return coarsen_values(values)
+
+    def _bound_columns(self, trace: np.ndarray) -> list:
+        return [trace]
+
+    def _bound_weights(self) -> list:
+        # The traces are normalized by the maximum value of both, see `_normalized_traces`
+        max_value = max(np.max(self._dt_trace), np.max(self._pt_trace))
+        return [1 / abs(max_value) if max_value else 0.0]
+
+    def calculate_score(self) -> float:
+        self.calculate_matrix()
+        return self._score
 
     def calculate_alignment(self) -> pd.DataFrame:
-        # Normalize the traces before computing DTW
-        self._normalize_traces()
         self.calculate_matrix()
         return pd.DataFrame()
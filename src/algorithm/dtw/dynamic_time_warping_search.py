@@ -0,0 +1,107 @@
+from typing import Callable
+
+import numpy as np
+
+from algorithm.dtw.dynamic_time_warping_base import DynamicTimeWarpingBase
+
+
+class DynamicTimeWarpingSearch:
+    """
+    Search of the PT traces closest to a DT trace by DTW cost, e.g., the recordings of a
+    physical twin that a digital twin reproduces best. Only the k nearest PT traces, or the
+    ones whose cost is at most a threshold, are wanted, so most of the full DTW calculations
+    can be skipped with a cascade of lower bounds of the cost [1]:
+
+    1. LB_Kim [2], the distance of the first and the last pairs of snapshots, in O(1).
+    2. LB_Keogh [3], the distance of each PT snapshot to the envelopes of the DT snapshots it
+       can be aligned with, in O(m). The envelopes are calculated once per length of the PT
+       traces.
+    3. The DTW cost with early abandon, which stops once every cell of a row exceeds the
+       bound.
+
+    A PT trace is pruned once a step exceeds the threshold or the cost of the k-th nearest
+    trace found so far. The PT traces are compared in the order of their lower bounds, so the
+    nearest ones are usually found first.
+
+    [1] Thanawin Rakthanmanon, Bilson J. L. Campana, Abdullah Mueen, Gustavo E. A. P. A.
+    Batista, M. Brandon Westover, Qiang Zhu, Jesin Zakaria, Eamonn J. Keogh: Searching and
+    mining trillions of time series subsequences under dynamic time warping. KDD 2012: 262-270
+    [2] Sang-Wook Kim, Sanghyun Park, Wesley W. Chu: An index-based approach for similarity
+    search supporting time warping in large sequence databases. ICDE 2001: 607-614
+    [3] Eamonn J. Keogh, Chotirat Ann Ratanamahatana: Exact indexing of dynamic time warping.
+    Knowl. Inf. Syst. 7(3): 358-386 (2005)
+    """
+
+    def __init__(self, create_algorithm: Callable[..., DynamicTimeWarpingBase], k: int = None,
+                 threshold: float = None):
+        """
+        :param create_algorithm: Function that creates the DTW algorithm of the DT trace and a
+            PT trace, called as create_algorithm(pt_trace, early_abandon=bound)
+        :param k: Number of nearest PT traces, all the ones under the threshold if None
+        :param threshold: Maximum cost of the PT traces, unbounded if None
+        """
+        if k is not None and k < 1:
+            raise ValueError(f'Invalid number of nearest traces {k}.')
+        self._create_algorithm = create_algorithm
+        self._k = k
+        self._threshold = np.inf if threshold is None else threshold
+        # Envelopes of the DT trace for each length of the PT traces
+        self._envelopes = {}
+        # Number of PT traces pruned by each step of the cascade in the last search
+        self.pruned_kim = 0
+        self.pruned_keogh = 0
+        self.abandoned = 0
+
+    @property
+    def pruned(self) -> int:
+        """
+        Number of PT traces of the last search whose full DTW cost was not calculated.
+        """
+        return self.pruned_kim + self.pruned_keogh + self.abandoned
+
+    def search(self, pt_traces: list) -> list:
+        """
+        :return: The (position, cost) of the PT traces that are found, from the nearest one
+        """
+        self.pruned_kim = self.pruned_keogh = self.abandoned = 0
+        candidates = []
+        for index, pt_trace in enumerate(pt_traces):
+            algorithm = self._create_algorithm(pt_trace)
+            bound = algorithm.lower_bound_kim()
+            if bound > self._threshold:
+                self.pruned_kim += 1
+                continue
+            if len(pt_trace) not in self._envelopes:
+                self._envelopes[len(pt_trace)] = algorithm.envelopes()
+            bound = max(bound, algorithm.lower_bound_keogh(self._envelopes[len(pt_trace)]))
+            if bound > self._threshold:
+                self.pruned_keogh += 1
+                continue
+            candidates.append((bound, index))
+
+        found = []
+        for position, (bound, index) in enumerate(sorted(candidates)):
+            limit = self._limit(found)
+            if bound > limit:
+                # The rest of the candidates have greater bounds
+                self.pruned_keogh += len(candidates) - position
+                break
+            cost = self._create_algorithm(pt_traces[index],
+                                          early_abandon=limit).calculate_score()
+            if not np.isfinite(cost) or cost > limit:
+                # Abandoned, or a cost that can't be ranked (NaN values in the traces)
+                self.abandoned += 1
+                continue
+            found.append((index, cost))
+            found.sort(key=lambda item: item[1])
+            if self._k is not None:
+                del found[self._k:]
+        return found
+
+    def _limit(self, found: list) -> float:
+        """
+        Maximum cost of the next PT trace to be found.
+        """
+        if self._k is not None and len(found) == self._k:
+            return min(self._threshold, found[-1][1])
+        return self._threshold
@@ -2,90 +2,134 @@ import numpy as np
 import pandas as pd
 
 from algorithm.dtw.dynamic_time_warping_base import DynamicTimeWarpingBase
+from algorithm.dtw.dynamic_time_warping_kernels import trace_dtw
 from systems import SystemBase
-from util.float_util import min_tolerance
+from util.band_util import band_offsets, time_window_band
+from util.trace import Trace, to_traces
+from util.traceback_util import new_traceback
 
 
 class DynamicTimeWarpingSnaps(DynamicTimeWarpingBase):
     SYSTEM = 'system'
     TIMESTAMP_LABEL = 'timestamp_label'
 
-    def __init__(self, dt_trace: dict,
-                 pt_trace: dict,
+    def __init__(self, dt_trace: list | Trace,
+                 pt_trace: list | Trace,
                  system: SystemBase,
-                 timestamp_label: str = 'timestamp(s)'):
-        super().__init__(dt_trace, pt_trace)
+                 timestamp_label: str = 'timestamp(s)',
+                 time_window: float = None,
+                 radius: int = None,
+                 sakoe_chiba_width: float = None,
+                 itakura_slope: float = None,
+                 early_abandon: float = None):
+        """
+        :param time_window: If not None, only the pairs of snapshots whose timestamps differ
+            at most this value are compared, and only that band of the table is stored
+        :param radius: If not None, the alignment is approximated with this radius
+        :param sakoe_chiba_width: Global constraint of the warping path, see
+            `DynamicTimeWarpingBase`
+        :param itakura_slope: Global constraint of the warping path, see
+            `DynamicTimeWarpingBase`
+        :param early_abandon: If not None, `calculate_score` stops once the cost exceeds this
+            bound, and the score is inf. The alignment is always complete.
+        """
+        super().__init__(dt_trace, pt_trace, radius, sakoe_chiba_width, itakura_slope,
+                         early_abandon)
+        if time_window is not None and (radius is not None or self._constrained()):
+            raise ValueError(f'Invalid time window {time_window} with an approximate or '
+                             f'constrained alignment.')
         self._timestamp_label = timestamp_label
         self._system = system
-        # Table meaning: {diagonal : 1, i-1 : 2, j-1 : 3}
-        self._decisions = np.zeros((self._n_dt_trace, self._m_pt_trace))
+        self._time_window = time_window
+        self._dt_trace, self._pt_trace = to_traces(dt_trace, pt_trace, timestamp_label)
+        # Table meaning: {diagonal : 1, i-1 : 2, j-1 : 3}, packed at 2 bits per cell
+        self._decisions = None
+        # (lo, offsets) of the band of the table where the decisions are stored
+        self._band = None
 
     def calculate_matrix(self):
-        # Table initialization
-        for i in range(self._n_dt_trace):
-            for j in range(self._m_pt_trace):
-                self._table[i, j] = np.inf
-        self._table[0, 0] = 0
-
-        for i in range(1, self._n_dt_trace):
-            for j in range(1, self._m_pt_trace):
-                distance = self._system.distance(self._dt_trace[i - 1],
-                                                 self._pt_trace[j - 1],
-                                                 self._timestamp_label)
-                last_min, decision = min_tolerance(
-                    self._table[i - 1, j - 1], self._table[i - 1, j], self._table[i, j - 1])
-                self._table[i, j] = distance + last_min
-                self._decisions[i, j] = decision
+        """
+        Fills the whole table with the compiled kernel of the band, keeping one row of costs
+        and the decisions of the table, packed at 2 bits per cell.
+        """
+        self._calculate_band(*self._full_band(len(self._dt_trace), len(self._pt_trace)))
+
+    def _time_window_band(self) -> (np.ndarray, np.ndarray):
+        """
+        First and last column of each row of the table whose snapshots are inside the time
+        window, see `_table_band`.
+        """
+        lower, upper = time_window_band(self._dt_trace.timestamps, self._pt_trace.timestamps,
+                                        self._time_window)
+        return self._table_band(lower, upper, len(self._dt_trace), len(self._pt_trace))
+
+    def _band_bounds(self) -> (np.ndarray, np.ndarray):
+        """
+        First and last column of each row of the part of the table that is calculated.
+        """
+        if self._time_window is not None:
+            return self._time_window_band()
+        if self._radius is not None:
+            return self._approximate_band(self._dt_trace, self._pt_trace)
+        return self._constraint_band(len(self._dt_trace), len(self._pt_trace))
+
+    def calculate_band(self):
+        """
+        Calculates only the band of the table inside the time window, the corridor of the
+        approximate alignment or the global constraint, keeping one row of costs and the
+        decisions of the band.
+        """
+        self._calculate_band(*self._band_bounds())
+
+    def _calculate_band(self, lo: np.ndarray, hi: np.ndarray):
+        offsets = band_offsets(lo, hi)
+        self._decisions = new_traceback(offsets[-1])
+        self._band = (lo, offsets)
+        self._score = self._sweep_band(self._dt_trace, self._pt_trace, lo, hi, offsets,
+                                       self._decisions)
+
+    def _distance_matrix(self, dt_trace: Trace, pt_trace: Trace) -> np.ndarray:
+        return self._system.distance_matrix(dt_trace, pt_trace)
+
+    def _coarsen(self, trace: Trace) -> Trace:
+        return trace.coarsen()
+
+    def _bound_columns(self, trace: Trace) -> list:
+        # The categorical columns only add up to the distance, so they are left out
+        return [trace.columns[key] for key in self._bound_keys()]
+
+    def _bound_weights(self) -> list:
+        # The distance is the mean of the differences of the columns but the timestamp
+        return [1 / (len(self._dt_trace.keys()) - 1) for _ in self._bound_keys()]
+
+    def _bound_keys(self) -> list:
+        return [key for key in self._dt_trace.keys()
+                if key != self._timestamp_label and not self._dt_trace.is_categorical(key)]
+
+    def calculate_score(self) -> float:
+        lo, hi = self._band_bounds()
+        self._score = self._sweep_band(self._dt_trace, self._pt_trace, lo, hi,
+                                       band_offsets(lo, hi),
+                                       bound=np.inf if self._early_abandon is None
+                                       else float(self._early_abandon))
+        return self._score
 
     def _build_result(self):
-        dt_size = len(self._dt_trace) - 1
-        pt_size = len(self._pt_trace) - 1
-        keys = self._pt_trace[0].keys()
-        rows = []
-
-        # Add headers to file
-        headers = ["dt-" + k for k in keys]
-        headers.extend(["pt-" + k for k in keys])
-
-        while dt_size > 0 or pt_size > 0:
-            if dt_size == 0:
-                rows.insert(0, self._create_row(dt_size - 1, pt_size, keys))
-                pt_size -= 1
-                continue
-
-            elif pt_size == 0:
-                rows.insert(0, self._create_row(dt_size, pt_size - 1, keys))
-                dt_size -= 1
-                continue
-
-            else:
-                # Table meaning: {diagonal : 1, i-1 : 2, j-1 : 3}
-                if self._decisions[dt_size][pt_size] == 1:  # diagonal
-                    rows.insert(0, self._create_row(dt_size - 1, pt_size - 1, keys))
-                    dt_size -= 1
-                    pt_size -= 1
-                    continue
-                elif self._decisions[dt_size][pt_size] == 2:  # i-1
-                    rows.insert(0, self._create_row(dt_size - 1, pt_size, keys))
-                    dt_size -= 1
-                    continue
-                elif self._decisions[dt_size][pt_size] == 3:  # j-1
-                    rows.insert(0, self._create_row(dt_size, pt_size - 1, keys))
-                    pt_size -= 1
-                    continue
-
-        return pd.DataFrame(rows, columns=headers)
-
-    def _create_row(self, dt_index, pt_index, keys):
-        aux = []
-        row = []
-        for key in keys:
-            row.append(self._dt_trace[dt_index][key])
-            aux.append(self._pt_trace[pt_index][key])
-
-        row.extend(aux)
-        return row
+        lo, offsets = self._band
+        dt_indices, pt_indices = trace_dtw(lo, offsets, self._decisions,
+                                           len(self._dt_trace) - 1, len(self._pt_trace) - 1)
+        keys = list(self._pt_trace.keys())
+        dt_columns = self._dt_trace.take(keys, dt_indices)
+        pt_columns = self._pt_trace.take(keys, pt_indices)
+
+        columns = {"dt-" + k: dt_columns[k] for k in keys}
+        columns.update({"pt-" + k: pt_columns[k] for k in keys})
+        # Same column types as if the DataFrame was built row by row
+        return pd.DataFrame(columns).infer_objects()
 
     def calculate_alignment(self) -> pd.DataFrame:
-        self.calculate_matrix()
+        if self._time_window is not None or self._radius is not None or self._constrained():
+            self.calculate_band()
+        else:
+            self.calculate_matrix()
         return self._build_result()
\ No newline at end of file
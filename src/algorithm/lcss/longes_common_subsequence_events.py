@@ -1,4 +1,7 @@
+import numpy as np
+
 from algorithm.lcss.longest_common_subsequence_base import LongestCommonSubsequenceBase
+from algorithm.lcss.longest_common_subsequence_kernels import lcs_events
 
 """
 Taken from for comparison purposes:
@@ -16,9 +19,35 @@ class LongestCommonSubsequenceEvents(LongestCommonSubsequenceBase):
         self._delta = delta
         self._timestamp_label = timestamp_label
 
-    def equals_condition(self, dt_snap, pt_snap) -> bool:
-        # if not (isinstance(dt_snap[self._param_of_interest], str)
-        #         and isinstance(pt_snap[self._param_of_interest], str)):
-        #     raise ValueError('This algorithm only allows comparison between strings')
-        return dt_snap[self._param_interest] == pt_snap[self._param_interest] and \
-            abs(dt_snap[self._timestamp_label] - pt_snap[self._timestamp_label]) <= self._delta
+    def _threshold(self) -> float:
+        return self._delta
+
+    def _match_arrays(self) -> tuple:
+        # Code of each label of the PT events. Labels not equal to themselves (NaN) never match.
+        dt_labels, pt_labels = self._columns(self._param_interest)
+        codes = {}
+        pt_codes = np.array([codes.setdefault(label, len(codes)) if label == label else -1
+                             for label in pt_labels], dtype=np.int64)
+        dt_codes = np.array([codes.get(label, -1) if label == label else -1
+                             for label in dt_labels], dtype=np.int64)
+        dt_times, pt_times = (np.asarray(times, dtype=np.float64)
+                              for times in self._columns(self._timestamp_label))
+        return dt_codes, dt_times, pt_codes, pt_times
+
+    def _calculate_scores(self, thresholds: np.ndarray) -> np.ndarray:
+        """
+        Calculates the score with each delta with the bit-parallel kernel, see `lcs_events`,
+        in O(n * m / 64) time and O(m / 64) memory, plus the matches. It is faster than a
+        single traversal of the table for all of them.
+        """
+        dt_codes, dt_times, pt_codes, pt_times = self._match_arrays()
+
+        # PT events grouped by label, in the order of the trace
+        matched = pt_codes >= 0
+        columns = np.flatnonzero(matched)[np.argsort(pt_codes[matched], kind='stable')]
+        starts = np.zeros(np.max(pt_codes, initial=-1) + 2, dtype=np.int64)
+        np.cumsum(np.bincount(pt_codes[matched], minlength=len(starts) - 1), out=starts[1:])
+
+        sorted_times = bool(np.all(np.diff(pt_times) >= 0))
+        return np.array([lcs_events(dt_codes, dt_times, pt_times, columns, starts,
+                                    float(delta), sorted_times) for delta in thresholds])
@@ -1,4 +1,8 @@
+import numpy as np
+
 from algorithm.lcss.longest_common_subsequence_base import LongestCommonSubsequenceBase
+from algorithm.lcss.longest_common_subsequence_kernels import lcs_sparse, lcs_thresholds, \
+    match_windows
 
 """
 Taken from for comparison purposes:
@@ -6,6 +10,9 @@ Giovanni Lugaresi, Sofia Gangemi, Giulia Gazzoni, Andrea Matta:
 Online validation of digital twins for manufacturing systems. Comput. Ind. 150: 103942 (2023)
 """
 class LongestCommonSubsequenceKPI(LongestCommonSubsequenceBase):
+    # Maximum fraction of matching pairs of snapshots for which only the matches are visited,
+    # see `lcs_sparse`
+    SPARSE_DENSITY = 0.1
 
     def __init__(self, dt_trace: list,
                  pt_trace: list,
@@ -14,9 +21,34 @@ class LongestCommonSubsequenceKPI(LongestCommonSubsequenceBase):
         super().__init__(dt_trace, pt_trace, param_interest)
         self._epsilon = epsilon
 
-    def equals_condition(self, dt_snap, pt_snap) -> bool:
-        # if not (isinstance(dt_snap[self._param_of_interest], (float, int))
-        #         and isinstance(pt_snap[self._param_of_interest], (float, int))):
-        #     raise ValueError('This algorithm only allows comparison between numeric types')
-        return abs(dt_snap[self._param_interest] - pt_snap[self._param_interest]) \
-            <= self._epsilon
+    def _threshold(self) -> float:
+        return self._epsilon
+
+    def _match_arrays(self) -> tuple:
+        dt_values, pt_values = (np.asarray(values, dtype=np.float64)
+                                for values in self._columns(self._param_interest))
+        return (np.zeros(len(dt_values), dtype=np.int64), dt_values,
+                np.zeros(len(pt_values), dtype=np.int64), pt_values)
+
+    def _calculate_scores(self, thresholds: np.ndarray) -> np.ndarray:
+        """
+        Calculates the score with each epsilon visiting only the matching pairs of snapshots,
+        found by binary search on the sorted PT values, if they are at most SPARSE_DENSITY of
+        all the pairs. The scores of the rest of the epsilons are calculated at once.
+        """
+        dt_codes, dt_values, pt_codes, pt_values = self._match_arrays()
+        order = np.flatnonzero(~np.isnan(pt_values))
+        order = order[np.argsort(pt_values[order], kind='stable')]
+
+        scores = np.zeros(len(thresholds), dtype=np.int64)
+        dense = []
+        for k, epsilon in enumerate(thresholds):
+            first, last = match_windows(dt_values, pt_values, order, float(epsilon))
+            if np.sum(last - first) > self.SPARSE_DENSITY * self._n_dt_trace * self._m_pt_trace:
+                dense.append(k)
+            else:
+                scores[k] = lcs_sparse(dt_values, pt_values, order, first, last, float(epsilon))
+        if dense:
+            scores[dense] = lcs_thresholds(dt_codes, dt_values, pt_codes, pt_values,
+                                           thresholds[dense])
+        return scores
@@ -4,12 +4,15 @@ import numpy as np
 import pandas as pd
 
 from algorithm.alignment_algorithm import AlignmentAlgorithm
+from algorithm.lcss.longest_common_subsequence_kernels import lcs_thresholds
+from util.trace import trace_column
 
 
 class LongestCommonSubsequenceBase(ABC, AlignmentAlgorithm):
     def __init__(self, dt_trace: list,
                  pt_trace: list,
                  param_interest: str):
+        # Traces as given (records, DataFrames or traces), their columns are read when needed
         self._dt_trace = dt_trace
         self._pt_trace = pt_trace
 
@@ -18,27 +21,48 @@ class LongestCommonSubsequenceBase(ABC, AlignmentAlgorithm):
 
         self._param_interest = param_interest
 
-        self._table = np.zeros((self._n_dt_trace, self._m_pt_trace))
-
-    def calculate_matrix(self):
-        for i in range(self._n_dt_trace):
-            for j in range(self._m_pt_trace):
-                if self.equals_condition(self._dt_trace[i], self._pt_trace[j]):
-                    if i == 0 or j == 0:
-                        self._table[i][j] = 1
-                    else:
-                        self._table[i][j] = self._table[i - 1][j - 1] + 1
-                else:
-                    self._table[i][j] = np.max([self._table[i - 1][j], self._table[i][j - 1]])
+        # Score, calculated once, see `calculate_score`
+        self._score = None
 
     def calculate_alignment(self) -> pd.DataFrame:
-        self.calculate_matrix()
+        # The alignment is not built, so only the score is calculated
+        self.calculate_score()
         return pd.DataFrame()
 
+    def calculate_score(self) -> float:
+        # The score may have been already calculated, e.g., by `LongestCommonSubsequenceBatch`
+        if self._score is not None:
+            return self._score
+        self._score = float(self._calculate_scores(np.array([self._threshold()],
+                                                            dtype=np.float64))[0])
+        return self._score
+
+    def _calculate_scores(self, thresholds: np.ndarray) -> np.ndarray:
+        """
+        Score of the traces with each threshold of the match condition, calculated at once by
+        `lcs_thresholds` keeping two rows of the table.
+        """
+        return lcs_thresholds(*self._match_arrays(), thresholds)
+
+    def _columns(self, key: str) -> (np.ndarray, np.ndarray):
+        """
+        Values of a column of the DT and PT traces, see `util.trace.trace_column`.
+        """
+        return trace_column(self._dt_trace, key), trace_column(self._pt_trace, key)
+
     @property
     def score(self) -> float:
-        return self._table[-1][-1] if self._table.size > 0 else 0
+        return self._score
+
+    @abstractmethod
+    def _threshold(self) -> float:
+        """
+        Maximum difference of the values of two matching snapshots.
+        """
 
     @abstractmethod
-    def equals_condition(self, dt_snap, pt_snap) -> bool:
-        pass
+    def _match_arrays(self) -> tuple:
+        """
+        The (dt_codes, dt_values, pt_codes, pt_values) of the match condition of the traces,
+        see `lcs_thresholds`.
+        """
@@ -0,0 +1,46 @@
+import numpy as np
+
+from algorithm.lcss.longest_common_subsequence_base import LongestCommonSubsequenceBase
+
+
+class LongestCommonSubsequenceBatch:
+    """
+    Calculates at once the Longest Common Subsequence scores of K configurations that only
+    differ in the threshold of the match condition (epsilon or delta), e.g., the points of a
+    sweep. The match condition of the traces is prepared once, and the table is traversed a
+    single time for all the thresholds, see `lcs_thresholds`, unless the variant has a faster
+    kernel for each of them. The scores are the same as the ones of each configuration alone.
+    """
+
+    def __init__(self, algorithms: list):
+        """
+        :param algorithms: Longest Common Subsequence algorithms of the same class, with the
+            same traces and parameters but the threshold
+        """
+        if not algorithms:
+            raise ValueError('Invalid empty batch of algorithms.')
+        first = algorithms[0]
+        for algorithm in algorithms:
+            if not isinstance(algorithm, LongestCommonSubsequenceBase) \
+                    or type(algorithm) is not type(first) \
+                    or algorithm._dt_trace is not first._dt_trace \
+                    or algorithm._pt_trace is not first._pt_trace \
+                    or algorithm._param_interest != first._param_interest \
+                    or getattr(algorithm, '_timestamp_label', None) != \
+                    getattr(first, '_timestamp_label', None):
+                raise ValueError(f'Invalid batch algorithm {algorithm}, it must only differ '
+                                 f'in the threshold.')
+        self._algorithms = algorithms
+
+    def calculate(self) -> np.ndarray:
+        """
+        Calculates the scores of all the configurations. Afterwards, each algorithm has its
+        score and `calculate_score` does not calculate it again.
+        :return: The score of each configuration
+        """
+        thresholds = np.array([algorithm._threshold() for algorithm in self._algorithms],
+                              dtype=np.float64)
+        scores = self._algorithms[0]._calculate_scores(thresholds).astype(np.float64)
+        for algorithm, score in zip(self._algorithms, scores):
+            algorithm._score = float(score)
+        return scores
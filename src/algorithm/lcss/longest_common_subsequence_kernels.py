@@ -0,0 +1,215 @@
+"""
+Compiled kernels of the Longest Common Subsequence variants.
+
+The bit-parallel kernel keeps the row of the table as a bit vector over the PT snapshots, 64
+columns per word, so that a row is updated with a few word operations per 64 cells [1][2].
+It works with any match condition, given as the set of PT snapshots that match each DT
+snapshot.
+
+The sparse kernel only visits the pairs of snapshots that match, in the order of Hunt and
+Szymanski [3], which pays off when few of them do.
+
+[1] Lloyd Allison, Trevor I. Dix: A bit-string longest-common-subsequence algorithm.
+Inf. Process. Lett. 23(6): 305-310 (1986)
+[2] Heikki Hyyrö: Bit-parallel LCS-length computation revisited. AWOCA 2004: 16-27
+[3] James W. Hunt, Thomas G. Szymanski: A fast algorithm for computing longest common
+subsequences. Commun. ACM 20(5): 350-353 (1977)
+"""
+import numpy as np
+from numba import jit
+
+_ONE = np.uint64(1)
+_ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+@jit(nopython=True, cache=True)
+def _popcount(word):
+    word = word - ((word >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    word = (word & np.uint64(0x3333333333333333)) + \
+        ((word >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    word = (word + (word >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (word * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+@jit(nopython=True, cache=True)
+def _search_window(columns, first, last, pt_times, time, delta):
+    """
+    Range [first, last) of columns (in the order of their values in pt_times) whose values
+    differ at most delta from time. The condition is the one of the interpreted code,
+    abs(time - pt_time) <= delta, which holds for a contiguous range of sorted values.
+    """
+    low, high = first, last
+    while low < high:
+        middle = (low + high) // 2
+        pt_time = pt_times[columns[middle]]
+        if pt_time >= time or abs(time - pt_time) <= delta:
+            high = middle
+        else:
+            low = middle + 1
+    start = low
+    high = last
+    while low < high:
+        middle = (low + high) // 2
+        pt_time = pt_times[columns[middle]]
+        if pt_time > time and abs(time - pt_time) > delta:
+            high = middle
+        else:
+            low = middle + 1
+    return start, low
+
+
+@jit(nopython=True, cache=True)
+def lcs_events(dt_codes, dt_times, pt_times, columns, starts, delta, sorted_times):
+    """
+    Length of the Longest Common Subsequence of two traces of events, where two events match
+    if they have the same label and their timestamps differ at most delta.
+
+    Bit j of the row is 0 if the LCS of the row grows at column j, so the length is the
+    number of zeros. Each row adds the match vector M of its DT event to the row V as
+    V' = (V + (V & M)) | (V & ~M), where the carries only cross the words from the first
+    match of the row. The words after the last match of every row so far are all ones, which
+    a carry crosses unchanged, so the update stops there. With sorted timestamps, the matches
+    of each row are within delta of its DT event, and the row is only updated in that band,
+    so the time grows linearly with the length of the traces for a fixed delta.
+
+    :param dt_codes: Label code of each DT event, -1 if no PT event has its label
+    :param dt_times: Timestamp of each DT event
+    :param pt_times: Timestamp of each PT event
+    :param columns: Positions of the PT events grouped by label code, ascending within each
+        label
+    :param starts: Position in columns of the first PT event of each label code, and the
+        length of columns
+    :param sorted_times: Whether the PT timestamps are sorted, so that the events of each
+        label within delta are found by binary search
+    """
+    pt_size = len(pt_times)
+    words = (pt_size + 63) // 64
+    row = np.full(words, _ALL_ONES)
+    match = np.zeros(words, dtype=np.uint64)
+    # Last word with a match in any row so far
+    frontier = -1
+    for i in range(len(dt_codes)):
+        code = dt_codes[i]
+        if code < 0:
+            continue
+        first, last = starts[code], starts[code + 1]
+        if sorted_times:
+            first, last = _search_window(columns, first, last, pt_times, dt_times[i], delta)
+
+        lowest, highest = words, -1
+        for k in range(first, last):
+            j = columns[k]
+            if sorted_times or abs(dt_times[i] - pt_times[j]) <= delta:
+                match[j >> 6] |= _ONE << np.uint64(j & 63)
+                lowest = min(lowest, j >> 6)
+                highest = max(highest, j >> 6)
+        if highest < 0:
+            # Without matches, the row does not change
+            continue
+        frontier = max(frontier, highest)
+
+        carry = np.uint64(0)
+        w = lowest
+        while w <= highest or (carry and w <= frontier):
+            value = row[w]
+            matched = value & match[w]
+            total = value + matched
+            overflow = total < value
+            total += carry
+            carry = np.uint64(1) if overflow or total < carry else np.uint64(0)
+            row[w] = total | (value & ~match[w])
+            match[w] = np.uint64(0)
+            w += 1
+
+    zeros = 0
+    for w in range(words):
+        bits = 64 if w < words - 1 else pt_size - 64 * (words - 1)
+        valid = _ALL_ONES if bits == 64 else (_ONE << np.uint64(bits)) - _ONE
+        zeros += bits - int(_popcount(row[w] & valid))
+    return zeros
+
+
+@jit(nopython=True, cache=True)
+def match_windows(dt_values, pt_values, order, epsilon):
+    """
+    Range [first, last) of order of the PT values that differ at most epsilon from each DT
+    value, see `_search_window`.
+    :param order: Positions of the PT values that are not NaN, in ascending order of value
+    """
+    first = np.zeros(len(dt_values), dtype=np.int64)
+    last = np.zeros(len(dt_values), dtype=np.int64)
+    for i in range(len(dt_values)):
+        first[i], last[i] = _search_window(order, 0, len(order), pt_values, dt_values[i],
+                                           epsilon)
+    return first, last
+
+
+@jit(nopython=True, cache=True)
+def lcs_sparse(dt_values, pt_values, order, first, last, epsilon):
+    """
+    Length of the Longest Common Subsequence of two traces of values, where two values match
+    if they differ at most epsilon, in O((r + n) log m) for r matching pairs.
+
+    ends[k] is the smallest PT position where a common subsequence of length k + 1 ends. The
+    matches of each DT value are visited from the last PT position, so that each of them
+    extends a subsequence of the previous rows only.
+
+    :param order: Positions of the PT values that are not NaN, in ascending order of value
+    :param first: First position in order of the matches of each DT value, see
+        `match_windows`
+    :param last: Position in order after the matches of each DT value
+    """
+    ends = np.empty(len(pt_values), dtype=np.int64)
+    length = 0
+    for i in range(len(dt_values)):
+        columns = np.sort(order[first[i]:last[i]])
+        for k in range(len(columns) - 1, -1, -1):
+            j = columns[k]
+            if not abs(dt_values[i] - pt_values[j]) <= epsilon:
+                continue
+            position = np.searchsorted(ends[:length], j)
+            ends[position] = j
+            if position == length:
+                length += 1
+    return length
+
+
+@jit(nopython=True, cache=True)
+def lcs_thresholds(dt_codes, dt_values, pt_codes, pt_values, thresholds):
+    """
+    Length of the Longest Common Subsequence of two traces with each of several thresholds,
+    in a single traversal of the table that keeps two rows of K cells per column. Two
+    snapshots match if their codes are equal and not negative, and their values differ at
+    most the threshold, so the thresholds of a cell that match are the ones above the
+    difference of its values.
+
+    :param dt_codes: Code of each DT snapshot, e.g., of its label, -1 if it never matches
+    :param dt_values: Value of each DT snapshot, e.g., its timestamp
+    :param pt_codes: Code of each PT snapshot
+    :param pt_values: Value of each PT snapshot
+    :param thresholds: The K thresholds
+    :return: The length with each threshold
+    """
+    order = np.argsort(thresholds)
+    sorted_thresholds = thresholds[order]
+    count = len(thresholds)
+    pt_size = len(pt_values)
+    previous = np.zeros((pt_size + 1, count), dtype=np.int64)
+    current = np.zeros((pt_size + 1, count), dtype=np.int64)
+    for i in range(len(dt_values)):
+        for j in range(pt_size):
+            # Position of the first threshold that matches
+            first = count
+            if dt_codes[i] >= 0 and dt_codes[i] == pt_codes[j]:
+                difference = abs(dt_values[i] - pt_values[j])
+                if difference <= sorted_thresholds[count - 1]:
+                    first = np.searchsorted(sorted_thresholds, difference)
+            for k in range(first):
+                current[j + 1, k] = max(previous[j + 1, k], current[j, k])
+            for k in range(first, count):
+                current[j + 1, k] = previous[j, k] + 1
+        previous, current = current, previous
+
+    lengths = np.zeros(count, dtype=np.int64)
+    lengths[order] = previous[pt_size]
+    return lengths
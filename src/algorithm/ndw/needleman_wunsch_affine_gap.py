@@ -3,10 +3,11 @@ from abc import ABC
 import numpy as np
 
 from algorithm.ndw.needleman_wunsch_base import NeedlemanWunschBase
+from algorithm.ndw.needleman_wunsch_kernels import sweep_affine_gap, sweep_affine_gap_band, \
+    sweep_affine_gap_band_batch, sweep_affine_gap_drop, affine_gap_boundary
+from systems.snapshot_differences import SnapshotDifferences
 from systems.system import SystemBase
-from util.float_util import max_tolerance
-
-MIN = -float("inf")
+from util.lru_cache import ArrayLRUCache
 
 
 class NeedlemanWunschAffineGap(NeedlemanWunschBase, ABC):
@@ -34,86 +35,60 @@ class NeedlemanWunschAffineGap(NeedlemanWunschBase, ABC):
                  init_gap: float = -0.2,
                  cont_gap: float = 0,
                  mad: dict = None,
-                 low: int = 5):
+                 low: int = 5,
+                 mode: str = NeedlemanWunschBase.FULL_MODE,
+                 time_window: float = None,
+                 similarity_cache: ArrayLRUCache = None,
+                 differences: SnapshotDifferences = None,
+                 x_drop: float = None,
+                 z_drop: float = None,
+                 similarity: np.ndarray = None):
         super().__init__(dt_trace, pt_trace, system, timestamp_label,
-                         init_gap=init_gap, mad=mad)
+                         init_gap=init_gap, mad=mad, mode=mode, time_window=time_window,
+                         similarity_cache=similarity_cache, differences=differences,
+                         x_drop=x_drop, z_drop=z_drop, similarity=similarity)
         self._continue_gap = cont_gap
         self._low = low
 
-        # Dynamic programming tables
-        # +1 to consider the alignment with the empty string
-        self._insert_table = np.zeros((len(dt_trace) + 1, len(pt_trace) + 1, 1))
-        self._deletion_table = np.zeros((len(dt_trace) + 1, len(pt_trace) + 1, 1))
-
-    def _init_deletion(self, i, j):
-        if i > 0 and j == 0:
-            return MIN
-        if j > 0:
-            return self._init_gap + (self._continue_gap * j)
-        return 0
-
-    def _init_insertion(self, i, j):
-        if j > 0 and i == 0:
-            return MIN
-        if i > 0:
-            return self._init_gap + (self._continue_gap * i)
-        return 0
-
-    def _init_match(self, i, j):
-        # if j == 0 and i == 0:
-        #   self._table[i, j, 0] = 0
-        #   self._table[i, j, 1] = 0 # Deletion
-        # else:
-        if j == 0 and not i == 0:
-            # self._table[i, j, 0] = 0  # Deletion
-            self._table[i, j, 1] = self._init_gap + (self._continue_gap * i)
-        elif i == 0 and not j == 0:
-            self._table[i, j, 0] = 1  # Insertion
-            self._table[i, j, 1] = self._init_gap + (self._continue_gap * j)
-
-    def calculate_matrix(self) -> np.ndarray:
-        """
-        Coding for the matrix
-        deletion : 0
-        insertion : 1
-        mismatch : 2
-        match : 3
-        """
-        dt_index, pt_index, _ = self._table.shape
-
-        for j in range(0, pt_index):
-            for i in range(0, dt_index):
-                self._init_match(i, j)
-
-        self._deletion_table = np.array(
-            [[self._init_deletion(i, j) for j in range(0, pt_index)] for i in range(0, dt_index)])
-        self._insert_table = np.array(
-            [[self._init_insertion(i, j) for j in range(0, pt_index)] for i in range(0, dt_index)])
-
-        for j in range(1, pt_index):
-            for i in range(1, dt_index):
-                self._deletion_table[i][j] = \
-                    max((self._init_gap + self._continue_gap + self._table[i - 1][j][1]),
-                        (self._continue_gap + self._deletion_table[i - 1][j]), )
-                self._insert_table[i][j] = \
-                    max((self._init_gap + self._continue_gap + self._table[i][j - 1][1]),
-                        (self._continue_gap + self._insert_table[i][j - 1]))
-
-                equals_value = self._system.snap_equals(self._dt_trace[i - 1],
-                                                        self._pt_trace[j - 1],
-                                                        self._mad,
-                                                        self._timestamp_label,
-                                                        self._low)
-
-                sub = self._table[i - 1, j - 1, 1] + equals_value
-
-                max_value, max_index = max_tolerance(sub,
-                                                     self._insert_table[i][j],
-                                                     self._deletion_table[i][j],
-                                                     equals_value)
-
-                self._table[i, j, 1] = max_value
-                self._table[i, j, 0] = max_index
-                # Match : 3 / Mismatch : 2 / Insertion : 1 / Deletion : 0
-
-        return self._table
+    def _boundaries(self, dt_size: int, pt_size: int) -> (list, list):
+        init_gap, cont_gap = float(self._init_gap), float(self._continue_gap)
+        row = affine_gap_boundary(pt_size, init_gap, cont_gap)
+        column = affine_gap_boundary(dt_size, init_gap, cont_gap)
+        # The deletion state of row 0 and the insertion state of column 0 are gaps too
+        return [row, row.copy()], [column, column.copy()]
+
+    def _boundary_cell(self, index: int, previous: list) -> list:
+        value = float(self._init_gap) + (float(self._continue_gap) * index)
+        return [value, value]
+
+    def _sweep(self, similarity: np.ndarray, row: list, left: list, operations=None,
+               labels=None, right: list = None):
+        sweep_affine_gap(similarity, float(self._init_gap), float(self._continue_gap),
+                         row[0], row[1], left[0], left[1], operations, labels,
+                         right[0] if right is not None else None,
+                         right[1] if right is not None else None)
+
+    def _sweep_band(self, similarity: np.ndarray, first_row: int, first_column: int,
+                    lo: np.ndarray, hi: np.ndarray, offsets: np.ndarray, row: list, left: list,
+                    operations: np.ndarray = None):
+        sweep_affine_gap_band(similarity, first_row, first_column, float(self._init_gap),
+                              float(self._continue_gap), lo, hi, offsets, row[0], row[1],
+                              left[0], left[1], operations)
+
+    def _gap_penalties(self) -> tuple:
+        return float(self._init_gap), float(self._continue_gap)
+
+    def _sweep_band_batch(self, similarity: np.ndarray, first_row: int, first_column: int,
+                          gaps: list, lo: np.ndarray, hi: np.ndarray, offsets: np.ndarray,
+                          row: list, left: list, operations: np.ndarray = None):
+        sweep_affine_gap_band_batch(similarity, first_row, first_column, gaps[0], gaps[1], lo,
+                                    hi, offsets, row[0], row[1], left[0], left[1], operations)
+
+    def _sweep_drop(self, similarity: np.ndarray, first_row: int, first_column: int,
+                    x_drop: float, z_drop: float, lo: np.ndarray, hi: np.ndarray,
+                    offsets: np.ndarray, row: list, left: list, best: np.ndarray,
+                    row_operations: np.ndarray, operations: np.ndarray = None) -> int:
+        return sweep_affine_gap_drop(similarity, first_row, first_column, float(self._init_gap),
+                                     float(self._continue_gap), x_drop, z_drop, lo, hi, offsets,
+                                     row[0], row[1], left[0], left[1], best, row_operations,
+                                     operations)
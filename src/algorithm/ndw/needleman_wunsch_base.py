@@ -4,7 +4,19 @@ import numpy as np
 import pandas as pd
 
 from algorithm.alignment_algorithm import AlignmentAlgorithm
-from systems.system import SystemBase
+from algorithm.ndw.needleman_wunsch_kernels import trace_band
+from systems.snapshot_differences import SnapshotDifferences
+from systems.system import SystemBase, CHUNK_CELLS
+from util.band_util import band_chunks, band_offsets, time_window_band
+from util.lru_cache import ArrayLRUCache
+from util.trace import Trace, to_traces
+from util.traceback_util import new_traceback
+
+# Blocks of the table with fewer cells are aligned storing all their operations
+BLOCK_CELLS = 2 ** 16
+
+# Label of each operation code
+OPERATION_LABELS = np.array(["Deletion", "Insertion", "Mismatch", "Match"], dtype=object)
 
 
 class NeedlemanWunschBase(ABC, AlignmentAlgorithm):
@@ -16,99 +28,547 @@ class NeedlemanWunschBase(ABC, AlignmentAlgorithm):
     two sequences. This version includes the alignment of not only characters but any type
     of snapshot, which is a list of attributes.
 
+    Two modes are available to calculate the alignment:
+        - 'full': it stores the operation of every cell of the table, packed at 2 bits per
+          cell, which requires O(n * m) memory.
+        - 'hirschberg': it stores O(n + m) scores, dividing the table recursively by its
+          middle row [2]. The alignment is the same as the one of the 'full' mode, at the
+          cost of calculating the scores of the table around three times.
+
+    A `similarity_cache` shared by several instances keeps the similarity matrix of each pair
+    of traces, mad and low, so that the instances that only differ in the gap penalties
+    calculate it once. It is only used in 'full' mode without a time window or pruning, as
+    the other modes would lose their memory bound. The similarities of the instances that only
+    differ in mad and low are derived from the same `differences` of the snapshots of the
+    traces, if given, chunk by chunk as the table is filled.
+
+    With a `time_window`, only the band of the table where the timestamps of the DT and PT
+    snapshots differ at most the window is calculated, which requires O((n + m) * W) time
+    and memory. Row i of the band also includes the column on the left of its window, so
+    that gaps can enter it.
+
+    With `x_drop` or `z_drop`, the cells whose score drops more than X below the best score
+    calculated so far [3], or more than Z plus the gaps between their diagonal and the one of
+    the best cell [4], are pruned, and the following rows are only calculated where they can
+    be reached from cells that were not pruned. The alignment may differ from the one of the
+    whole table, and if the last cell is pruned the whole table is calculated as well, which
+    `drop_fallback` reports. Otherwise, the fraction of the table that was not calculated is
+    `pruned_fraction`.
+
     References:
         - Needleman, S.B., and Wunsch, C.D. (1970). A general method applicable to the search for
           similarities in the amino acid sequence of two proteins. Journal of Molecular Biology,
           48(3), 443-453.
+        - [2] Hirschberg, D.S. (1975). A linear space algorithm for computing maximal common
+          subsequences. Communications of the ACM, 18(6), 341-343.
+        - [3] Zhang, Z., Schwartz, S., Wagner, L., and Miller, W. (2000). A greedy algorithm
+          for aligning DNA sequences. Journal of Computational Biology, 7(1-2), 203-214.
+        - [4] Li, H. (2018). Minimap2: pairwise alignment for nucleotide sequences.
+          Bioinformatics, 34(18), 3094-3100.
     """
+    FULL_MODE = 'full'
+    HIRSCHBERG_MODE = 'hirschberg'
 
-    def __init__(self, dt_trace: list,
-                 pt_trace: list,
+    def __init__(self, dt_trace: list | Trace,
+                 pt_trace: list | Trace,
                  system: SystemBase,
                  timestamp_label: str = "timestamp(s)",
                  init_gap: float = -0.2,
                  cont_gap: float = 0,
                  mad: dict = None,
-                 low: float = None):
+                 low: float = None,
+                 mode: str = FULL_MODE,
+                 time_window: float = None,
+                 similarity_cache: ArrayLRUCache = None,
+                 differences: SnapshotDifferences = None,
+                 x_drop: float = None,
+                 z_drop: float = None,
+                 similarity: np.ndarray = None):
+        """
+        :param similarity: Similarity matrix of the traces, (len(dt_trace), len(pt_trace)),
+            used instead of calculating it, e.g., when it is updated incrementally
+        """
+        if mode not in (self.FULL_MODE, self.HIRSCHBERG_MODE):
+            raise ValueError(f'Invalid alignment mode {mode}.')
+        if time_window is not None and mode != self.FULL_MODE:
+            raise ValueError(f'Invalid alignment mode {mode} with a time window.')
+        for drop in (x_drop, z_drop):
+            if drop is not None and not drop >= 0:
+                raise ValueError(f'Invalid drop {drop}.')
+        if (x_drop is not None or z_drop is not None) and \
+                (mode != self.FULL_MODE or time_window is not None):
+            raise ValueError(f'Invalid alignment mode {mode} with X-drop or Z-drop, only the '
+                             f'full mode without a time window prunes the table.')
         # Traces to align
         self._continue_gap = cont_gap
-        self._dt_trace = dt_trace
-        self._pt_trace = pt_trace
+        self._dt_trace, self._pt_trace = to_traces(dt_trace, pt_trace, timestamp_label, system)
         # System information
         self._system = system
         # Configuration
         self._timestamp_label = timestamp_label
         self._init_gap = init_gap
         self._mad = mad
-        # Alignment table to calculate alignment
-        self._table = np.zeros((len(dt_trace) + 1, len(pt_trace) + 1, 2))
+        self._mode = mode
+        self._time_window = time_window
+        self._similarity_cache = similarity_cache
+        self._differences = differences
+        if similarity is not None and \
+                similarity.shape != (len(self._dt_trace), len(self._pt_trace)):
+            raise ValueError(f'Invalid similarity matrix of shape {similarity.shape}.')
+        self._similarity = similarity
+        # Pruning of the table, disabled if None
+        self._x_drop = x_drop
+        self._z_drop = z_drop
+        self._pruned_fraction = None
+        self._drop_fallback = False
+        # Band (lo, hi, offsets) and packed operations of the table, only in 'full' mode
+        self._traceback = None
+        self._score = None
         self._low = low
 
     def build_result(self) -> pd.DataFrame:
-        dt_size = len(self._table) - 1
-        pt_size = len(self._table[0, :, :]) - 1
-        keys = self._pt_trace[0].keys()
-        rows = []
-
-        # Add headers to file
-        headers = ["dt-" + k for k in keys]
-        headers.extend(["pt-" + k for k in keys])
-        headers.append("operation")
-
-        while dt_size > 0 or pt_size > 0:
-            row = []
-            if pt_size > 0:
-                if self._table[dt_size, pt_size, 0] == 1:  # Insertion
-                    aux = []
-                    for key in keys:
-                        row.append("-")
-                        aux.append(self._pt_trace[pt_size - 1][key])  # - 1
-
-                    row.extend(aux)
-                    row.append("Insertion")
-                    pt_size -= 1
-                    rows.insert(0, row)
-                    continue
-
-            if dt_size > 0 and pt_size > 0:
-                if self._table[dt_size, pt_size, 0] > 1:  # Match or mismatch
-                    aux = []
-                    for key in keys:
-                        row.append(self._dt_trace[dt_size - 1][key])
-                        aux.append(self._pt_trace[pt_size - 1][key])
-                    row.extend(aux)
-                    if self._table[dt_size, pt_size, 0] > 2:
-                        row.append("Match")
-                    else:
-                        row.append("Mismatch")
-                    dt_size -= 1
-                    pt_size -= 1
-                    rows.insert(0, row)
-                    continue
-
-            aux = []  # Must be a deletion
-            for key in keys:
-                row.append(self._dt_trace[dt_size - 1][key])  # - 1
-                aux.append("-")
-            row.extend(aux)
-            row.append("Deletion")
-            dt_size -= 1
-            rows.insert(0, row)
-
-        return pd.DataFrame(rows, columns=headers)
+        return self._build_alignment(trace_band(*self._traceback))
+
+    def _build_alignment(self, operations) -> pd.DataFrame:
+        """
+        Builds the alignment from the sequence of operations from the first cell of the
+        table to the last one.
+        :param operations: Operations coded as deletion : 0, insertion : 1, mismatch : 2 and
+            match : 3
+        :return: A DataFrame with the DT and PT snapshots and the operation of each step
+        """
+        operations = np.asarray(operations, dtype=np.uint8)
+        dt_indices, pt_indices = self._alignment_indices(operations)
+        keys = list(self._pt_trace.keys())
+        dt_columns = self._dt_trace.take(keys, dt_indices, fill="-")
+        pt_columns = self._pt_trace.take(keys, pt_indices, fill="-")
+
+        columns = {"dt-" + k: dt_columns[k] for k in keys}
+        columns.update({"pt-" + k: pt_columns[k] for k in keys})
+        columns["operation"] = OPERATION_LABELS.take(operations)
+        # Same column types as if the DataFrame was built row by row
+        return pd.DataFrame(columns).infer_objects()
+
+    @staticmethod
+    def _alignment_indices(operations: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Position of the DT and PT snapshots of each step of the alignment, -1 for the gaps.
+        """
+        dt_steps = operations != 1  # Not an insertion
+        pt_steps = operations != 0  # Not a deletion
+        dt_indices = np.where(dt_steps, np.cumsum(dt_steps) - 1, -1)
+        pt_indices = np.where(pt_steps, np.cumsum(pt_steps) - 1, -1)
+        return dt_indices, pt_indices
+
+    def _similarity_matrix(self, dt_slice: slice = slice(None),
+                           pt_slice: slice = slice(None)) -> np.ndarray:
+        """
+        Calculates the score of aligning each DT snapshot with each PT snapshot at once,
+        instead of calling `SystemBase.snap_equals` for every cell of the table.
+        :param dt_slice: DT snapshots to compare, all of them by default
+        :param pt_slice: PT snapshots to compare, all of them by default
+        :return: A (len(dt_trace), len(pt_trace)) matrix with the scores
+        """
+        if self._similarity is None and self._similarity_cache is not None:
+            self._similarity = self._whole_similarity_matrix()
+        if self._similarity is not None:
+            return self._similarity[dt_slice, pt_slice]
+        if self._differences is not None:
+            return self._differences.similarity_matrix(self._mad, self._low, dt_slice, pt_slice)
+        return self._system.snap_equals_matrix(self._dt_trace[dt_slice],
+                                               self._pt_trace[pt_slice],
+                                               self._mad,
+                                               self._low)
+
+    def _whole_similarity_matrix(self) -> np.ndarray:
+        """
+        The similarity matrix of the whole traces, from the cache, or derived from the
+        snapshot differences or calculated, and stored in the cache. None if it does not fit
+        in the cache, or if only a band of the table is filled (in 'hirschberg' mode, with a
+        time window or pruning it), whose similarities are calculated chunk by chunk in
+        O(n + m) or O(band) memory.
+        """
+        dt_size, pt_size = len(self._dt_trace), len(self._pt_trace)
+        cache = self._similarity_cache
+        if self._mode != self.FULL_MODE or self._time_window is not None or self._prunes() \
+                or not cache.fits(dt_size * pt_size * np.dtype(np.float64).itemsize):
+            return None
+
+        key = self._similarity_key()
+        similarity = cache.get(key)
+        if similarity is None:
+            if self._differences is not None:
+                similarity = self._differences.similarity_matrix(self._mad, self._low)
+            else:
+                similarity = self._system.snap_equals_matrix(self._dt_trace, self._pt_trace,
+                                                             self._mad, self._low)
+            cache.put(key, similarity)
+        return similarity
+
+    def _similarity_key(self) -> tuple:
+        """
+        Key of the similarity matrix of the traces in the similarity cache. The traces are
+        compared by identity, and the cache keeps them alive.
+        """
+        return (self._dt_trace, self._pt_trace, tuple(sorted((self._mad or {}).items())),
+                self._low)
 
-    @abstractmethod
     def calculate_matrix(self) -> np.ndarray:
+        """
+        Fills the table (or its band inside the time window) keeping one row of scores and
+        the operation of each cell packed at 2 bits per cell, see `util.traceback_util`.
+
+        Coding for the operations
+        deletion : 0
+        insertion : 1
+        mismatch : 2
+        match : 3
+        :return: The packed operations
+        """
+        pruned = self._drop_band() if self._prunes() else None
+        if pruned is not None:
+            self._score, self._traceback = pruned
+            return self._traceback[-1]
+        lo, hi = self._band()
+        offsets = band_offsets(lo, hi)
+        operations = new_traceback(offsets[-1])
+        self._score = self._sweep_band_rows(lo, hi, offsets, operations)
+        self._traceback = (lo, hi, offsets, operations)
+        return operations
+
+    @abstractmethod
+    def _boundaries(self, dt_size: int, pt_size: int) -> (list, list):
+        """
+        Scores (and gap states) of the first row and the first column of the table.
+        :return: The list of arrays of the first row and the list of arrays of the first
+            column
+        """
+        pass
+
+    @abstractmethod
+    def _boundary_cell(self, index: int, previous: list) -> list:
+        """
+        Score (and gap states) of a cell of the first row (or column) of the table, the same
+        as the one of `_boundaries`, from the ones of the previous cell.
+        :param index: Position of the cell in the row (or column), greater than 0
+        """
+        pass
+
+    @abstractmethod
+    def _sweep(self, similarity: np.ndarray, row: list, left: list, operations=None,
+               labels=None, right: list = None):
+        """
+        Fills a block of the table keeping only its last row, see `sweep_tolerance`.
+        :param row: Arrays of the row above the block, updated in place
+        :param left: Arrays of the column to the left of the block
+        :param right: Output arrays of the last column of the block, if not None
+        """
+        pass
+
+    @abstractmethod
+    def _sweep_band(self, similarity: np.ndarray, first_row: int, first_column: int,
+                    lo: np.ndarray, hi: np.ndarray, offsets: np.ndarray, row: list, left: list,
+                    operations: np.ndarray = None):
+        """
+        Fills consecutive rows of a banded table, see `sweep_tolerance_band`.
+        :param row: Arrays of the row above, updated in place
+        :param left: Arrays of column 0
+        """
+        pass
+
+    @abstractmethod
+    def _gap_penalties(self) -> tuple:
+        """
+        Gap penalties of the configuration, in the order expected by `_sweep_band_batch`.
+        """
+        pass
+
+    @abstractmethod
+    def _sweep_band_batch(self, similarity: np.ndarray, first_row: int, first_column: int,
+                          gaps: list, lo: np.ndarray, hi: np.ndarray, offsets: np.ndarray,
+                          row: list, left: list, operations: np.ndarray = None):
+        """
+        Fills consecutive rows of a banded table for several configurations at once, see
+        `sweep_tolerance_band_batch`.
+        :param gaps: One array per gap penalty of `_gap_penalties`, with the value of each
+            configuration
+        :param row: (len(PT) + 1, K) arrays of the row above, updated in place
+        :param left: (len(DT) + 1, K) arrays of column 0
+        """
+        pass
+
+    @abstractmethod
+    def _sweep_drop(self, similarity: np.ndarray, first_row: int, first_column: int,
+                    x_drop: float, z_drop: float, lo: np.ndarray, hi: np.ndarray,
+                    offsets: np.ndarray, row: list, left: list, best: np.ndarray,
+                    row_operations: np.ndarray, operations: np.ndarray = None) -> int:
+        """
+        Fills consecutive rows of the table pruning the cells that drop too much below the
+        best score, see `sweep_tolerance_drop`.
+        :param row: Arrays of the row above, updated in place
+        :param left: Arrays of column 0
+        """
         pass
 
+    def _sweep_rows(self, i0: int, i1: int, j0: int, j1: int, row: list, left: list,
+                    operations: np.ndarray = None, labels: np.ndarray = None,
+                    right: list = None):
+        """
+        Fills the block of the table below row i0 up to row i1, between columns j0 and j1,
+        calculating its similarity matrix in chunks of rows.
+        """
+        chunk_size = max(1, CHUNK_CELLS // max(j1 - j0, 1))
+        for start in range(i0, i1, chunk_size):
+            end = min(start + chunk_size, i1)
+            similarity = self._similarity_matrix(slice(start, end), slice(j0, j1))
+            rows = slice(start - i0, end - i0 + 1)
+            self._sweep(similarity, row, [values[rows] for values in left],
+                        operations[start - i0:end - i0] if operations is not None else None,
+                        labels,
+                        [values[rows] for values in right] if right is not None else None)
+
+    def _divide_and_conquer(self, i0: int, i1: int, j0: int, j1: int, top: list, left: list,
+                            operations: list) -> float:
+        """
+        Appends to operations the traceback from cell (i1, j1) to cell (i0, j0), in reverse
+        order, using linear memory. Both cells must belong to the traceback of the table.
+        :param top: Arrays of row i0 from column j0 to j1
+        :param left: Arrays of column j0 from row i0 to i1
+        :return: The score of cell (i1, j1)
+        """
+        height, width = i1 - i0, j1 - j0
+        if height < 2 or height * width <= BLOCK_CELLS:
+            block_operations = np.empty((height, width), dtype=np.uint8)
+            row = [values.copy() for values in top]
+            self._sweep_rows(i0, i1, j0, j1, row, left, operations=block_operations)
+            self._trace_block(block_operations, operations)
+            return row[0][-1]
+
+        middle = (i0 + i1) // 2
+        row = [values.copy() for values in top]
+        self._sweep_rows(i0, middle, j0, j1, row, left)
+        middle_row = [values.copy() for values in row]
+
+        # Column where the traceback from (i1, j1) reaches the middle row
+        labels = np.arange(width + 1)
+        lower_left = [values[middle - i0:] for values in left]
+        self._sweep_rows(middle, i1, j0, j1, row, lower_left, labels=labels)
+        score = row[0][-1]
+        k = j0 + labels[-1]
+
+        # Column k below the middle row is the left boundary of the lower block
+        right = [np.empty(i1 - middle + 1) for _ in left]
+        row = [values[:k - j0 + 1].copy() for values in middle_row]
+        self._sweep_rows(middle, i1, j0, k, row, lower_left, right=right)
+
+        self._divide_and_conquer(middle, i1, k, j1, [values[k - j0:] for values in middle_row],
+                                 right, operations)
+        self._divide_and_conquer(i0, middle, j0, k, [values[:k - j0 + 1] for values in top],
+                                 [values[:middle - i0 + 1] for values in left], operations)
+        return score
+
+    @staticmethod
+    def _trace_block(block_operations: np.ndarray, operations: list):
+        """
+        Appends to operations the traceback of a block from its last cell to its first one.
+        The cells of the first row of the block are insertions and the ones of the first
+        column deletions, as the traceback goes through the first cell of the block.
+        """
+        i, j = block_operations.shape
+        while i > 0 or j > 0:
+            operation = block_operations[i - 1, j - 1] if i > 0 and j > 0 else 0
+            if j > 0 and (i == 0 or operation == 1):  # Insertion
+                operations.append(1)
+                j -= 1
+            elif i > 0 and j > 0 and operation > 1:  # Match or mismatch
+                operations.append(int(operation))
+                i -= 1
+                j -= 1
+            else:  # Deletion
+                operations.append(0)
+                i -= 1
+
+    def _time_window_band(self, dt_size: int, pt_size: int) -> (np.ndarray, np.ndarray):
+        """
+        First and last column of each row of the table inside the time window, widened so
+        that the band is connected and contains the first and the last cells.
+        """
+        lower, upper = time_window_band(self._dt_trace.timestamps, self._pt_trace.timestamps,
+                                        self._time_window)
+        lo = np.zeros(dt_size + 1, dtype=np.int64)
+        hi = np.zeros(dt_size + 1, dtype=np.int64)
+        lo[1:] = lower
+        hi[1:] = upper
+        hi[0] = hi[1] if dt_size > 0 else pt_size
+        hi[-1] = pt_size
+
+        hi = np.maximum.accumulate(hi)
+        lo[1:] = np.minimum(lo[1:], hi[:-1])
+        return lo, hi
+
+    def _band(self) -> (np.ndarray, np.ndarray):
+        """
+        First and last column of each row of the table that are calculated, which are all of
+        them unless there is a time window.
+        """
+        dt_size, pt_size = len(self._dt_trace), len(self._pt_trace)
+        if self._time_window is not None:
+            return self._time_window_band(dt_size, pt_size)
+        return np.zeros(dt_size + 1, dtype=np.int64), np.full(dt_size + 1, pt_size,
+                                                              dtype=np.int64)
+
+    def _sweep_band_rows(self, lo: np.ndarray, hi: np.ndarray, offsets: np.ndarray,
+                         band_operations: np.ndarray = None) -> float:
+        """
+        Fills the band row by row, calculating its similarity matrix in chunks of rows. The
+        rows span the PT trace, O(len(pt_trace)) memory besides the chunks and operations.
+        :return: The score of the last cell of the table
+        """
+        dt_size, pt_size = len(self._dt_trace), len(self._pt_trace)
+        row, left = self._boundaries(dt_size, pt_size)
+        for values in row:
+            values[hi[0] + 1:] = -np.inf
+
+        for start, end in band_chunks(lo, hi, 1, dt_size + 1, CHUNK_CELLS):
+            first_column = max(lo[start], 1)
+            similarity = self._similarity_matrix(slice(start - 1, end - 1),
+                                                 slice(first_column - 1, hi[end - 1]))
+            self._sweep_band(similarity, start, first_column, lo, hi, offsets, row, left,
+                             band_operations)
+        return row[0][-1]
+
+    def _prunes(self) -> bool:
+        return self._x_drop is not None or self._z_drop is not None
+
+    def _drop_band(self, operations: bool = True) -> (float, tuple):
+        """
+        Fills the table row by row pruning it with X-drop and Z-drop. The band of each row is
+        only known once the row above is calculated, so the similarity matrix of each chunk of
+        rows spans from the first column of the band above to a margin beyond its last column.
+        If a row goes on beyond the margin, the chunk is calculated again with twice the
+        margin.
+        :param operations: Whether the packed operations are stored
+        :return: The score of the last cell and the band (lo, hi, offsets) with its packed
+            operations, or None if the last cell of the table was pruned
+        """
+        dt_size, pt_size = len(self._dt_trace), len(self._pt_trace)
+        x_drop = np.inf if self._x_drop is None else float(self._x_drop)
+        z_drop = np.inf if self._z_drop is None else float(self._z_drop)
+        row, left = self._boundaries(dt_size, pt_size)
+
+        lo = np.zeros(dt_size + 1, dtype=np.int64)
+        hi = np.zeros(dt_size + 1, dtype=np.int64)
+        offsets = np.zeros(dt_size + 2, dtype=np.int64)
+        # Row 0 ends at its first pruned cell, as the next ones are only reachable through it
+        drop = row[0][0] - row[0]
+        dropped = (drop > x_drop) | \
+                  (drop > z_drop + abs(self._gap_penalties()[-1]) * np.arange(pt_size + 1))
+        hi[0] = np.argmax(dropped) - 1 if dropped.any() else pt_size
+        for values in row:
+            values[hi[0] + 1:] = -np.inf
+        offsets[1] = hi[0] + 1
+        best = np.array([row[0][:hi[0] + 1].max(), 0, np.argmax(row[0][:hi[0] + 1])],
+                        dtype=np.float64)
+
+        row_operations = np.zeros(pt_size + 1, dtype=np.uint8)
+        band_operations = new_traceback(offsets[1]) if operations else None
+        margin = 64
+        calculated = 0
+        i = 1
+        while i <= dt_size:
+            first_column = max(lo[i - 1], 1)
+            rows = min(max(1, CHUNK_CELLS // (hi[i - 1] - first_column + 1 + margin)),
+                       dt_size - i + 1)
+            last_column = min(pt_size, hi[i - 1] + rows + margin)
+            if operations:
+                size = (offsets[i] + rows * (last_column - lo[i - 1] + 1) + 3) // 4
+                if size > len(band_operations):
+                    band_operations = np.concatenate(
+                        [band_operations,
+                         np.zeros(max(size, 2 * len(band_operations)) - len(band_operations),
+                                  dtype=np.uint8)])
+                first_byte = offsets[i] // 4
+                saved_byte = band_operations[first_byte]
+            # State of the columns the chunk may update, restored to calculate it again
+            columns = slice(lo[i - 1], last_column + 1)
+            saved_row = [values[columns].copy() for values in row]
+            saved_best = best.copy()
+
+            similarity = self._similarity_matrix(slice(i - 1, i - 1 + rows),
+                                                 slice(first_column - 1, last_column))
+            result = self._sweep_drop(similarity, i, first_column, x_drop, z_drop, lo, hi,
+                                      offsets, row, left, best, row_operations,
+                                      band_operations)
+            if result == -1:
+                break
+            if result == -2:
+                for values, saved in zip(row, saved_row):
+                    values[columns] = saved
+                best[:] = saved_best
+                if operations:
+                    band_operations[first_byte] = saved_byte
+                    band_operations[first_byte + 1:] = 0
+                margin *= 2
+                continue
+            calculated += result
+            i += rows
+
+        if i <= dt_size or hi[-1] != pt_size or row[0][-1] == -np.inf:
+            # The whole table is calculated after the pruned one, nothing is saved
+            self._pruned_fraction = None
+            self._drop_fallback = True
+            return None
+        self._pruned_fraction = 1 - calculated / max(dt_size * pt_size, 1)
+        return row[0][-1], (lo, hi, offsets, band_operations)
+
     def calculate_alignment(self) -> pd.DataFrame:
+        # The table may have been already filled, e.g., by `NeedlemanWunschBatch`
+        if self._traceback is not None:
+            return self.build_result()
+
+        if self._mode == self.HIRSCHBERG_MODE:
+            dt_size, pt_size = len(self._dt_trace), len(self._pt_trace)
+            top, left = self._boundaries(dt_size, pt_size)
+            operations = []
+            self._score = self._divide_and_conquer(0, dt_size, 0, pt_size, top, left,
+                                                   operations)
+            operations.reverse()
+            return self._build_alignment(operations)
+
         self.calculate_matrix()
         return self.build_result()
 
+    def calculate_score(self) -> float:
+        if self._score is not None:
+            return self._score
+        pruned = self._drop_band(operations=False) if self._prunes() else None
+        if pruned is not None:
+            self._score = pruned[0]
+            return self._score
+        lo, hi = self._band()
+        self._score = self._sweep_band_rows(lo, hi, band_offsets(lo, hi))
+        return self._score
+
     @property
     def initiate_gap(self):
         return self._init_gap
 
     @property
     def score(self):
-        return self._table[-1, -1]
+        return self._score
+
+    @property
+    def pruned_fraction(self) -> float:
+        """
+        Fraction of the cells of the table that X-drop and Z-drop did not calculate, or None
+        without them or if they pruned the last cell, see `drop_fallback`.
+        """
+        return self._pruned_fraction
+
+    @property
+    def drop_fallback(self) -> bool:
+        """
+        Whether X-drop or Z-drop pruned the last cell of the table, so the whole table was
+        calculated after the pruned one.
+        """
+        return self._drop_fallback
@@ -0,0 +1,78 @@
+import numpy as np
+
+from algorithm.ndw.needleman_wunsch_base import NeedlemanWunschBase
+from systems.system import CHUNK_CELLS
+from util.band_util import band_chunks, band_offsets
+
+
+class NeedlemanWunschBatch:
+    """
+    Fills at once the Needleman-Wunsch tables of K configurations that only differ in their
+    gap penalties, e.g., the points of a gap tuning sweep.
+
+    The similarity matrix and the band are calculated once for all the configurations, and
+    each cell of the table is filled for the K configurations in the innermost loop, over
+    (cells, K) arrays. The scores and the operations of each configuration are the same as
+    the ones of filling its table alone.
+    """
+
+    def __init__(self, algorithms: list):
+        """
+        :param algorithms: Needleman-Wunsch algorithms of the same class, with the same traces,
+            mad, low and time window, and without X-drop or Z-drop, which prune a different
+            band for each configuration
+        """
+        if not algorithms:
+            raise ValueError('Invalid empty batch of algorithms.')
+        first = algorithms[0]
+        for algorithm in algorithms:
+            if not isinstance(algorithm, NeedlemanWunschBase) \
+                    or type(algorithm) is not type(first) \
+                    or algorithm._dt_trace is not first._dt_trace \
+                    or algorithm._pt_trace is not first._pt_trace \
+                    or algorithm._mad != first._mad \
+                    or algorithm._low != first._low \
+                    or algorithm._time_window != first._time_window \
+                    or algorithm._prunes():
+                raise ValueError(f'Invalid batch algorithm {algorithm}, it must only differ '
+                                 f'in the gap penalties.')
+        self._algorithms = algorithms
+
+    def calculate(self, tracebacks: bool = True) -> np.ndarray:
+        """
+        Fills the tables of all the configurations. Afterwards, each algorithm has its score
+        and, with the tracebacks, `calculate_alignment` builds its alignment without filling
+        the table again.
+        :param tracebacks: Whether the operations of each table are stored, which requires
+            K times the memory of the traceback of one table
+        :return: The score of each configuration
+        """
+        first = self._algorithms[0]
+        dt_size, pt_size = len(first._dt_trace), len(first._pt_trace)
+        lo, hi = first._band()
+        offsets = band_offsets(lo, hi)
+        operations = np.zeros((len(self._algorithms), (offsets[-1] + 3) // 4),
+                              dtype=np.uint8) if tracebacks else None
+
+        # Boundaries of the K configurations with the configuration as the last axis
+        boundaries = [algorithm._boundaries(dt_size, pt_size) for algorithm in self._algorithms]
+        row = [np.stack(values, axis=1) for values in zip(*(b[0] for b in boundaries))]
+        left = [np.stack(values, axis=1) for values in zip(*(b[1] for b in boundaries))]
+        for values in row:
+            values[hi[0] + 1:] = -np.inf
+        gaps = [np.array(values) for values in
+                zip(*(algorithm._gap_penalties() for algorithm in self._algorithms))]
+
+        for start, end in band_chunks(lo, hi, 1, dt_size + 1, CHUNK_CELLS):
+            first_column = max(lo[start], 1)
+            similarity = first._similarity_matrix(slice(start - 1, end - 1),
+                                                  slice(first_column - 1, hi[end - 1]))
+            first._sweep_band_batch(similarity, start, first_column, gaps, lo, hi, offsets,
+                                    row, left, operations)
+
+        scores = row[0][-1].copy()
+        for k, algorithm in enumerate(self._algorithms):
+            algorithm._score = scores[k]
+            if tracebacks:
+                algorithm._traceback = (lo, hi, offsets, operations[k])
+        return scores
@@ -0,0 +1,155 @@
+import numpy as np
+
+from algorithm.ndw.needleman_wunsch_base import NeedlemanWunschBase
+from algorithm.ndw.needleman_wunsch_kernels import follow_matches
+from util.trace import Trace, TraceBuffer
+
+
+class IncrementalNeedlemanWunsch:
+    """
+    Needleman-Wunsch alignment of two streams of snapshots, e.g., to validate a running
+    digital twin online. The DT and PT snapshots are appended as they arrive, and each one
+    only fills the new row (or column) of the table, in O(m) (or O(n)) time, with the same
+    compiled kernels and the same gap penalties, mad and low of a Needleman-Wunsch algorithm.
+    The score and the percentage of matched snapshots of the alignment of everything
+    appended so far are available at any time.
+
+    Only the last row and the last column of the table are kept. With a `history`, only the
+    last `history` snapshots of each stream are kept too, and the new snapshots can only be
+    aligned with them: the cells of the table with older snapshots are not calculated (-inf),
+    which bounds the memory and the time per snapshot. Without it, the score is the same as
+    the one of the algorithm with the whole traces.
+    """
+
+    def __init__(self, algorithm: NeedlemanWunschBase, history: int = None):
+        """
+        :param algorithm: Needleman-Wunsch algorithm with the configuration of the alignment.
+            Its traces, which may be empty, are the first snapshots of the streams.
+        :param history: Number of snapshots of each stream that are kept, all of them if None
+        """
+        if algorithm._time_window is not None or algorithm._prunes():
+            raise ValueError(f'Invalid algorithm {algorithm}, the incremental alignment '
+                             f'calculates the whole table.')
+        if history is not None and history < 1:
+            raise ValueError(f'Invalid history {history}.')
+        self._algorithm = algorithm
+        self._history = history
+        dt_trace, pt_trace = algorithm._dt_trace, algorithm._pt_trace
+        self._dt_window = TraceBuffer(algorithm._timestamp_label, algorithm._system,
+                                      dt_trace.categories)
+        self._pt_window = TraceBuffer(algorithm._timestamp_label, algorithm._system,
+                                      pt_trace.categories)
+
+        # Number of snapshots appended to each stream
+        self._dt_size = 0
+        self._pt_size = 0
+        # Scores (and gap states) of the last row from the column of the first kept PT
+        # snapshot, and of the last column from the row of the first kept DT snapshot, with
+        # the number of matches of the traceback of each cell
+        row, _ = algorithm._boundaries(0, 0)
+        self._row = row
+        self._column = [values.copy() for values in row]
+        self._row_matches = np.zeros(1, dtype=np.int64)
+        self._column_matches = np.zeros(1, dtype=np.int64)
+        # Cell (n, 0) of the first column and cell (0, m) of the first row
+        self._dt_boundary = [values[0] for values in row]
+        self._pt_boundary = [values[0] for values in row]
+
+        # The snapshots of the algorithm, in the order they were produced
+        timestamps = np.concatenate([dt_trace.timestamps, pt_trace.timestamps]) \
+            if len(dt_trace) and len(pt_trace) else np.arange(len(dt_trace) + len(pt_trace))
+        for index in np.argsort(timestamps, kind='stable'):
+            if index < len(dt_trace):
+                self.append_dt(dt_trace[int(index)])
+            else:
+                self.append_pt(pt_trace[int(index) - len(dt_trace)])
+
+    def append_dt(self, snapshot: dict):
+        """
+        Appends a DT snapshot, filling a new row of the table.
+        """
+        algorithm = self._algorithm
+        dt_trace = self._dt_window.append(snapshot)
+        pt_trace = self._pt_window.trace
+        similarity = self._similarity(dt_trace, pt_trace)
+
+        self._dt_size += 1
+        if self._pt_window.first_index == 0:
+            self._dt_boundary = algorithm._boundary_cell(self._dt_size, self._dt_boundary)
+            first = self._dt_boundary
+        else:
+            first = [-np.inf for _ in self._row]
+        left = [np.array([values[0], value]) for values, value in zip(self._row, first)]
+        right = [np.empty(2) for _ in self._row]
+        operations = np.empty(similarity.shape, dtype=np.uint8)
+        algorithm._sweep(similarity, self._row, left, operations, right=right)
+
+        self._row_matches = follow_matches(operations[0], self._row_matches, 0, 1)
+        self._column = [np.append(values, new[1]) for values, new in zip(self._column, right)]
+        self._column_matches = np.append(self._column_matches, self._row_matches[-1])
+        if self._history is not None and len(self._dt_window) > self._history:
+            self._dt_window.drop()
+            self._column = [values[1:] for values in self._column]
+            self._column_matches = self._column_matches[1:]
+
+    def append_pt(self, snapshot: dict):
+        """
+        Appends a PT snapshot, filling a new column of the table.
+        """
+        algorithm = self._algorithm
+        pt_trace = self._pt_window.append(snapshot)
+        dt_trace = self._dt_window.trace
+        similarity = self._similarity(dt_trace, pt_trace)
+
+        self._pt_size += 1
+        if self._dt_window.first_index == 0:
+            self._pt_boundary = algorithm._boundary_cell(self._pt_size, self._pt_boundary)
+            first = self._pt_boundary
+        else:
+            first = [-np.inf for _ in self._column]
+        # The new column is a block of one column below the first kept row
+        top = [np.array([values[0], value]) for values, value in zip(self._column, first)]
+        right = [np.full(len(values), value) for values, value in zip(self._column, first)]
+        operations = np.empty(similarity.shape, dtype=np.uint8)
+        algorithm._sweep(similarity, top, self._column, operations, right=right)
+
+        self._column = right
+        self._column_matches = follow_matches(operations[:, 0], self._column_matches, 0, 0)
+        self._row = [np.append(values, new[1]) for values, new in zip(self._row, top)]
+        self._row_matches = np.append(self._row_matches, self._column_matches[-1])
+        if self._history is not None and len(self._pt_window) > self._history:
+            self._pt_window.drop()
+            self._row = [values[1:] for values in self._row]
+            self._row_matches = self._row_matches[1:]
+
+    def _similarity(self, dt_trace: Trace, pt_trace: Trace) -> np.ndarray:
+        if len(dt_trace) == 0 or len(pt_trace) == 0:
+            return np.zeros((len(dt_trace), len(pt_trace)))
+        algorithm = self._algorithm
+        return algorithm._system.snap_equals_matrix(dt_trace, pt_trace, algorithm._mad,
+                                                    algorithm._low)
+
+    @property
+    def score(self) -> float:
+        """
+        Score of the alignment of all the snapshots appended so far.
+        """
+        return self._row[0][-1]
+
+    @property
+    def percentage_matched_snapshots(self) -> float:
+        """
+        Percentage of matched snapshots of the alignment of all the snapshots appended so
+        far, as `NeedlemanWunschAlignmentMetrics.percentage_matched_snapshots`.
+        """
+        total_snapshots = max(self._dt_size, self._pt_size)
+        return self._row_matches[-1] / total_snapshots * 100 if total_snapshots else 0.0
+
+    @property
+    def dt_size(self) -> int:
+        return self._dt_size
+
+    @property
+    def pt_size(self) -> int:
+        return self._pt_size
+
@@ -0,0 +1,616 @@
+"""
+Compiled kernels to fill the dynamic programming tables of the Needleman-Wunsch variants.
+
+The kernels receive the similarity matrix already calculated with
+`SystemBase.snap_equals_matrix`, so that the only work done per cell is the recurrence.
+They reproduce exactly the tie-breaking of `util.float_util.max_tolerance`.
+"""
+import numpy as np
+from numba import jit
+
+from util.float_util import max_tolerance
+from util.traceback_util import get_operation, set_operation
+
+# The same function used by the interpreted code, compiled, to keep identical decisions
+_max_tolerance = jit(nopython=True, cache=True)(max_tolerance)
+
+
+@jit(nopython=True, cache=True)
+def tolerance_boundary(size: int, gap: float) -> np.ndarray:
+    """
+    Scores of the first row (or column) of the table with a constant gap penalty.
+    """
+    boundary = np.zeros(size + 1)
+    for i in range(1, size + 1):
+        boundary[i] = boundary[i - 1] + gap
+    return boundary
+
+
+@jit(nopython=True, cache=True)
+def affine_gap_boundary(size: int, init_gap: float, cont_gap: float) -> np.ndarray:
+    """
+    Scores of the first row (or column) of the table with affine gap penalties.
+    """
+    boundary = np.zeros(size + 1)
+    for i in range(1, size + 1):
+        boundary[i] = init_gap + (cont_gap * i)
+    return boundary
+
+
+@jit(nopython=True, cache=True)
+def sweep_tolerance(similarity, gap, row, left, operations=None, labels=None, right=None):
+    """
+    Fills a block of the Needleman-Wunsch table with a constant gap penalty keeping only
+    one row of scores in memory.
+
+    :param similarity: (h, w) score of aligning each pair of snapshots of the block
+    :param gap: Penalty of each gap
+    :param row: (w + 1) scores of the row above the block. It is updated in place and, on
+        return, it contains the scores of the last row of the block.
+    :param left: (h + 1) scores of the column to the left of the block (left[0] == row[0])
+    :param operations: (h, w) output operations of the block, if not None
+    :param labels: (w + 1) labels of the cells of the row above the block, if not None. On
+        return, each cell of the last row holds the label of the cell of the first row its
+        traceback goes through.
+    :param right: (h + 1) output scores of the last column of the block, if not None
+    """
+    height, width = similarity.shape
+    if right is not None:
+        right[0] = row[width]
+
+    for i in range(1, height + 1):
+        diagonal = row[0]
+        row[0] = left[i]
+        diagonal_label = 0
+        if labels is not None:
+            diagonal_label = labels[0]
+
+        for j in range(1, width + 1):
+            equals_value = similarity[i - 1, j - 1]
+
+            sub = diagonal + equals_value  # Match/Mismatch
+            ins = row[j - 1] + gap  # Insertion
+            dele = row[j] + gap  # Deletion
+
+            max_value, max_index = _max_tolerance(sub, ins, dele, equals_value)
+
+            diagonal = row[j]
+            row[j] = max_value
+            if operations is not None:
+                operations[i - 1, j - 1] = max_index
+            if labels is not None:
+                upper_label = labels[j]
+                if max_index > 1:
+                    labels[j] = diagonal_label
+                elif max_index == 1:
+                    labels[j] = labels[j - 1]
+                diagonal_label = upper_label
+
+        if right is not None:
+            right[i] = row[width]
+
+
+@jit(nopython=True, cache=True)
+def sweep_affine_gap(similarity, init_gap, cont_gap, row, deletion, left, insertion,
+                     operations=None, labels=None, right=None, right_insertion=None):
+    """
+    Fills a block of the Needleman-Wunsch table with affine gap penalties keeping only one
+    row of each state in memory. See `sweep_tolerance` for the common parameters.
+
+    :param deletion: (w + 1) deletion state of the row above the block, updated in place
+    :param insertion: (h + 1) insertion state of the column to the left of the block
+    :param right_insertion: (h + 1) output insertion state of the last column, if not None
+    """
+    height, width = similarity.shape
+    if right is not None:
+        right[0] = row[width]
+
+    for i in range(1, height + 1):
+        diagonal = row[0]
+        row[0] = left[i]
+        current_insertion = insertion[i]
+        diagonal_label = 0
+        if labels is not None:
+            diagonal_label = labels[0]
+
+        for j in range(1, width + 1):
+            open_deletion = init_gap + cont_gap + row[j]
+            extend_deletion = cont_gap + deletion[j]
+            deletion[j] = extend_deletion if extend_deletion > open_deletion else open_deletion
+
+            open_insertion = init_gap + cont_gap + row[j - 1]
+            extend_insertion = cont_gap + current_insertion
+            current_insertion = extend_insertion if extend_insertion > open_insertion \
+                else open_insertion
+
+            equals_value = similarity[i - 1, j - 1]
+            sub = diagonal + equals_value
+
+            max_value, max_index = _max_tolerance(sub, current_insertion, deletion[j],
+                                                  equals_value)
+
+            diagonal = row[j]
+            row[j] = max_value
+            if operations is not None:
+                operations[i - 1, j - 1] = max_index
+            if labels is not None:
+                upper_label = labels[j]
+                if max_index > 1:
+                    labels[j] = diagonal_label
+                elif max_index == 1:
+                    labels[j] = labels[j - 1]
+                diagonal_label = upper_label
+
+        if right is not None:
+            right[i] = row[width]
+            right_insertion[i] = current_insertion
+
+
+@jit(nopython=True, cache=True)
+def sweep_tolerance_band(similarity, first_row, first_column, gap, lo, hi, offsets, row, left,
+                         operations):
+    """
+    Fills consecutive rows of a banded Needleman-Wunsch table with a constant gap penalty,
+    where row i only has the cells from column lo[i] to hi[i]. The cells outside the band
+    score -inf.
+
+    :param similarity: Score of aligning the snapshots of the rows, where
+        [i - first_row, j - first_column] belongs to cell (i, j)
+    :param first_row: First row to fill, greater than 0
+    :param first_column: Column of the first cell of the similarity matrix
+    :param gap: Penalty of each gap
+    :param lo: First column of each row of the band
+    :param hi: Last column of each row of the band
+    :param offsets: Position of the first cell of each row in operations
+    :param row: (len(PT) + 1) scores of the row above, -inf outside its band. It is updated
+        in place.
+    :param left: (len(DT) + 1) scores of column 0
+    :param operations: Output packed operations of the band (see `util.traceback_util`),
+        where cell (i, j) is at position offsets[i] + j - lo[i], if not None. The operations
+        of row 0 and column 0 are not stored.
+    """
+    for r in range(similarity.shape[0]):
+        i = first_row + r
+        start = lo[i]
+        if start == 0:
+            diagonal = row[0]
+            row[0] = left[i]
+            previous = row[0]
+            start = 1
+        else:
+            diagonal = row[start - 1]
+            previous = -np.inf
+
+        for j in range(start, hi[i] + 1):
+            equals_value = similarity[r, j - first_column]
+
+            sub = diagonal + equals_value  # Match/Mismatch
+            ins = previous + gap  # Insertion
+            dele = row[j] + gap  # Deletion
+
+            max_value, max_index = _max_tolerance(sub, ins, dele, equals_value)
+
+            diagonal = row[j]
+            row[j] = max_value
+            previous = max_value
+            if operations is not None:
+                set_operation(operations, offsets[i] + j - lo[i], max_index)
+
+        # Cells of the row above that are on the left of this row's band
+        for j in range(lo[i - 1], lo[i]):
+            row[j] = -np.inf
+
+
+@jit(nopython=True, cache=True)
+def sweep_affine_gap_band(similarity, first_row, first_column, init_gap, cont_gap, lo, hi,
+                          offsets, row, deletion, left, insertion, operations):
+    """
+    Fills consecutive rows of a banded Needleman-Wunsch table with affine gap penalties. See
+    `sweep_tolerance_band` for the common parameters.
+
+    :param deletion: (len(PT) + 1) deletion state of the row above, -inf outside its band.
+        It is updated in place.
+    :param insertion: (len(DT) + 1) insertion state of column 0
+    """
+    for r in range(similarity.shape[0]):
+        i = first_row + r
+        start = lo[i]
+        if start == 0:
+            diagonal = row[0]
+            row[0] = left[i]
+            current_insertion = insertion[i]
+            start = 1
+        else:
+            diagonal = row[start - 1]
+            current_insertion = -np.inf
+
+        for j in range(start, hi[i] + 1):
+            open_deletion = init_gap + cont_gap + row[j]
+            extend_deletion = cont_gap + deletion[j]
+            deletion[j] = extend_deletion if extend_deletion > open_deletion else open_deletion
+
+            left_score = row[j - 1] if j > lo[i] else -np.inf
+            open_insertion = init_gap + cont_gap + left_score
+            extend_insertion = cont_gap + current_insertion
+            current_insertion = extend_insertion if extend_insertion > open_insertion \
+                else open_insertion
+
+            equals_value = similarity[r, j - first_column]
+            sub = diagonal + equals_value
+
+            max_value, max_index = _max_tolerance(sub, current_insertion, deletion[j],
+                                                  equals_value)
+
+            diagonal = row[j]
+            row[j] = max_value
+            if operations is not None:
+                set_operation(operations, offsets[i] + j - lo[i], max_index)
+
+        for j in range(lo[i - 1], lo[i]):
+            row[j] = -np.inf
+            deletion[j] = -np.inf
+
+
+@jit(nopython=True, cache=True)
+def sweep_tolerance_band_batch(similarity, first_row, first_column, gap, lo, hi, offsets, row,
+                               left, operations):
+    """
+    Fills consecutive rows of a banded Needleman-Wunsch table with a constant gap penalty for
+    K configurations at once, which share the similarity matrix and the band. The last axis
+    of the scores is the configuration, so that the innermost loop runs over contiguous
+    memory. See `sweep_tolerance_band` for the common parameters.
+
+    :param gap: (K) penalty of each gap of each configuration
+    :param row: (len(PT) + 1, K) scores of the row above, updated in place
+    :param left: (len(DT) + 1, K) scores of column 0
+    :param operations: (K, size) output packed operations of each configuration, if not None
+    """
+    n_configs = gap.shape[0]
+    diagonal = np.empty(n_configs)
+    previous = np.empty(n_configs)
+    for r in range(similarity.shape[0]):
+        i = first_row + r
+        start = lo[i]
+        if start == 0:
+            for k in range(n_configs):
+                diagonal[k] = row[0, k]
+                row[0, k] = left[i, k]
+                previous[k] = row[0, k]
+            start = 1
+        else:
+            for k in range(n_configs):
+                diagonal[k] = row[start - 1, k]
+                previous[k] = -np.inf
+
+        for j in range(start, hi[i] + 1):
+            equals_value = similarity[r, j - first_column]
+            position = offsets[i] + j - lo[i]
+            for k in range(n_configs):
+                sub = diagonal[k] + equals_value  # Match/Mismatch
+                ins = previous[k] + gap[k]  # Insertion
+                dele = row[j, k] + gap[k]  # Deletion
+
+                max_value, max_index = _max_tolerance(sub, ins, dele, equals_value)
+
+                diagonal[k] = row[j, k]
+                row[j, k] = max_value
+                previous[k] = max_value
+                if operations is not None:
+                    set_operation(operations[k], position, max_index)
+
+        for j in range(lo[i - 1], lo[i]):
+            for k in range(n_configs):
+                row[j, k] = -np.inf
+
+
+@jit(nopython=True, cache=True)
+def sweep_affine_gap_band_batch(similarity, first_row, first_column, init_gap, cont_gap, lo,
+                                hi, offsets, row, deletion, left, insertion, operations):
+    """
+    Fills consecutive rows of a banded Needleman-Wunsch table with affine gap penalties for K
+    configurations at once. See `sweep_tolerance_band_batch` for the common parameters.
+
+    :param init_gap: (K) penalty of opening a gap of each configuration
+    :param cont_gap: (K) penalty of continuing a gap of each configuration
+    :param deletion: (len(PT) + 1, K) deletion state of the row above, updated in place
+    :param insertion: (len(DT) + 1, K) insertion state of column 0
+    """
+    n_configs = init_gap.shape[0]
+    diagonal = np.empty(n_configs)
+    current_insertion = np.empty(n_configs)
+    for r in range(similarity.shape[0]):
+        i = first_row + r
+        start = lo[i]
+        if start == 0:
+            for k in range(n_configs):
+                diagonal[k] = row[0, k]
+                row[0, k] = left[i, k]
+                current_insertion[k] = insertion[i, k]
+            start = 1
+        else:
+            for k in range(n_configs):
+                diagonal[k] = row[start - 1, k]
+                current_insertion[k] = -np.inf
+
+        for j in range(start, hi[i] + 1):
+            equals_value = similarity[r, j - first_column]
+            position = offsets[i] + j - lo[i]
+            for k in range(n_configs):
+                open_deletion = init_gap[k] + cont_gap[k] + row[j, k]
+                extend_deletion = cont_gap[k] + deletion[j, k]
+                deletion[j, k] = extend_deletion if extend_deletion > open_deletion \
+                    else open_deletion
+
+                left_score = row[j - 1, k] if j > lo[i] else -np.inf
+                open_insertion = init_gap[k] + cont_gap[k] + left_score
+                extend_insertion = cont_gap[k] + current_insertion[k]
+                current_insertion[k] = extend_insertion if extend_insertion > open_insertion \
+                    else open_insertion
+
+                sub = diagonal[k] + equals_value
+
+                max_value, max_index = _max_tolerance(sub, current_insertion[k],
+                                                      deletion[j, k], equals_value)
+
+                diagonal[k] = row[j, k]
+                row[j, k] = max_value
+                if operations is not None:
+                    set_operation(operations[k], position, max_index)
+
+        for j in range(lo[i - 1], lo[i]):
+            for k in range(n_configs):
+                row[j, k] = -np.inf
+                deletion[j, k] = -np.inf
+
+
+@jit(nopython=True, cache=True)
+def _dropped(score, i, j, best, x_drop, z_drop, gap_slope):
+    """
+    Whether the score of cell (i, j) dropped more than X below the best score, or more than
+    Z plus the gaps needed to reach its diagonal from the best cell (Z-drop).
+    :param best: Best score and its row and column
+    """
+    drop = best[0] - score
+    if drop > x_drop:
+        return True
+    return drop > z_drop + gap_slope * abs((i - best[1]) - (j - best[2]))
+
+
+@jit(nopython=True, cache=True)
+def _close_drop_row(i, first, last, lo, hi, offsets, row, best, row_operations, operations):
+    """
+    Stores the band of row i, between its first and last cells that were not pruned, and its
+    operations, and updates the best score.
+    """
+    lo[i] = first
+    hi[i] = last
+    offsets[i + 1] = offsets[i] + last - first + 1
+    for j in range(first, last + 1):
+        if operations is not None:
+            set_operation(operations, offsets[i] + j - first, row_operations[j])
+        if row[j] > best[0]:
+            best[0] = row[j]
+            best[1] = i
+            best[2] = j
+
+
+@jit(nopython=True, cache=True)
+def sweep_tolerance_drop(similarity, first_row, first_column, gap, x_drop, z_drop, lo, hi,
+                         offsets, row, left, best, row_operations, operations):
+    """
+    Fills consecutive rows of a Needleman-Wunsch table with a constant gap penalty, pruning
+    the cells whose score drops too much below the best one (see `_dropped`). The band of
+    each row spans from its first to its last cell that was not pruned, and the next row is
+    only calculated from the first column of the band to the last column that can be reached
+    without a pruned cell. See `sweep_tolerance_band` for the common parameters.
+
+    :param x_drop: Maximum drop of the score, np.inf to disable it
+    :param z_drop: Maximum drop of the score besides the gaps, np.inf to disable it
+    :param lo: First column of the band of each row, output from first_row on
+    :param hi: Last column of the band of each row, output from first_row on
+    :param offsets: Position of the first cell of each row in operations, output from
+        first_row + 1 on
+    :param best: Best score and its row and column, updated in place
+    :param row_operations: (len(PT) + 1) operations of the current row
+    :param operations: Output packed operations of the band, if not None. It must have room
+        for all the cells of the similarity matrix.
+    :return: The number of cells calculated, -1 if all the cells of a row were pruned, or -2
+        if a row goes on beyond the last column of the similarity matrix, in which case the
+        rows must be calculated again with more columns
+    """
+    last_column = first_column + similarity.shape[1] - 1
+    slope = abs(gap)
+    calculated = 0
+    for r in range(similarity.shape[0]):
+        i = first_row + r
+        first = -1
+        last = -1
+        start = lo[i - 1]
+        if start == 0:
+            diagonal = row[0]
+            row[0] = left[i]
+            if _dropped(row[0], i, 0, best, x_drop, z_drop, slope):
+                row[0] = -np.inf
+            else:
+                first = last = 0
+            previous = row[0]
+            start = 1
+        else:
+            diagonal = row[start - 1]
+            previous = -np.inf
+
+        j = start
+        while j <= last_column:
+            if j > hi[i - 1] + 1 and previous == -np.inf:
+                break  # Only reachable through pruned cells
+            equals_value = similarity[r, j - first_column]
+
+            sub = diagonal + equals_value  # Match/Mismatch
+            ins = previous + gap  # Insertion
+            dele = row[j] + gap  # Deletion
+
+            max_value, max_index = _max_tolerance(sub, ins, dele, equals_value)
+            calculated += 1
+
+            if _dropped(max_value, i, j, best, x_drop, z_drop, slope):
+                max_value = -np.inf
+            else:
+                if first < 0:
+                    first = j
+                last = j
+            diagonal = row[j]
+            row[j] = max_value
+            previous = max_value
+            row_operations[j] = max_index
+            j += 1
+
+        if j > last_column and last_column < len(row) - 1 and \
+                (previous != -np.inf or last_column <= hi[i - 1]):
+            return -2  # The row goes on beyond the similarity matrix
+        # Cells of the band of the row above that are not in this row
+        for k in range(j, hi[i - 1] + 1):
+            row[k] = -np.inf
+        if first < 0:
+            return -1
+        _close_drop_row(i, first, last, lo, hi, offsets, row, best, row_operations,
+                        operations)
+    return calculated
+
+
+@jit(nopython=True, cache=True)
+def sweep_affine_gap_drop(similarity, first_row, first_column, init_gap, cont_gap, x_drop,
+                          z_drop, lo, hi, offsets, row, deletion, left, insertion, best,
+                          row_operations, operations):
+    """
+    Fills consecutive rows of a Needleman-Wunsch table with affine gap penalties, pruning the
+    cells whose score drops too much below the best one. See `sweep_tolerance_drop` and
+    `sweep_affine_gap_band` for the parameters.
+    """
+    last_column = first_column + similarity.shape[1] - 1
+    slope = abs(cont_gap)
+    calculated = 0
+    for r in range(similarity.shape[0]):
+        i = first_row + r
+        first = -1
+        last = -1
+        start = lo[i - 1]
+        if start == 0:
+            diagonal = row[0]
+            row[0] = left[i]
+            current_insertion = insertion[i]
+            if _dropped(row[0], i, 0, best, x_drop, z_drop, slope):
+                row[0] = -np.inf
+                deletion[0] = -np.inf
+                current_insertion = -np.inf
+            else:
+                first = last = 0
+            start = 1
+        else:
+            diagonal = row[start - 1]
+            current_insertion = -np.inf
+
+        j = start
+        while j <= last_column:
+            # Left of the band of the row above, the cells are pruned (-inf)
+            left_score = row[j - 1]
+            if j > hi[i - 1] + 1 and left_score == -np.inf and current_insertion == -np.inf:
+                break  # Only reachable through pruned cells
+            open_deletion = init_gap + cont_gap + row[j]
+            extend_deletion = cont_gap + deletion[j]
+            deletion[j] = extend_deletion if extend_deletion > open_deletion else open_deletion
+
+            open_insertion = init_gap + cont_gap + left_score
+            extend_insertion = cont_gap + current_insertion
+            current_insertion = extend_insertion if extend_insertion > open_insertion \
+                else open_insertion
+
+            equals_value = similarity[r, j - first_column]
+            sub = diagonal + equals_value
+
+            max_value, max_index = _max_tolerance(sub, current_insertion, deletion[j],
+                                                  equals_value)
+            calculated += 1
+
+            diagonal = row[j]
+            if _dropped(max_value, i, j, best, x_drop, z_drop, slope):
+                row[j] = -np.inf
+                deletion[j] = -np.inf
+                current_insertion = -np.inf
+            else:
+                row[j] = max_value
+                if first < 0:
+                    first = j
+                last = j
+            row_operations[j] = max_index
+            j += 1
+
+        if j > last_column and last_column < len(row) - 1 and \
+                (row[last_column] != -np.inf or current_insertion != -np.inf
+                 or last_column <= hi[i - 1]):
+            return -2
+        for k in range(j, hi[i - 1] + 1):
+            row[k] = -np.inf
+            deletion[k] = -np.inf
+        if first < 0:
+            return -1
+        _close_drop_row(i, first, last, lo, hi, offsets, row, best, row_operations,
+                        operations)
+    return calculated
+
+
+@jit(nopython=True, cache=True)
+def follow_matches(operations, previous, first, along):
+    """
+    Number of matches in the traceback of each cell of a new row (or column) of the table.
+
+    :param operations: (w) operations of the cells of the new row (or column), but the first
+    :param previous: (w + 1) number of matches of the cells of the previous row (or column)
+    :param first: Number of matches of the first cell of the new row (or column)
+    :param along: Operation that comes from the previous cell of the same row (or column),
+        insertion (1) for a row and deletion (0) for a column
+    :return: (w + 1) number of matches of the cells of the new row (or column)
+    """
+    matches = np.empty(len(operations) + 1, dtype=np.int64)
+    matches[0] = first
+    for j in range(1, len(matches)):
+        operation = operations[j - 1]
+        if operation > 1:  # Match or mismatch
+            matches[j] = previous[j - 1] + (1 if operation == 3 else 0)
+        elif operation == along:
+            matches[j] = matches[j - 1]
+        else:
+            matches[j] = previous[j]
+    return matches
+
+
+@jit(nopython=True, cache=True)
+def trace_band(lo, hi, offsets, operations):
+    """
+    Traceback of a banded table from its last cell to its first one. The cells of row 0 are
+    insertions and the ones of column 0 deletions.
+
+    :param operations: Packed operations of the band, see `sweep_tolerance_band`
+    :return: The operations from the first cell of the table to the last one
+    """
+    i = len(lo) - 1
+    j = hi[i]
+    steps = np.empty(i + j, dtype=np.uint8)
+    size = 0
+    while i > 0 or j > 0:
+        if i == 0:
+            operation = 1
+        elif j == 0:
+            operation = 0
+        else:
+            operation = get_operation(operations, offsets[i] + j - lo[i])
+
+        if operation == 1:  # Insertion
+            j -= 1
+        elif operation > 1:  # Match or mismatch
+            i -= 1
+            j -= 1
+        else:  # Deletion
+            i -= 1
+        steps[size] = operation
+        size += 1
+    return steps[:size][::-1].copy()
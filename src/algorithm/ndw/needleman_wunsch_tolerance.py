@@ -2,8 +2,9 @@ from abc import ABC
 
 import numpy as np
 
-import util.float_util as fu
 from algorithm.ndw.needleman_wunsch_base import NeedlemanWunschBase
+from algorithm.ndw.needleman_wunsch_kernels import sweep_tolerance, sweep_tolerance_band, \
+    sweep_tolerance_band_batch, sweep_tolerance_drop, tolerance_boundary
 
 
 class NeedlemanWunschTolerance(NeedlemanWunschBase, ABC):
@@ -21,42 +22,37 @@ class NeedlemanWunschTolerance(NeedlemanWunschBase, ABC):
           48(3), 443-453.
     """
 
-    def calculate_matrix(self) -> np.ndarray:
-        """
-        Coding for the matrix
-        deletion : 0
-        insertion : 1
-        mismatch : 2
-        match : 3
-        """
-        dt_index, pt_index, _ = self._table.shape
-
-        # table[0, 0, 0] = 0  # Initialization first cell
-        # table[0, 0, 1] = 0
-
-        for j in range(1, pt_index):  # + 1
-            self._table[0, j, 0] = 1  # Insertion
-            self._table[0, j, 1] = self._table[0, j - 1, 1] + self._continue_gap
-
-        for i in range(1, dt_index):  # + 1
-            # table[i, 0, 0] = 0  # Deletion
-            self._table[i, 0, 1] = self._table[i - 1, 0, 1] + self._continue_gap
-
-            for j in range(1, pt_index):
-                equals_value = self._system.snap_equals(self._dt_trace[i - 1],
-                                                        self._pt_trace[j - 1],
-                                                        self._mad,
-                                                        self._timestamp_label,
-                                                        self._low)
-
-                sub = self._table[i - 1, j - 1, 1] + equals_value  # Match/Mismatch
-                ins = self._table[i, j - 1, 1] + self._continue_gap  # Insertion
-                dele = self._table[i - 1, j, 1] + self._continue_gap  # Deletion
-
-                max_value, max_index = fu.max_tolerance(sub, ins, dele, equals_value)
-
-                self._table[i, j, 1] = max_value
-                self._table[i, j, 0] = max_index
-                # Match : 3 / Mismatch : 2 / Insertion : 1 / Deletion : 0
-
-        return self._table
+    def _boundaries(self, dt_size: int, pt_size: int) -> (list, list):
+        gap = float(self._continue_gap)
+        return [tolerance_boundary(pt_size, gap)], [tolerance_boundary(dt_size, gap)]
+
+    def _boundary_cell(self, index: int, previous: list) -> list:
+        return [previous[0] + float(self._continue_gap)]
+
+    def _sweep(self, similarity: np.ndarray, row: list, left: list, operations=None,
+               labels=None, right: list = None):
+        sweep_tolerance(similarity, float(self._continue_gap), row[0], left[0], operations,
+                        labels, right[0] if right is not None else None)
+
+    def _sweep_band(self, similarity: np.ndarray, first_row: int, first_column: int,
+                    lo: np.ndarray, hi: np.ndarray, offsets: np.ndarray, row: list, left: list,
+                    operations: np.ndarray = None):
+        sweep_tolerance_band(similarity, first_row, first_column, float(self._continue_gap),
+                             lo, hi, offsets, row[0], left[0], operations)
+
+    def _gap_penalties(self) -> tuple:
+        return (float(self._continue_gap),)
+
+    def _sweep_band_batch(self, similarity: np.ndarray, first_row: int, first_column: int,
+                          gaps: list, lo: np.ndarray, hi: np.ndarray, offsets: np.ndarray,
+                          row: list, left: list, operations: np.ndarray = None):
+        sweep_tolerance_band_batch(similarity, first_row, first_column, gaps[0], lo, hi,
+                                   offsets, row[0], left[0], operations)
+
+    def _sweep_drop(self, similarity: np.ndarray, first_row: int, first_column: int,
+                    x_drop: float, z_drop: float, lo: np.ndarray, hi: np.ndarray,
+                    offsets: np.ndarray, row: list, left: list, best: np.ndarray,
+                    row_operations: np.ndarray, operations: np.ndarray = None) -> int:
+        return sweep_tolerance_drop(similarity, first_row, first_column,
+                                    float(self._continue_gap), x_drop, z_drop, lo, hi, offsets,
+                                    row[0], left[0], best, row_operations, operations)
@@ -12,6 +12,7 @@ from systems import Lift, SystemBase
 from systems.incubator import Incubator
 from util.dic_util import nested_set
 from util.file_util import generate_filename
+from util.trace import to_traces
 
 
 class AlignmentConfiguration:
@@ -37,6 +38,9 @@ class AlignmentConfiguration:
         self._initialize_system()
         self._create_output_directories()
 
+        # Only the alignments of the top_k configurations with the best score are built
+        self._top_k = self._config.get('top_k')
+
         # Set iterator pointer value
         self._iterator = 0
 
@@ -102,75 +106,38 @@ class AlignmentConfiguration:
 
     def execute_alignments(self):
         for i, starting_pattern in enumerate(self._pt_files):
-            for pt_file in fu.list_directory_files(self._pt_path, '.csv', starting_pattern):
+            pt_files = fu.list_directory_files(self._pt_path, '.csv', starting_pattern)
+            for pt_file in self._select_pt_files(self._dt_file[i], pt_files):
                 scenario = self._get_scenario(self._dt_file[i], pt_file)
                 global_results_filename = scenario + '.csv'
 
                 # DT and PT traces in dict with only the parameters of interest
-                dt_trace = pd.read_csv(self._dt_path + self._dt_file[i]) \
-                    .filter(items=[self._timestamp_label, *self._params])
-                pt_trace = pd.read_csv(self._pt_path + pt_file) \
-                    .filter(items=[self._timestamp_label, *self._params])
+                dt_trace = self._read_trace(self._dt_path + self._dt_file[i])
+                pt_trace = self._read_trace(self._pt_path + pt_file)
+                # Columnar traces shared by the algorithms of every configuration
+                traces = to_traces(dt_trace, pt_trace, self._timestamp_label, self._system)
 
-                statistical_results_df = pd.DataFrame()
+                configs = []
                 for init_config in self._get_hyperparameters_combinations():
                     current_config = {}
                     for index, label in enumerate(self._get_hyperparameters_labels()):
                         nested_set(current_config, label.split('-'), init_config[index])
+                    configs.append(current_config)
+
+                results = [None] * len(configs)
+                selected = range(len(configs))
+                if self._top_k is not None:
+                    results, selected = self._score_configurations(scenario, configs,
+                                                                   dt_trace, pt_trace, traces)
 
-                    alignment_filepath = os.path. \
-                        join(self._output_directory,
-                             f"{scenario}-{generate_filename(current_config)}.csv")
-
-                    # TODO: Decorator to measure time for all algorithms in calculate alignment
-                    start_ex_time = time.time()
-                    start_proc_time = time.process_time()
-
-                    alg = AlignmentAlgorithmFactory. \
-                        get_alignment_algorithm(self._alignment_algorithm,
-                                                **self.get_config_params(
-                                                    pt_trace.to_dict('records'),
-                                                    dt_trace.to_dict('records'),
-                                                    current_config))
-
-                    alignment_df = alg.calculate_alignment()
-
-                    process_time = time.process_time() - start_proc_time
-                    ex_time = time.time() - start_ex_time
-
-                    print(f"--- SCENARIO: {scenario} ---")
-                    print(f"---{generate_filename(current_config)}"
-                          f" : {process_time :.2f} seconds ---")
-
-                    if not alignment_df.empty:
-                        alignment_df.to_csv(alignment_filepath, index=False,
-                                            encoding='utf-8', sep=',')
-
-                        if self._figures:
-                            # --- GRAPHIC GENERATION ---
-                            fig = GraphicFactory.get_graphic(self._alignment_algorithm,
-                                                             alignment_df,
-                                                             dt_trace,
-                                                             pt_trace,
-                                                             **{'params_of_interest': self._params,
-                                                                'timestamp_label':
-                                                                    self._timestamp_label})
-                            height = 800
-                            if len(self._params) > 1:
-                                height = 3000
-                            fig.write_image(alignment_filepath.replace(".csv", ".pdf"),
-                                            format="pdf", width=2500, height=height,
-                                            engine=self._engine)
-                            # fig.show()
-
-                    alignment_metrics = {**self._get_alignment_metrics(alignment_df, dt_trace,
-                                                                       pt_trace,
-                                                                       current_config,
-                                                                       alg.score),
-                                         'execution_time': ex_time,
-                                         'process_time': process_time,
-                                         'trace_length': max(len(dt_trace), len(pt_trace))}
+                for index, alg, times in self._create_algorithms(configs, selected, traces):
+                    # The score of the configuration is kept if it was only scored before
+                    results[index] = {**(results[index] or {}),
+                                      **self._align(scenario, configs[index], dt_trace,
+                                                    pt_trace, alg, times)}
 
+                statistical_results_df = pd.DataFrame()
+                for alignment_metrics in results:
                     statistical_results_df = pd.concat(
                         [statistical_results_df,
                          pd.DataFrame.from_records([alignment_metrics])],
@@ -183,6 +150,126 @@ class AlignmentConfiguration:
                                               header=not os.path.exists(output_path),
                                               index=False)
 
+    def _read_trace(self, path: str) -> pd.DataFrame:
+        """
+        Trace of a file with only the timestamp and the parameters of interest.
+        """
+        return pd.read_csv(path).filter(items=[self._timestamp_label, *self._params])
+
+    def _select_pt_files(self, dt_file: str, pt_files: list) -> list:
+        """
+        PT files of a pattern that are aligned with the DT file, all of them by default.
+        """
+        return pt_files
+
+    def _create_algorithms(self, configs, indexes, traces, tracebacks=True):
+        """
+        Creates the alignment algorithm of some configurations.
+        :param configs: Configurations of the sweep
+        :param indexes: Positions in configs of the configurations to create
+        :param traces: DT and PT traces given to the algorithms, see `util.trace.to_traces`
+        :param tracebacks: Whether the alignments will be calculated or only the scores
+        :return: An iterator of (index, algorithm, times), where times are the execution and
+            process times already spent calculating the algorithm. Subclasses can yield
+            the configurations in any order.
+        """
+        for index in indexes:
+            yield index, AlignmentAlgorithmFactory. \
+                get_alignment_algorithm(self._alignment_algorithm,
+                                        **self.get_config_params(traces[1], traces[0],
+                                                                 configs[index])), (0.0, 0.0)
+
+    def _align(self, scenario, current_config, dt_trace, pt_trace, alg, times) -> dict:
+        """
+        Calculates and stores the alignment of the traces with a configuration.
+        :param alg: Alignment algorithm of the configuration
+        :param times: Execution and process times already spent calculating the algorithm
+        :return: The metrics of the alignment
+        """
+        alignment_filepath = os.path. \
+            join(self._output_directory,
+                 f"{scenario}-{generate_filename(current_config)}.csv")
+
+        # TODO: Decorator to measure time for all algorithms in calculate alignment
+        start_ex_time = time.time()
+        start_proc_time = time.process_time()
+
+        alignment_df = alg.calculate_alignment()
+
+        process_time = time.process_time() - start_proc_time + times[1]
+        ex_time = time.time() - start_ex_time + times[0]
+
+        print(f"--- SCENARIO: {scenario} ---")
+        print(f"---{generate_filename(current_config)}"
+              f" : {process_time :.2f} seconds ---")
+
+        if not alignment_df.empty:
+            alignment_df.to_csv(alignment_filepath, index=False,
+                                encoding='utf-8', sep=',')
+
+            if self._figures:
+                # --- GRAPHIC GENERATION ---
+                fig = GraphicFactory.get_graphic(self._alignment_algorithm,
+                                                 alignment_df,
+                                                 dt_trace,
+                                                 pt_trace,
+                                                 **{'params_of_interest': self._params,
+                                                    'timestamp_label':
+                                                        self._timestamp_label})
+                height = 800
+                if len(self._params) > 1:
+                    height = 3000
+                fig.write_image(alignment_filepath.replace(".csv", ".pdf"),
+                                format="pdf", width=2500, height=height,
+                                engine=self._engine)
+                # fig.show()
+
+        alignment_metrics = {**self._get_alignment_metrics(alignment_df, dt_trace,
+                                                           pt_trace,
+                                                           current_config,
+                                                           alg.score),
+                             'execution_time': ex_time,
+                             'process_time': process_time,
+                             'trace_length': max(len(dt_trace), len(pt_trace))}
+        return alignment_metrics
+
+    def _score_configurations(self, scenario, configs, dt_trace, pt_trace,
+                              traces) -> (list, list):
+        """
+        Calculates only the score of the alignment with each configuration.
+        :return: The score of each configuration and the indexes of the top_k configurations
+            with the best score
+        """
+        results = [None] * len(configs)
+        scores = [None] * len(configs)
+        higher_is_better = True
+        for index, alg, times in self._create_algorithms(configs, range(len(configs)), traces,
+                                                         tracebacks=False):
+            current_config = configs[index]
+            start_ex_time = time.time()
+            start_proc_time = time.process_time()
+
+            score = alg.calculate_score()
+            higher_is_better = alg.HIGHER_SCORE_IS_BETTER
+
+            process_time = time.process_time() - start_proc_time + times[1]
+            ex_time = time.time() - start_ex_time + times[0]
+
+            print(f"--- SCENARIO: {scenario} ---")
+            print(f"---{generate_filename(current_config)}"
+                  f" : {process_time :.2f} seconds (score only) ---")
+
+            scores[index] = score
+            results[index] = {**fu.flatten_dictionary(current_config),
+                              'score': score,
+                              'execution_time': ex_time,
+                              'process_time': process_time,
+                              'trace_length': max(len(dt_trace), len(pt_trace))}
+
+        ranking = sorted(range(len(configs)), key=lambda index: scores[index],
+                         reverse=higher_is_better)
+        return results, sorted(ranking[:self._top_k])
+
     def _get_hyperparameters_combinations(self):
         return list(itertools.product(*self._get_hyperparameters_ranges()))
 
@@ -0,0 +1,75 @@
+import os
+
+import pandas as pd
+
+from algorithm import DynamicTimeWarpingSearch
+from batch_processing.alg_config.alignment_config import AlignmentConfiguration
+from batch_processing.algorithm_factory import AlignmentAlgorithmFactory
+
+
+class DynamicTimeWarpingConfig(AlignmentConfiguration):
+    """
+    Configuration of the Dynamic Time Warping variants, with the options they share.
+    """
+    RADIUS = 'radius'
+    SAKOE_CHIBA_WIDTH = 'sakoe_chiba_width'
+    ITAKURA_SLOPE = 'itakura_slope'
+    EARLY_ABANDON = 'early_abandon'
+
+    def __init__(self, current_directory, args, config):
+        super().__init__(current_directory, args, config)
+        # Radius of the approximate (FastDTW) alignment, see `DynamicTimeWarpingBase`, exact
+        # if None
+        self._radius = self._config.get('approximate_radius')
+        # Global constraint of the warping path, see `DynamicTimeWarpingBase`, unconstrained
+        # if None
+        self._sakoe_chiba_width = self._config.get('sakoe_chiba_width')
+        self._itakura_slope = self._config.get('itakura_slope')
+        # Only the nearest_k PT files of each pattern to the DT file, or the ones whose cost is
+        # at most cost_threshold, are aligned, see `DynamicTimeWarpingSearch`. All of them if
+        # both are None.
+        self._nearest_k = self._config.get('nearest_k')
+        self._cost_threshold = self._config.get('cost_threshold')
+
+    def _select_pt_files(self, dt_file: str, pt_files: list) -> list:
+        """
+        The nearest PT files to the DT file, found with a cascade of lower bounds of the cost.
+        The number of PT files pruned by each bound is added to lower_bound_search.csv of the
+        results.
+        """
+        if self._nearest_k is None and self._cost_threshold is None:
+            return pt_files
+
+        dt_trace = self._read_trace(self._dt_path + dt_file)
+        pt_traces = [self._read_trace(self._pt_path + pt_file) for pt_file in pt_files]
+
+        def create_algorithm(pt_trace, early_abandon=None):
+            return AlignmentAlgorithmFactory.get_alignment_algorithm(
+                self._alignment_algorithm,
+                **{**self.get_config_params(pt_trace, dt_trace, {}),
+                   self.EARLY_ABANDON: early_abandon})
+
+        search = DynamicTimeWarpingSearch(create_algorithm, self._nearest_k,
+                                          self._cost_threshold)
+        found = search.search(pt_traces)
+        print(f"--- DT: {dt_file}: {len(found)} of {len(pt_files)} PT files found, "
+              f"{search.pruned} pruned (LB_Kim {search.pruned_kim}, LB_Keogh "
+              f"{search.pruned_keogh}, early abandon {search.abandoned}) ---")
+
+        output_path = os.path.join(self._output_results_directory, 'lower_bound_search.csv')
+        pd.DataFrame.from_records([{'dt_file': dt_file,
+                                    'pt_files': len(pt_files),
+                                    'found': len(found),
+                                    'pruned_kim': search.pruned_kim,
+                                    'pruned_keogh': search.pruned_keogh,
+                                    'abandoned': search.abandoned}]) \
+            .to_csv(output_path, mode='a', header=not os.path.exists(output_path), index=False)
+        return [pt_files[index] for index in sorted(index for index, _ in found)]
+
+    def get_config_params(self, pt_trace, dt_trace, current_config=None):
+        return {
+            **super().get_config_params(pt_trace, dt_trace, current_config),
+            self.RADIUS: self._radius,
+            self.SAKOE_CHIBA_WIDTH: self._sakoe_chiba_width,
+            self.ITAKURA_SLOPE: self._itakura_slope,
+        }
@@ -1,12 +1,18 @@
-from batch_processing.alg_config.alignment_config import AlignmentConfiguration
+from batch_processing.alg_config.dtw_config import DynamicTimeWarpingConfig
 
 
-class DynamicTimeWarpingLugaresiConfig(AlignmentConfiguration):
+class DynamicTimeWarpingLugaresiConfig(DynamicTimeWarpingConfig):
     PARAM_INTEREST = 'param_interest'
 
+    def __init__(self, current_directory, args, config):
+        super().__init__(current_directory, args, config)
+        # Bound of the cost above which the sweep stops, see `DynamicTimeWarpingLugaresi`
+        self._early_abandon = self._config.get('early_abandon')
+
     def get_config_params(self, pt_trace, dt_trace, current_config=None):
         return {
             **super().get_config_params(pt_trace, dt_trace, current_config),
             self.PARAM_INTEREST: self._param_interest,
+            self.EARLY_ABANDON: self._early_abandon,
             **current_config
         }
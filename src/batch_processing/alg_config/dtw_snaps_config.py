@@ -1,14 +1,22 @@
-from batch_processing.alg_config.alignment_config import AlignmentConfiguration
+from batch_processing.alg_config.dtw_config import DynamicTimeWarpingConfig
 
 
-class DynamicTimeWarpingSnapsConfig(AlignmentConfiguration):
+class DynamicTimeWarpingSnapsConfig(DynamicTimeWarpingConfig):
     SYSTEM = 'system'
     TIMESTAMP_LABEL = 'timestamp_label'
+    TIME_WINDOW = 'time_window'
+
+    def __init__(self, current_directory, args, config):
+        super().__init__(current_directory, args, config)
+
+        # Maximum timestamp difference of the aligned snapshots, the whole table if None
+        self._time_window = self._config.get('time_window')
 
     def get_config_params(self, pt_trace, dt_trace, current_config=None):
         return {
             **super().get_config_params(pt_trace, dt_trace, current_config),
             self.SYSTEM: self._system,
             self.TIMESTAMP_LABEL: self._timestamp_label,
+            self.TIME_WINDOW: self._time_window,
             **current_config
         }
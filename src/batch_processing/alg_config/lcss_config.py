@@ -0,0 +1,42 @@
+import time
+
+from algorithm import LongestCommonSubsequenceBatch
+from batch_processing.alg_config.alignment_config import AlignmentConfiguration
+from batch_processing.algorithm_factory import AlignmentAlgorithmFactory
+
+
+class LongestCommonSubsequenceConfig(AlignmentConfiguration):
+    """
+    Configuration of the Longest Common Subsequence variants, whose sweeps only vary the
+    threshold of the match condition.
+    """
+    PARAM_INTEREST = 'param_interest'
+
+    def _create_algorithms(self, configs, indexes, traces, tracebacks=True):
+        """
+        Calculates at once the scores of all the configurations, see
+        `LongestCommonSubsequenceBatch`. The time is split among the configurations.
+        """
+        indexes = list(indexes)
+        algorithms = [AlignmentAlgorithmFactory.get_alignment_algorithm(
+            self._alignment_algorithm,
+            **self.get_config_params(traces[1], traces[0], configs[index]))
+            for index in indexes]
+        if len(indexes) <= 1:
+            yield from zip(indexes, algorithms, [(0.0, 0.0)] * len(indexes))
+            return
+
+        start_ex_time = time.time()
+        start_proc_time = time.process_time()
+        LongestCommonSubsequenceBatch(algorithms).calculate()
+        times = ((time.time() - start_ex_time) / len(indexes),
+                 (time.process_time() - start_proc_time) / len(indexes))
+        for index, alg in zip(indexes, algorithms):
+            yield index, alg, times
+
+    def get_config_params(self, pt_trace, dt_trace, current_config=None):
+        return {
+            **super().get_config_params(pt_trace, dt_trace, current_config),
+            self.PARAM_INTEREST: self._param_interest,
+            **current_config
+        }
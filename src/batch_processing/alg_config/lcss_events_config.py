@@ -1,12 +1,11 @@
 import numpy as np
 
-from batch_processing import AlignmentConfiguration
+from batch_processing.alg_config.lcss_config import LongestCommonSubsequenceConfig
 
 
-class LongestCommonSubsequenceEventsConfig(AlignmentConfiguration):
+class LongestCommonSubsequenceEventsConfig(LongestCommonSubsequenceConfig):
     DELTA = 'delta'
     TIMESTAMP_LABEL = 'timestamp_label'
-    PARAM_INTEREST = 'param_interest'
 
     def __init__(self, current_directory, args, config):
         super().__init__(current_directory, args, config)
@@ -30,6 +29,4 @@ class LongestCommonSubsequenceEventsConfig(AlignmentConfiguration):
         return {
             **super().get_config_params(pt_trace, dt_trace, current_config),
             self.TIMESTAMP_LABEL: self._timestamp_label,
-            self.PARAM_INTEREST: self._param_interest,
-            **current_config
         }
@@ -1,11 +1,10 @@
 import numpy as np
 
-from batch_processing import AlignmentConfiguration
+from batch_processing.alg_config.lcss_config import LongestCommonSubsequenceConfig
 
 
-class LongestCommonSubsequenceKPIsConfig(AlignmentConfiguration):
+class LongestCommonSubsequenceKPIsConfig(LongestCommonSubsequenceConfig):
     EPSILON = 'epsilon'
-    PARAM_INTEREST = 'param_interest'
 
     def __init__(self, current_directory, args, config):
         super().__init__(current_directory, args, config)
@@ -24,10 +23,3 @@ class LongestCommonSubsequenceKPIsConfig(AlignmentConfiguration):
 
     def _get_hyperparameters_ranges(self) -> list:
         return [self._epsilon]
-
-    def get_config_params(self, pt_trace, dt_trace, current_config=None):
-        return {
-            **super().get_config_params(pt_trace, dt_trace, current_config),
-            self.PARAM_INTEREST: self._param_interest,
-            **current_config
-        }
@@ -1,6 +1,12 @@
+import time
+
 import numpy as np
 
+from algorithm import NeedlemanWunschBase, NeedlemanWunschBatch
 from batch_processing.alg_config.alignment_config import AlignmentConfiguration
+from batch_processing.algorithm_factory import AlignmentAlgorithmFactory
+from systems.snapshot_differences import SnapshotDifferences
+from util.lru_cache import ArrayLRUCache
 
 
 class NeedlemanWunschConfiguration(AlignmentConfiguration):
@@ -10,10 +16,33 @@ class NeedlemanWunschConfiguration(AlignmentConfiguration):
     CONT_GAP = 'cont_gap'
     SYSTEM = 'system'
     TIMESTAMP_LABEL = 'timestamp_label'
+    MODE = 'mode'
+    TIME_WINDOW = 'time_window'
+    SIMILARITY_CACHE = 'similarity_cache'
+    DIFFERENCES = 'differences'
+    X_DROP = 'x_drop'
+    Z_DROP = 'z_drop'
 
     def __init__(self, current_directory, args, config):
         super().__init__(current_directory, args, config)
 
+        # 'full' table or linear memory 'hirschberg' alignment
+        self._mode = self._config.get('alignment_mode', 'full')
+        # Maximum timestamp difference of the aligned snapshots, the whole table if None
+        self._time_window = self._config.get('time_window')
+        # Pruning of the cells whose score drops too much below the best one, see
+        # `NeedlemanWunschBase`, disabled if None
+        self._x_drop = self._config.get('x_drop')
+        self._z_drop = self._config.get('z_drop')
+        # Memory for the tracebacks of the configurations whose tables are filled at once
+        self._batch_bytes = int(self._config.get('batch_memory_mb', 512) * 2 ** 20)
+        # Differences of the snapshots of the traces shared by the points of the mad and low
+        # sweep, see `SnapshotDifferences`. float64 keeps the exact similarities.
+        self._difference_dtype = np.dtype(self._config.get('difference_dtype', 'float32'))
+        self._difference_directory = self._config.get('difference_directory')
+        self._differences = None
+        self._difference_traces = None
+
         # INPUT PARAMETERS
         ranges = self._config['ranges']
 
@@ -48,6 +77,29 @@ class NeedlemanWunschConfiguration(AlignmentConfiguration):
             ranges['cont_gap']['step']
         )
 
+        # Similarity matrices shared by the configurations that only differ in the gaps, if
+        # there are several of them. The ones of previous scenarios are the least recently
+        # used, so they are evicted first. The modes that fill a band of the table never keep
+        # the whole matrix, see `NeedlemanWunschBase`.
+        self._similarity_cache = None
+        if len(self._init_gap) * len(self._cont_gap) > 1 and not self._fills_band():
+            self._similarity_cache = ArrayLRUCache(
+                int(self._config.get('similarity_cache_mb', 1024) * 2 ** 20))
+
+    def _fills_band(self) -> bool:
+        """
+        Whether the algorithms only fill a band of the table, in O(n + m) or O(band) memory.
+        """
+        return self._mode == NeedlemanWunschBase.HIRSCHBERG_MODE \
+            or self._time_window is not None or self._x_drop is not None \
+            or self._z_drop is not None
+
+    def _sweeps_similarity(self) -> bool:
+        """
+        Whether there are several points of mad and low, with different similarity matrices.
+        """
+        return len(self._low) * int(np.prod([len(values) for values in self._mad.values()])) > 1
+
     def _get_hyperparameters_labels(self) -> list:
         return [self.INIT_GAP, self.CONT_GAP, self.LOW,
                 *[f"{self.MAD}-{p}" for p in self._mad.keys()]]
@@ -55,10 +107,87 @@ class NeedlemanWunschConfiguration(AlignmentConfiguration):
     def _get_hyperparameters_ranges(self) -> list:
         return [self._init_gap, self._cont_gap, self._low, *self._mad.values()]
 
+    def _create_algorithms(self, configs, indexes, traces, tracebacks=True):
+        """
+        Fills at once the tables of the configurations that only differ in the gap penalties,
+        see `NeedlemanWunschBatch`, in batches whose tracebacks fit in the batch memory. The
+        time of each batch is split among its configurations.
+        """
+        # The differences take O(n * m) memory per column, which Hirschberg mode and the time
+        # window avoid
+        if self._sweeps_similarity() and self._difference_traces is not traces \
+                and self._mode != NeedlemanWunschBase.HIRSCHBERG_MODE \
+                and self._time_window is None:
+            if self._differences is not None:
+                self._differences.close()
+            self._differences = SnapshotDifferences(self._system, traces[0], traces[1],
+                                                    self._difference_dtype,
+                                                    self._difference_directory)
+            self._difference_traces = traces
+
+        groups = {}
+        for index in indexes:
+            groups.setdefault(self._similarity_key(configs[index]), []).append(index)
+
+        dt_size, pt_size = len(traces[0]), len(traces[1])
+        batch_size = len(configs)
+        if self._x_drop is not None or self._z_drop is not None:
+            # Each configuration prunes its own band
+            batch_size = 1
+        elif tracebacks:
+            if self._mode == NeedlemanWunschBase.HIRSCHBERG_MODE:
+                # The tracebacks of a batch would need the memory the mode is meant to avoid
+                batch_size = 1
+            else:
+                traceback_bytes = ((dt_size + 1) * (pt_size + 1) + 3) // 4
+                batch_size = max(1, self._batch_bytes // max(traceback_bytes, 1))
+
+        for group in groups.values():
+            for start in range(0, len(group), batch_size):
+                batch = group[start:start + batch_size]
+                algorithms = [AlignmentAlgorithmFactory.get_alignment_algorithm(
+                    self._alignment_algorithm,
+                    **self.get_config_params(traces[1], traces[0], configs[index]))
+                    for index in batch]
+                if len(batch) == 1:
+                    yield batch[0], algorithms[0], (0.0, 0.0)
+                    continue
+
+                start_ex_time = time.time()
+                start_proc_time = time.process_time()
+                NeedlemanWunschBatch(algorithms).calculate(tracebacks)
+                times = ((time.time() - start_ex_time) / len(batch),
+                         (time.process_time() - start_proc_time) / len(batch))
+                for index, alg in zip(batch, algorithms):
+                    yield index, alg, times
+
+    def _align(self, scenario, current_config, dt_trace, pt_trace, alg, times) -> dict:
+        metrics = super()._align(scenario, current_config, dt_trace, pt_trace, alg, times)
+        if self._x_drop is not None or self._z_drop is not None:
+            metrics['pruned_fraction'] = alg.pruned_fraction
+            metrics['drop_fallback'] = alg.drop_fallback
+            if alg.drop_fallback:
+                print(f"--- X-drop and Z-drop pruned the last cell of the table, the whole "
+                      f"table was calculated as well ---")
+        return metrics
+
+    def _similarity_key(self, current_config) -> tuple:
+        """
+        Hyperparameters of a configuration other than the gap penalties.
+        """
+        return (current_config.get(self.LOW),
+                tuple(sorted(current_config.get(self.MAD, {}).items())))
+
     def get_config_params(self, pt_trace, dt_trace, current_config=None):
         return {
             **super().get_config_params(pt_trace, dt_trace, current_config),
             self.SYSTEM: self._system,
             self.TIMESTAMP_LABEL: self._timestamp_label,
+            self.MODE: self._mode,
+            self.TIME_WINDOW: self._time_window,
+            self.SIMILARITY_CACHE: self._similarity_cache,
+            self.DIFFERENCES: self._differences,
+            self.X_DROP: self._x_drop,
+            self.Z_DROP: self._z_drop,
             **current_config
         }
@@ -0,0 +1,77 @@
+import argparse
+import time
+
+import pandas as pd
+
+from algorithm import DynamicTimeWarpingLugaresi, DynamicTimeWarpingSnaps
+from systems import Lift, SystemBase
+from util.trace import to_traces
+
+# (system, timestamp label, parameter of interest, columns, DT file, PT file) of the traces
+TRACES = [
+    (Lift, 'timestamp(s)', 'accel(m/s2)', ['accel(m/s2)'],
+     'resources/input/lift/digital_twin_high_fid_elevate/Bajada_4_3_2_1_0_1_2_3_4.csv',
+     'resources/input/lift/physical_twin/Bajada_4_3_2_1_0_1_2_3_4_01.csv'),
+    (Lift, 'timestamp(s)', 'accel(m/s2)', ['accel(m/s2)'],
+     'resources/input/lift/digital_twin_high_fid_elevate/Bajada_4_3_2_1_0_1_2_3_4.csv',
+     'resources/input/lift/physical_twin/Bajada_4_3_2_1_0_1_2_3_4_02.csv'),
+    (SystemBase, 'timestamp', 'distance',
+     ['xPos', 'yPos', 'angle', 'speed', 'isMoving', 'distance', 'bump', 'light', 'action'],
+     'resources/input/nxj/LegoCarSyntheticTraces-1lapcar2.csv',
+     'resources/input/nxj/LegoCarSyntheticTraces-1lapcar2-accel-PT-actions.csv'),
+    (SystemBase, 'timestamp', 'distance',
+     ['xPos', 'yPos', 'angle', 'speed', 'isMoving', 'distance', 'bump', 'light', 'action'],
+     'resources/input/nxj/LegoCarSyntheticTraces-2lapsFastcar.csv',
+     'resources/input/nxj/LegoCarSyntheticTraces-2lapsFastcar-PT.csv'),
+]
+
+
+def timed_score(algorithm) -> (float, float):
+    start = time.time()
+    score = algorithm.calculate_score()
+    return score, time.time() - start
+
+
+def main(radii: list):
+    """
+    Compares the approximate (FastDTW) scores of both DTW variants with the exact ones on the
+    bundled traces, for each radius.
+    """
+    rows = []
+    for system_class, timestamp_label, param_interest, params, dt_file, pt_file in TRACES:
+        system = system_class()
+        dt_df = pd.read_csv(dt_file).filter(items=[timestamp_label, *params])
+        pt_df = pd.read_csv(pt_file).filter(items=[timestamp_label, *params])
+        dt_trace, pt_trace = to_traces(dt_df, pt_df, timestamp_label, system)
+
+        variants = {
+            'DTW_Snaps': lambda radius: DynamicTimeWarpingSnaps(
+                dt_trace, pt_trace, system, timestamp_label, radius=radius),
+            'DTW_Lugaresi': lambda radius: DynamicTimeWarpingLugaresi(
+                dt_df, pt_df, param_interest, radius=radius),
+        }
+        for name, create in variants.items():
+            exact, exact_time = timed_score(create(None))
+            for radius in radii:
+                score, approximate_time = timed_score(create(radius))
+                rows.append({'dt': dt_file.split('/')[-1],
+                             'pt': pt_file.split('/')[-1],
+                             'snapshots': f'{len(dt_trace)}x{len(pt_trace)}',
+                             'algorithm': name,
+                             'radius': radius,
+                             'exact': exact,
+                             'approximate': score,
+                             'error(%)': (score - exact) / exact * 100 if exact else 0.0,
+                             'exact(s)': exact_time,
+                             'approximate(s)': approximate_time})
+
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(pd.DataFrame(rows).to_string(index=False, float_format='{:.4g}'.format))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--radius", help="Radii of the approximate alignments", type=int,
+                        nargs='+', default=[1, 5, 10, 30])
+    args = parser.parse_args()
+    main(args.radius)
@@ -0,0 +1,102 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from algorithm import NeedlemanWunschAffineGap
+from packages.discrete_frechet.discrete import FastDiscreteFrechetMatrix, \
+    FastDiscreteFrechetSparse, LinearDiscreteFrechet, euclidean, manhattan, \
+    _bresenham_pairs, _fast_frechet_matrix, _interpreted_distance_matrix
+from systems import Lift
+from util.trace import to_traces
+
+# (timestamp label, parameters, DT file, PT file) of the traces whose matched snapshots are
+# compared
+TRACES = [
+    ('timestamp(s)', ['accel(m/s2)'],
+     'resources/input/lift/digital_twin_high_fid_elevate/Bajada_4_0_4.csv',
+     'resources/input/lift/physical_twin/Bajada_4_0_4_01.csv'),
+    ('timestamp(s)', ['accel(m/s2)'],
+     'resources/input/lift/digital_twin_high_fid_elevate/Bajada_4_3_2_1_0_1_2_3_4.csv',
+     'resources/input/lift/physical_twin/Bajada_4_3_2_1_0_1_2_3_4_01.csv'),
+    ('timestamp(s)', ['accel(m/s2)'],
+     'resources/input/lift/digital_twin_high_fid_elevate/Bajada_4_3_2_1_0_1_2_3_4.csv',
+     'resources/input/lift/physical_twin/Bajada_4_3_2_1_0_1_2_3_4_02.csv'),
+]
+
+
+def matched_snapshots(timestamp_label: str, params: list, dt_file: str,
+                      pt_file: str) -> (np.ndarray, np.ndarray):
+    """
+    Values of the DT and PT snapshots matched by the Needleman-Wunsch alignment of the traces,
+    the arrays whose Fréchet distance is a metric of the alignment.
+    """
+    system = Lift()
+    dt_df = pd.read_csv(dt_file).filter(items=[timestamp_label, *params])
+    pt_df = pd.read_csv(pt_file).filter(items=[timestamp_label, *params])
+    dt_trace, pt_trace = to_traces(dt_df, pt_df, timestamp_label, system)
+    alignment = NeedlemanWunschAffineGap(dt_trace, pt_trace, system, timestamp_label,
+                                         init_gap=-1.0, cont_gap=-0.1,
+                                         mad={param: 0.15 for param in params},
+                                         low=200).calculate_alignment()
+    matched = alignment['operation'] == 'Match'
+    return tuple(np.ascontiguousarray(alignment.loc[matched, [prefix + param for param in params]],
+                                      dtype=np.float64) for prefix in ('dt-', 'pt-'))
+
+
+def interpreted_distance(dist_func, p: np.ndarray, q: np.ndarray) -> float:
+    """
+    Distance of FastDiscreteFrechetMatrix filling the distance matrix in interpreted Python,
+    as it did before it was compiled.
+    """
+    diagonal = _bresenham_pairs(0, 0, p.shape[0], q.shape[0])
+    ca = _interpreted_distance_matrix(p, q, diagonal, dist_func)
+    return _fast_frechet_matrix(ca, diagonal, p, q)[-1, -1]
+
+
+def timed_distance(distance, p: np.ndarray, q: np.ndarray, repeats: int) -> (float, float):
+    # Compiles the variant for the types of the arrays
+    distance(p, q)
+    start = time.time()
+    for _ in range(repeats):
+        value = distance(p, q)
+    return value, (time.time() - start) / repeats
+
+
+def main(repeats: int):
+    """
+    Compares the time of the Fréchet distance variants on the matched snapshots of the
+    alignments of the bundled traces. The variants are compiled before they are timed.
+    """
+    rows = []
+    for timestamp_label, params, dt_file, pt_file in TRACES:
+        p, q = matched_snapshots(timestamp_label, params, dt_file, pt_file)
+        for name, dist_func in (('euclidean', euclidean), ('manhattan', manhattan)):
+            variants = {
+                'FastDiscreteFrechetMatrix': FastDiscreteFrechetMatrix(dist_func).distance,
+                'FastDiscreteFrechetMatrix (interpreted fill)':
+                    lambda p, q: interpreted_distance(dist_func, p, q),
+                'FastDiscreteFrechetSparse': FastDiscreteFrechetSparse(dist_func).distance,
+                'LinearDiscreteFrechet': LinearDiscreteFrechet(dist_func).distance,
+            }
+            for variant, distance in variants.items():
+                value, seconds = timed_distance(distance, p, q, repeats)
+                rows.append({'dt': dt_file.split('/')[-1],
+                             'pt': pt_file.split('/')[-1],
+                             'snapshots': f'{len(p)}x{len(q)}',
+                             'metric': name,
+                             'algorithm': variant,
+                             'distance': value,
+                             'time(s)': seconds})
+
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(pd.DataFrame(rows).to_string(index=False, float_format='{:.4g}'.format))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", help="Number of times each distance is timed", type=int,
+                        default=5)
+    args = parser.parse_args()
+    main(args.repeats)
@@ -1,5 +1,7 @@
 from metrics.ndw.ndw_alignment import NeedlemanWunschAlignmentMetrics
 from metrics.ndw.ndw_alignment_lca import NeedlemanWunschAlignmentMetricsLCA
+from metrics.ndw.ndw_window_monitor import NeedlemanWunschWindowMonitor
 
 __all__ = ["NeedlemanWunschAlignmentMetrics",
-           "NeedlemanWunschAlignmentMetricsLCA"]
+           "NeedlemanWunschAlignmentMetricsLCA",
+           "NeedlemanWunschWindowMonitor"]
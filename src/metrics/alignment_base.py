@@ -5,6 +5,7 @@ import pandas as pd
 
 from systems.system import SystemBase
 from util import clean_df
+from util.trace import Trace
 
 
 class AlignmentBase(ABC):
@@ -12,15 +13,17 @@ class AlignmentBase(ABC):
     PREFIX_PT = 'pt-'
 
     def __init__(self, alignment: pd.DataFrame,
-                 dt_trace: pd.DataFrame,
-                 pt_trace: pd.DataFrame,
+                 dt_trace: pd.DataFrame | Trace,
+                 pt_trace: pd.DataFrame | Trace,
                  system: SystemBase,
                  selected_params: List[str],
                  score: float,
                  timestamp_label: str):
         # Traces to align
-        self._dt_trace = clean_df(dt_trace)
-        self._pt_trace = clean_df(pt_trace)
+        self._dt_trace = clean_df(dt_trace.to_dataframe() if isinstance(dt_trace, Trace)
+                                  else dt_trace)
+        self._pt_trace = clean_df(pt_trace.to_dataframe() if isinstance(pt_trace, Trace)
+                                  else pt_trace)
         # System information
         self._system = system
         # Alignment
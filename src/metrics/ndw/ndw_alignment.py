@@ -5,7 +5,8 @@ import pandas as pd
 from scipy.spatial.distance import cityblock, euclidean
 
 from metrics.alignment_base import AlignmentBase
-from packages.discrete_frechet.discrete import FastDiscreteFrechetMatrix, manhattan
+from packages.discrete_frechet.discrete import FastDiscreteFrechetMatrix, manhattan, \
+    euclidean as point_euclidean
 from systems.system import SystemBase
 
 
@@ -48,7 +49,7 @@ class NeedlemanWunschAlignmentMetrics(AlignmentBase):
     @property
     def frechet(self) -> dict:
         if not (self._matched_dt_snapshots.empty and self._matched_pt_snapshots.empty):
-            frechet_euclidean = FastDiscreteFrechetMatrix(euclidean).distance \
+            frechet_euclidean = FastDiscreteFrechetMatrix(point_euclidean).distance \
                 (self._matched_dt_snapshots.to_numpy(), self._matched_pt_snapshots.to_numpy())
             frechet_manhattan = FastDiscreteFrechetMatrix(manhattan).distance \
                 (self._matched_dt_snapshots.to_numpy(), self._matched_pt_snapshots.to_numpy())
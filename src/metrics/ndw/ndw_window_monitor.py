@@ -0,0 +1,177 @@
+import heapq
+import inspect
+from typing import Iterable, List
+
+import numpy as np
+
+from algorithm.ndw.needleman_wunsch_base import NeedlemanWunschBase
+from metrics.ndw.ndw_alignment import NeedlemanWunschAlignmentMetrics
+from systems.system import SystemBase
+from util.trace import Trace, TraceBuffer
+
+
+class NeedlemanWunschWindowMonitor:
+    """
+    Fidelity monitor of a running digital twin over unbounded streams of DT and PT snapshots.
+    Every `step` seconds of the streams, the snapshots of the last `window` seconds are
+    aligned with a Needleman-Wunsch algorithm, and the metrics of the alignment (see
+    `NeedlemanWunschAlignmentMetrics`) are emitted.
+
+    Consecutive windows share the snapshots of `window - step` seconds. The similarity
+    matrix of the shared snapshots is reused, so only the rows and the columns of the new
+    snapshots of each window are compared. The table itself is filled again, as the
+    alignment of each window starts at a different cell. Only the snapshots of the current
+    window are kept.
+    """
+
+    def __init__(self, algorithm_class: type, window: float, step: float,
+                 system: SystemBase, selected_params: List[str],
+                 timestamp_label: str = "timestamp(s)", **parameters):
+        """
+        :param algorithm_class: Needleman-Wunsch class of the alignment of each window
+        :param window: Duration of each window, in the units of the timestamps
+        :param step: Time between the ends of consecutive windows
+        :param selected_params: Columns the metrics are calculated with
+        :param parameters: Parameters of the algorithm, e.g., the gap penalties, mad and low
+        """
+        if not issubclass(algorithm_class, NeedlemanWunschBase):
+            raise ValueError(f'Invalid algorithm class {algorithm_class}.')
+        if not window > 0 or not step > 0:
+            raise ValueError(f'Invalid window {window} or step {step}.')
+        self._algorithm_class = algorithm_class
+        self._window = window
+        self._step = step
+        self._system = system
+        self._selected_params = selected_params
+        self._timestamp_label = timestamp_label
+        self._parameters = parameters
+        # mad and low of the algorithm, which the similarities of the new snapshots are
+        # calculated with
+        self._mad = parameters.get('mad')
+        self._low = parameters.get('low', inspect.signature(algorithm_class).parameters['low']
+                                   .default)
+
+        categories = {}
+        self._dt_buffer = TraceBuffer(timestamp_label, system, categories)
+        self._pt_buffer = TraceBuffer(timestamp_label, system, categories)
+        self._latest = [None, None]
+        self._end = None  # End of the next window
+        # Similarity matrix of the previous window and the stream position of its first DT
+        # and PT snapshots
+        self._similarity = None
+        self._origin = (0, 0)
+
+    def append_dt(self, snapshot: dict) -> list:
+        """
+        Appends a DT snapshot, in the order of the timestamps.
+        :return: The metrics of the windows that ended, see `_align_window`
+        """
+        self._dt_buffer.append(snapshot)
+        self._latest[0] = snapshot[self._timestamp_label]
+        return self._emit()
+
+    def append_pt(self, snapshot: dict) -> list:
+        """
+        Appends a PT snapshot, in the order of the timestamps.
+        :return: The metrics of the windows that ended, see `_align_window`
+        """
+        self._pt_buffer.append(snapshot)
+        self._latest[1] = snapshot[self._timestamp_label]
+        return self._emit()
+
+    def monitor(self, dt_snapshots: Iterable[dict], pt_snapshots: Iterable[dict]):
+        """
+        Appends the snapshots of both streams in the order of their timestamps.
+        :return: A generator of the metrics of each window
+        """
+        label = self._timestamp_label
+        snapshots = heapq.merge(((snapshot, True) for snapshot in dt_snapshots),
+                                ((snapshot, False) for snapshot in pt_snapshots),
+                                key=lambda item: item[0][label])
+        for snapshot, is_dt in snapshots:
+            yield from self.append_dt(snapshot) if is_dt else self.append_pt(snapshot)
+
+    def _emit(self) -> list:
+        """
+        Aligns the windows that ended, which are the ones that end before the latest
+        snapshot of both streams.
+        """
+        if None in self._latest:
+            return []
+        if self._end is None:
+            self._end = min(self._dt_buffer.trace.timestamps[0],
+                            self._pt_buffer.trace.timestamps[0]) + self._window
+
+        results = []
+        while min(self._latest) >= self._end:
+            start = self._end - self._window
+            result = self._align_window(start, self._end)
+            if result is not None:
+                results.append(result)
+            self._end += self._step
+            # Snapshots before the next window
+            for buffer in (self._dt_buffer, self._pt_buffer):
+                buffer.drop(int(np.searchsorted(buffer.trace.timestamps,
+                                                self._end - self._window)))
+        return results
+
+    def _align_window(self, start: float, end: float) -> dict:
+        """
+        Aligns the snapshots from start to end (excluded).
+        :return: The metrics of the alignment, or None if the window has no snapshots of one
+            of the streams
+        """
+        traces, origin = [], []
+        for buffer in (self._dt_buffer, self._pt_buffer):
+            trace = buffer.trace
+            first, last = np.searchsorted(trace.timestamps, [start, end])
+            traces.append(trace[first:last])
+            origin.append(buffer.first_index + first)
+        dt_trace, pt_trace = traces
+        if len(dt_trace) == 0 or len(pt_trace) == 0:
+            return None
+
+        algorithm = self._algorithm_class(dt_trace, pt_trace, self._system,
+                                          self._timestamp_label,
+                                          similarity=self._window_similarity(dt_trace, pt_trace,
+                                                                             tuple(origin)),
+                                          **self._parameters)
+        alignment = algorithm.calculate_alignment()
+        metrics = NeedlemanWunschAlignmentMetrics(alignment, dt_trace, pt_trace, self._system,
+                                                  self._selected_params, algorithm.score,
+                                                  self._timestamp_label)
+        return {'start': start,
+                'end': end,
+                'dt_snapshots': len(dt_trace),
+                'pt_snapshots': len(pt_trace),
+                'score': algorithm.score,
+                'percentage_matched_snapshots': metrics.percentage_matched_snapshots,
+                'frechet': metrics.frechet,
+                'p2p_mean': metrics.p2p_mean}
+
+    def _window_similarity(self, dt_trace: Trace, pt_trace: Trace,
+                           origin: tuple) -> np.ndarray:
+        """
+        Similarity matrix of the traces of a window, copying the part shared with the
+        previous window and comparing only the new snapshots.
+        :param origin: Stream position of the first DT and PT snapshots of the traces
+        """
+        similarity = np.empty((len(dt_trace), len(pt_trace)))
+        # Snapshots of the previous window at the beginning of this one
+        rows = columns = 0
+        if self._similarity is not None:
+            dt_offset, pt_offset = origin[0] - self._origin[0], origin[1] - self._origin[1]
+            rows = int(np.clip(self._similarity.shape[0] - dt_offset, 0, len(dt_trace)))
+            columns = int(np.clip(self._similarity.shape[1] - pt_offset, 0, len(pt_trace)))
+            similarity[:rows, :columns] = \
+                self._similarity[dt_offset:dt_offset + rows, pt_offset:pt_offset + columns]
+
+        if rows < len(dt_trace):
+            similarity[rows:] = self._compare(dt_trace[rows:], pt_trace)
+        if rows > 0 and columns < len(pt_trace):
+            similarity[:rows, columns:] = self._compare(dt_trace[:rows], pt_trace[columns:])
+        self._similarity, self._origin = similarity, origin
+        return similarity
+
+    def _compare(self, dt_trace: Trace, pt_trace: Trace) -> np.ndarray:
+        return self._system.snap_equals_matrix(dt_trace, pt_trace, self._mad, self._low)
@@ -0,0 +1,266 @@
+import argparse
+import glob
+import itertools
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import yaml
+
+import util.file_util as fu
+from batch_processing.alg_config.ndw_config import NeedlemanWunschConfiguration
+from batch_processing.algorithm_factory import AlignmentAlgorithmFactory
+from batch_processing.config_factory import ConfigFactory
+from util.dic_util import nested_set
+from util.trace import to_traces
+
+# Tolerance of the comparison of the scores of the original Needleman-Wunsch implementation
+TOLERANCE = 0.0001
+
+
+def _max_tolerance(v1, v2, v3, equals_value) -> (np.ndarray, np.ndarray):
+    """
+    `util.float_util.max_tolerance` on arrays: the score and the operation of each cell.
+    """
+    first = v1 >= v3 - TOLERANCE
+    value = np.where(first, np.where(v1 >= v2 - TOLERANCE, v1, v2),
+                     np.where(v3 >= v2 - TOLERANCE, v3, v2))
+    operation = np.where(first, np.where(v1 >= v2 - TOLERANCE,
+                                         np.where(equals_value > 0, 3, 2), 1),
+                         np.where(v3 >= v2 - TOLERANCE, 0, 1))
+    return value, operation
+
+
+def _python_max(a, b) -> np.ndarray:
+    # max(a, b) of Python, which keeps a unless b is greater
+    return np.where(b > a, b, a)
+
+
+def reference_operations(similarity: np.ndarray, init_gap: float, cont_gap: float,
+                         affine: bool) -> (float, np.ndarray):
+    """
+    Fills the table with the recurrences of the original Python implementation of
+    `NeedlemanWunschAffineGap` (three tables) or `NeedlemanWunschTolerance`, cell by cell in
+    the same floating point operations, but one anti-diagonal at a time.
+    :return: The score and the (n + 1, m + 1) table of operations
+    """
+    dt_size, pt_size = similarity.shape
+    operations = np.zeros((dt_size + 1, pt_size + 1), dtype=np.uint8)
+    operations[0, 1:] = 1
+
+    # Boundaries of the tables: affine gaps are init_gap + cont_gap * k, tolerance gaps are
+    # accumulated one by one
+    if affine:
+        row_gaps = init_gap + cont_gap * np.arange(pt_size + 1)
+        column_gaps = init_gap + cont_gap * np.arange(dt_size + 1)
+    else:
+        row_gaps = np.zeros(pt_size + 1)
+        column_gaps = np.zeros(dt_size + 1)
+        for j in range(1, pt_size + 1):
+            row_gaps[j] = row_gaps[j - 1] + cont_gap
+        for i in range(1, dt_size + 1):
+            column_gaps[i] = column_gaps[i - 1] + cont_gap
+    row_gaps[0], column_gaps[0] = 0.0, 0.0
+
+    # Score, deletion and insertion of the cells (i, d - i) of the last two anti-diagonals,
+    # indexed by i
+    table = [np.zeros(dt_size + 1), np.zeros(dt_size + 1)]
+    deletion = [np.zeros(dt_size + 1), np.zeros(dt_size + 1)]
+    insertion = [np.zeros(dt_size + 1), np.zeros(dt_size + 1)]
+    for diagonal in range(1, dt_size + pt_size + 1):
+        current_table = np.full(dt_size + 1, np.nan)
+        current_deletion = np.full(dt_size + 1, np.nan)
+        current_insertion = np.full(dt_size + 1, np.nan)
+        if diagonal <= pt_size:
+            current_table[0] = row_gaps[diagonal]
+            current_deletion[0] = row_gaps[diagonal]
+            current_insertion[0] = -np.inf
+        if diagonal <= dt_size:
+            current_table[diagonal] = column_gaps[diagonal]
+            current_deletion[diagonal] = -np.inf
+            current_insertion[diagonal] = column_gaps[diagonal]
+
+        i = np.arange(max(1, diagonal - pt_size), min(dt_size, diagonal - 1) + 1)
+        if len(i) > 0:
+            j = diagonal - i
+            equals_value = similarity[i - 1, j - 1]
+            sub = table[0][i - 1] + equals_value
+            if affine:
+                current_deletion[i] = _python_max(init_gap + cont_gap + table[1][i - 1],
+                                                  cont_gap + deletion[1][i - 1])
+                current_insertion[i] = _python_max(init_gap + cont_gap + table[1][i],
+                                                   cont_gap + insertion[1][i])
+                ins, dele = current_insertion[i], current_deletion[i]
+            else:
+                ins = table[1][i] + cont_gap
+                dele = table[1][i - 1] + cont_gap
+            current_table[i], operations[i, j] = _max_tolerance(sub, ins, dele, equals_value)
+
+        table = [table[1], current_table]
+        deletion = [deletion[1], current_deletion]
+        insertion = [insertion[1], current_insertion]
+    return table[1][dt_size] if dt_size + pt_size > 0 else 0.0, operations
+
+
+def reference_alignment(operations: np.ndarray, dt_records: list,
+                        pt_records: list) -> pd.DataFrame:
+    """
+    The alignment of the table of operations, built row by row as the original
+    `NeedlemanWunschBase.build_result`.
+    """
+    dt_size, pt_size = operations.shape[0] - 1, operations.shape[1] - 1
+    keys = list(pt_records[0].keys())
+    rows = []
+    while dt_size > 0 or pt_size > 0:
+        operation = operations[dt_size, pt_size]
+        if pt_size > 0 and operation == 1:
+            rows.append(["-"] * len(keys) + [pt_records[pt_size - 1][k] for k in keys]
+                        + ["Insertion"])
+            pt_size -= 1
+        elif dt_size > 0 and pt_size > 0 and operation > 1:
+            rows.append([dt_records[dt_size - 1][k] for k in keys]
+                        + [pt_records[pt_size - 1][k] for k in keys]
+                        + ["Match" if operation > 2 else "Mismatch"])
+            dt_size -= 1
+            pt_size -= 1
+        else:
+            rows.append([dt_records[dt_size - 1][k] for k in keys] + ["-"] * len(keys)
+                        + ["Deletion"])
+            dt_size -= 1
+    rows.reverse()
+    return pd.DataFrame(rows, columns=["dt-" + k for k in keys] + ["pt-" + k for k in keys]
+                        + ["operation"])
+
+
+def ndw_config_files() -> list:
+    """
+    Paths, relative to config_files, of the configuration files of the Needleman-Wunsch
+    variants.
+    """
+    paths = []
+    for path in sorted(glob.glob(os.path.join('config_files', '**', '*.yaml'), recursive=True)):
+        with open(path, 'r', encoding='utf-8') as file:
+            config = yaml.safe_load(file)
+        if str(config.get('alignment_alg', '')).startswith('NDW'):
+            paths.append(os.path.relpath(path, 'config_files'))
+    return paths
+
+
+def _sweep_points(ranges: list, points: int = None):
+    """
+    The combinations of the ranges in the order of `itertools.product`, or `points` of them,
+    evenly spaced, without listing all of them (some sweeps have billions of combinations).
+    """
+    if points is None:
+        return itertools.product(*ranges)
+    total = int(np.prod([len(values) for values in ranges], dtype=np.float64))
+    combinations = []
+    for index in np.unique(np.linspace(0, total - 1, min(points, total)).round()):
+        index, combination = int(index), []
+        for values in reversed(ranges):
+            index, position = divmod(index, len(values))
+            combination.append(values[position])
+        combinations.append(tuple(reversed(combination)))
+    return combinations
+
+
+def _config_dict(configuration, init_config: tuple) -> dict:
+    # Nested dictionary of a configuration, as in AlignmentConfiguration.execute_alignments
+    current_config = {}
+    for index, label in enumerate(configuration._get_hyperparameters_labels()):
+        nested_set(current_config, label.split('-'), init_config[index])
+    return current_config
+
+
+def check_config(config_file: str, points: int = None, max_cells: int = None) -> dict:
+    """
+    Aligns every pair of traces of a configuration file with every configuration of its sweep
+    (or `points` of them, evenly spaced), and asserts that the scores and the alignments are
+    identical to the ones of the reference fill.
+    :return: The number of alignments that were checked and of pairs of traces that were
+        skipped for having more than max_cells cells
+    """
+    current_directory = os.path.join(os.getcwd(), "")
+    args = argparse.Namespace(config=config_file, figures=False, engine='kaleido')
+    config = ConfigFactory._load_configuration(current_directory, args)
+    # Nothing is written to the output directory of the configuration
+    config['paths']['output'] = tempfile.mkdtemp()
+    configuration = NeedlemanWunschConfiguration(current_directory, args, config)
+    affine = configuration._alignment_algorithm == 'NDW_Affine'
+    if not configuration._mad:
+        # Older files with a single mad range for every parameter, which the pipeline can't run
+        print(f"--- {config_file}: skipped, no mad range per parameter ---")
+        return {'checked': 0, 'skipped': 0}
+
+    configs = [_config_dict(configuration, init_config)
+               for init_config in _sweep_points(configuration._get_hyperparameters_ranges(),
+                                                points)]
+
+    checked, skipped = 0, 0
+    for i, pattern in enumerate(configuration._pt_files):
+        dt_file = configuration._dt_file[i]
+        if not os.path.isdir(configuration._pt_path) or \
+                not os.path.exists(configuration._dt_path + dt_file):
+            print(f"--- {config_file}: {dt_file} x {pattern} skipped, missing input files ---")
+            skipped += 1
+            continue
+        for pt_file in sorted(fu.list_directory_files(configuration._pt_path, '.csv', pattern)):
+            dt_df = configuration._read_trace(configuration._dt_path + dt_file)
+            pt_df = configuration._read_trace(configuration._pt_path + pt_file)
+            if max_cells is not None and len(dt_df) * len(pt_df) > max_cells:
+                print(f"--- {config_file}: {dt_file} x {pt_file} skipped, "
+                      f"{len(dt_df)}x{len(pt_df)} cells ---")
+                skipped += 1
+                continue
+            traces = to_traces(dt_df, pt_df, configuration._timestamp_label,
+                               configuration._system)
+            dt_records, pt_records = dt_df.to_dict('records'), pt_df.to_dict('records')
+
+            similarities = {}
+            for current_config in configs:
+                params = configuration.get_config_params(traces[1], traces[0], current_config)
+                algorithm = AlignmentAlgorithmFactory.get_alignment_algorithm(
+                    configuration._alignment_algorithm, **params)
+                alignment = algorithm.calculate_alignment()
+
+                key = (params['low'], tuple(sorted(params['mad'].items())))
+                if key not in similarities:
+                    similarities[key] = configuration._system.snap_equals_matrix(
+                        traces[0], traces[1], params['mad'], params['low'])
+                score, operations = reference_operations(similarities[key],
+                                                         params['init_gap'],
+                                                         params['cont_gap'], affine)
+                assert algorithm.score == score, \
+                    f'{config_file}: {dt_file} x {pt_file} {current_config}: score ' \
+                    f'{algorithm.score} instead of {score}'
+                pd.testing.assert_frame_equal(alignment,
+                                              reference_alignment(operations, dt_records,
+                                                                  pt_records),
+                                              obj=f'{config_file}: {dt_file} x {pt_file} '
+                                                  f'{current_config}: alignment')
+                checked += 1
+    print(f"--- {config_file}: {checked} alignments identical, {skipped} pairs skipped ---")
+    return {'checked': checked, 'skipped': skipped}
+
+
+def main(config_files: list, points: int, max_cells: int):
+    """
+    Checks that the compiled Needleman-Wunsch kernels give the same scores and alignments as
+    the recurrences of the original implementation, on the configuration files.
+    """
+    for config_file in config_files or ndw_config_files():
+        check_config(config_file, points, max_cells)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", help="Config files stored in the /src/config_files folder, "
+                                         "all the ones of the Needleman-Wunsch variants by "
+                                         "default", nargs='*')
+    parser.add_argument("--points", help="Number of configurations of each sweep, evenly "
+                                         "spaced, all of them by default", type=int)
+    parser.add_argument("--max-cells", help="Pairs of traces with more cells are skipped",
+                        type=int, default=2 ** 25)
+    args = parser.parse_args()
+    main(args.config, args.points, args.max_cells)
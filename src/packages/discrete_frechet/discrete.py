@@ -53,7 +53,7 @@ class DiscreteFrechet(object):
                                         calculate(i - 1, j - 1),
                                         calculate(i, j - 1)), d)
             else:
-                self.ca[i, j] = np.infty
+                self.ca[i, j] = np.inf
             return self.ca[i, j]
 
         n_p = p.shape[0]
@@ -86,7 +86,7 @@ def _get_linear_frechet(p: np.ndarray, q: np.ndarray,
             elif i == 0 and j == 0:
                 ca[i, j] = d
             else:
-                ca[i, j] = np.infty
+                ca[i, j] = np.inf
     return ca
 
 
@@ -156,7 +156,7 @@ class VectorizedDiscreteFrechet(DiscreteFrechet):
                                         calculate(i - 1, j - 1),
                                         calculate(i, j - 1)), d)
             else:
-                self.ca[i, j] = np.infty
+                self.ca[i, j] = np.inf
             return self.ca[i, j]
 
         n_p = p.shape[0]
@@ -167,7 +167,7 @@ class VectorizedDiscreteFrechet(DiscreteFrechet):
         return calculate(n_p - 1, n_q - 1)
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def _bresenham_pairs(x0: int, y0: int,
                      x1: int, y1: int) -> np.ndarray:
     """Generates the diagonal coordinates
@@ -248,7 +248,7 @@ def _get_corner_min_sparse(f_mat: Dict, i: int, j: int) -> float:
     return a
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def _get_corner_min_array(f_mat: np.ndarray, i: int, j: int) -> float:
     if i > 0 and j > 0:
         a = min(f_mat[i - 1, j - 1],
@@ -320,8 +320,85 @@ def _fast_distance_sparse(p: np.ndarray,
     return dist
 
 
-# @jit(nopython=True)
-def _fast_distance_matrix(p, q, diag, dist_func):
+@jit(nopython=True, cache=True)
+def _metric_distance(p: np.ndarray, q: np.ndarray, metric: int) -> float:
+    """
+    Distance between two points with one of the metrics of this module, see `METRICS`, so
+    that the functions that use it are compiled and cached once for all of them.
+    """
+    if metric == EUCLIDEAN:
+        return euclidean(p, q)
+    if metric == MANHATTAN:
+        return manhattan(p, q)
+    if metric == HAVERSINE:
+        return haversine(p, q)
+    return earth_haversine(p, q)
+
+
+@jit(nopython=True, cache=True)
+def _fast_distance_matrix(p: np.ndarray,
+                          q: np.ndarray,
+                          diag: np.ndarray,
+                          metric: int) -> np.ndarray:
+    n_diag = diag.shape[0]
+    diag_max = 0.0
+    i_min = 0
+    j_min = 0
+    p_count = p.shape[0]
+    q_count = q.shape[0]
+
+    # Create the distance array
+    dist = np.full((p_count, q_count), np.inf, dtype=np.float64)
+
+    # Fill in the diagonal with the seed distance values
+    for k in range(n_diag):
+        i0 = diag[k, 0]
+        j0 = diag[k, 1]
+        d = _metric_distance(p[i0], q[j0], metric)
+        diag_max = max(diag_max, d)
+        dist[i0, j0] = d
+
+    # Last row and column reached, kept when the next ranges are empty
+    i = 0
+    j = 0
+    for k in range(n_diag - 1):
+        i0 = diag[k, 0]
+        j0 = diag[k, 1]
+        p_i0 = p[i0]
+        q_j0 = q[j0]
+
+        for i in range(i0 + 1, p_count):
+            if np.isinf(dist[i, j0]):
+                d = _metric_distance(p[i], q_j0, metric)
+                if d < diag_max or i < i_min:
+                    dist[i, j0] = d
+                else:
+                    break
+            else:
+                break
+        i_min = i
+
+        for j in range(j0 + 1, q_count):
+            if np.isinf(dist[i0, j]):
+                d = _metric_distance(p_i0, q[j], metric)
+                if d < diag_max or j < j_min:
+                    dist[i0, j] = d
+                else:
+                    break
+            else:
+                break
+        j_min = j
+    return dist
+
+
+def _interpreted_distance_matrix(p: np.ndarray,
+                                 q: np.ndarray,
+                                 diag: np.ndarray,
+                                 dist_func: Callable[[np.ndarray, np.ndarray], float]) \
+        -> np.ndarray:
+    """
+    `_fast_distance_matrix` for any distance function, filled in interpreted Python.
+    """
     n_diag = diag.shape[0]
     diag_max = 0.0
     i_min = 0
@@ -340,6 +417,9 @@ def _fast_distance_matrix(p, q, diag, dist_func):
         diag_max = max(diag_max, d)
         dist[i0, j0] = d
 
+    # Last row and column reached, kept when the next ranges are empty
+    i = 0
+    j = 0
     for k in range(n_diag - 1):
         i0 = diag[k, 0]
         j0 = diag[k, 1]
@@ -400,7 +480,7 @@ def _fast_frechet_sparse(dist,
     return dist
 
 
-@jit(nopython=True)
+@jit(nopython=True, cache=True)
 def _fast_frechet_matrix(dist: np.ndarray,
                          diag: np.ndarray,
                          p: np.ndarray,
@@ -438,12 +518,23 @@ def _fdfd_sparse(p: np.ndarray,
     return ca
 
 
-# @jit(nopython=True)
+def _diagonal_inside(diagonal: np.ndarray, p_count: int, q_count: int) -> bool:
+    """
+    Whether the coordinates of the diagonal of `_bresenham_pairs` are inside the matrix. They
+    reach p_count or q_count when one poly-line is more than about twice as long as the
+    other, and the compiled code does not check the bounds.
+    """
+    # The coordinates never decrease, so the last pair is the farthest one
+    return diagonal.shape[0] == 0 or \
+        (diagonal[-1, 0] < p_count and diagonal[-1, 1] < q_count)
+
+
+@jit(nopython=True, cache=True)
 def _fdfd_matrix(p: np.ndarray,
                  q: np.ndarray,
-                 dist_func: Callable[[np.array, np.array], float]) -> float:
-    diagonal = _bresenham_pairs(0, 0, p.shape[0], q.shape[0])
-    ca = _fast_distance_matrix(p, q, diagonal, dist_func)
+                 diagonal: np.ndarray,
+                 metric: int) -> np.ndarray:
+    ca = _fast_distance_matrix(p, q, diagonal, metric)
     ca = _fast_frechet_matrix(ca, diagonal, p, q)
     return ca
 
@@ -495,21 +586,31 @@ class FastDiscreteFrechetMatrix(object):
         Parameters
         ----------
         dist_func:
+            Distance function between two points, the compiled code is specialized for the ones
+            of this module, see `METRICS`, any other is called from interpreted Python
         """
         self.times = []
         self.dist_func = dist_func
+        self.metric = METRICS.get(dist_func)
         self.ca = np.zeros((1, 1))
         # JIT the numba code
         self.distance(np.array([[0.0, 0.0], [1.0, 1.0]]),
                       np.array([[0.0, 0.0], [1.0, 1.0]]))
 
     def timed_distance(self, p: np.ndarray, q: np.ndarray) -> float:
+        p, q = self._points(p), self._points(q)
         start = timer()
         diagonal = _bresenham_pairs(0, 0, p.shape[0], q.shape[0])
         self.times.append(timer() - start)
 
+        if not _diagonal_inside(diagonal, p.shape[0], q.shape[0]):
+            start = timer()
+            self.ca = self._linear_frechet(p, q)
+            self.times.extend([timer() - start, 0.0])
+            return self.ca[p.shape[0] - 1, q.shape[0] - 1]
+
         start = timer()
-        ca = _fast_distance_matrix(p, q, diagonal, self.dist_func)
+        ca = self._distance_matrix(p, q, diagonal)
         self.times.append(timer() - start)
 
         start = timer()
@@ -520,10 +621,40 @@ class FastDiscreteFrechetMatrix(object):
         return ca[p.shape[0] - 1, q.shape[0] - 1]
 
     def distance(self, p: np.ndarray, q: np.ndarray) -> float:
-        ca = _fdfd_matrix(p, q, self.dist_func)
+        """
+        Falls back to `_get_linear_frechet` when the diagonal leaves the matrix, see
+        `_diagonal_inside`.
+        """
+        p, q = self._points(p), self._points(q)
+        diagonal = _bresenham_pairs(0, 0, p.shape[0], q.shape[0])
+        if not _diagonal_inside(diagonal, p.shape[0], q.shape[0]):
+            ca = self._linear_frechet(p, q)
+        elif self.metric is not None:
+            ca = _fdfd_matrix(p, q, diagonal, self.metric)
+        else:
+            ca = _fast_frechet_matrix(self._distance_matrix(p, q, diagonal), diagonal, p, q)
         self.ca = ca
         return ca[p.shape[0] - 1, q.shape[0] - 1]
 
+    def _points(self, points) -> np.ndarray:
+        """
+        Points as given to a distance function outside `METRICS`, else see `_as_points`.
+        """
+        return _as_points(points) if self.metric is not None else np.asarray(points)
+
+    def _distance_matrix(self, p: np.ndarray, q: np.ndarray, diagonal: np.ndarray) -> np.ndarray:
+        if self.metric is not None:
+            return _fast_distance_matrix(p, q, diagonal, self.metric)
+        return _interpreted_distance_matrix(p, q, diagonal, self.dist_func)
+
+    def _linear_frechet(self, p: np.ndarray, q: np.ndarray) -> np.ndarray:
+        """
+        The compiled `_get_linear_frechet` only takes jitted distance functions.
+        """
+        if self.metric is not None:
+            return _get_linear_frechet(p, q, self.dist_func)
+        return _get_linear_frechet.py_func(p, q, self.dist_func)
+
 
 @jit(nopython=True, fastmath=True)
 def euclidean(p: np.ndarray, q: np.ndarray) -> float:
@@ -565,6 +696,25 @@ def earth_haversine(p: np.ndarray, q: np.ndarray) -> float:
     return haversine(np.radians(p), np.radians(q)) * earth_radius
 
 
+# Distance functions the compiled code of `FastDiscreteFrechetMatrix` is specialized for
+EUCLIDEAN = 0
+MANHATTAN = 1
+HAVERSINE = 2
+EARTH_HAVERSINE = 3
+METRICS = {euclidean: EUCLIDEAN,
+           manhattan: MANHATTAN,
+           haversine: HAVERSINE,
+           earth_haversine: EARTH_HAVERSINE}
+
+
+def _as_points(points) -> np.ndarray:
+    """
+    Points as a contiguous float array, the only type the compiled code is specialized for,
+    e.g., from the integer or object arrays of the columns of a DataFrame.
+    """
+    return np.ascontiguousarray(points, dtype=np.float64)
+
+
 def print_sparse_matrix(d: Dict):
     for key, value in d.items():
         col = key & ((1 << 32) - 1)
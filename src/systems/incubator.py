@@ -1,3 +1,5 @@
+import numpy as np
+
 from systems.system import SystemBase
 
 
@@ -5,5 +7,10 @@ class Incubator(SystemBase):
     def is_low_complexity(self, key: str, value):
         return 27 < abs(value) < 29 if key == "temperature(degrees)" else False
 
+    def low_complexity_mask(self, key: str, values: np.ndarray) -> np.ndarray:
+        if key == "temperature(degrees)":
+            return (27 < np.abs(values)) & (np.abs(values) < 29)
+        return np.zeros(len(values), dtype=bool)
+
     def filter_low_complexity(self, snapshot=None):
         return 27 < abs(snapshot["temperature(degrees)"][0]) < 29
@@ -1,3 +1,5 @@
+import numpy as np
+
 from systems.system import SystemBase
 
 
@@ -5,5 +7,8 @@ class Lift(SystemBase):
     def is_low_complexity(self, key: str, value):
         return abs(value) < 0.1 if key == "accel(m/s2)" else False
 
+    def low_complexity_mask(self, key: str, values: np.ndarray) -> np.ndarray:
+        return np.abs(values) < 0.1 if key == "accel(m/s2)" else np.zeros(len(values), dtype=bool)
+
     def filter_low_complexity(self, snapshot=None):
         return abs(snapshot["accel(m/s2)"]) < 0.1
@@ -0,0 +1,161 @@
+import tempfile
+
+import numpy as np
+from numba import jit
+
+from systems.system import SystemBase, CHUNK_CELLS
+from util.trace import Trace
+
+
+class SnapshotDifferences:
+    """
+    Comparison of every DT snapshot with every PT snapshot that does not depend on the mad and
+    low hyperparameters: the absolute difference of each numerical column, the equality of
+    each categorical column and the low complexity flags. They are calculated once per pair of
+    traces, and the similarity matrix of each mad and low of a sweep is derived from them with
+    a few vectorized operations, see `SystemBase.snap_equals_matrix`.
+
+    The differences are stored as float32 by default, which halves their memory. Then, a
+    difference that is within float32 rounding of a mad may be inside or outside it unlike in
+    `SystemBase.snap_equals_matrix`, and the similarities differ in the order of 1e-7. With
+    float64, the similarity matrices are bit-identical to the ones of
+    `SystemBase.snap_equals_matrix`. The matrices can be memory-mapped to temporary files,
+    which are deleted with this object, for traces whose matrices do not fit in memory.
+    """
+
+    def __init__(self, system: SystemBase, dt_trace: Trace, pt_trace: Trace,
+                 dtype=np.float32, directory: str = None, include_timestamp: bool = False):
+        """
+        :param dtype: Type of the absolute differences
+        :param directory: Directory of the memory-mapped matrices, in memory if None
+        :param include_timestamp: Whether the timestamp is compared as any other column
+        """
+        self._system = system
+        self._dt_trace = dt_trace
+        self._pt_trace = pt_trace
+        self._dtype = np.dtype(dtype)
+        self._directory = directory
+        self._include_timestamp = include_timestamp
+        # Differences (or equalities) and low complexity flags of each column, calculated
+        # on the first similarity matrix
+        self._differences = None
+        self._low_levels = None
+        self._files = []
+
+    def _new_matrix(self, dtype) -> np.ndarray:
+        shape = (len(self._dt_trace), len(self._pt_trace))
+        if self._directory is None or 0 in shape:
+            return np.empty(shape, dtype=dtype)
+        file = tempfile.TemporaryFile(dir=self._directory)
+        self._files.append(file)
+        return np.memmap(file, dtype=dtype, mode='w+', shape=shape)
+
+    def _calculate(self):
+        dt_trace, pt_trace = self._dt_trace, self._pt_trace
+        keys = [key for key in dt_trace.keys()
+                if self._include_timestamp or key != dt_trace.timestamp_label]
+        chunk_size = max(1, CHUNK_CELLS // max(len(pt_trace), 1))
+
+        self._differences, self._low_levels = {}, {}
+        for key in keys:
+            dt_values = dt_trace.columns[key]
+            pt_values = pt_trace.columns[key][np.newaxis, :]
+            categorical = dt_trace.is_categorical(key)
+            matrix = self._new_matrix(bool if categorical else self._dtype)
+            for start in range(0, len(dt_trace), chunk_size):
+                rows = dt_values[start:start + chunk_size, np.newaxis]
+                matrix[start:start + chunk_size] = rows == pt_values if categorical \
+                    else np.abs(rows - pt_values)
+            self._differences[key] = matrix
+
+            if not categorical:
+                dt_low = self._system._low_complexity_column(dt_trace, key)
+                pt_low = self._system._low_complexity_column(pt_trace, key)
+                if dt_low.any() or pt_low.any():
+                    # Number of snapshots of the pair in a low complexity region
+                    low_level = self._new_matrix(np.uint8)
+                    for start in range(0, len(dt_trace), chunk_size):
+                        low_level[start:start + chunk_size] = \
+                            dt_low[start:start + chunk_size, np.newaxis].astype(np.uint8) \
+                            + pt_low[np.newaxis, :]
+                    self._low_levels[key] = low_level
+
+    def similarity_matrix(self, mad: dict, low: float, dt_slice: slice = slice(None),
+                          pt_slice: slice = slice(None)) -> np.ndarray:
+        """
+        Same as `SystemBase.snap_equals_matrix` with the stored differences.
+        :param dt_slice: DT snapshots to compare, all of them by default
+        :param pt_slice: PT snapshots to compare, all of them by default
+        :return: A (len(DT), len(PT)) matrix of the selected snapshots, where [i, j] is the
+            score of aligning the i-th DT snapshot with the j-th PT snapshot
+        """
+        if self._differences is None:
+            self._calculate()
+        dt_size = len(range(*dt_slice.indices(len(self._dt_trace))))
+        pt_size = len(range(*pt_slice.indices(len(self._pt_trace))))
+        denominator = len(self._dt_trace.keys()) - (1 if not self._include_timestamp else 0)
+
+        # Only the requested rows and columns are derived, e.g., a chunk of a band
+        result = np.zeros((dt_size, pt_size))
+        out_of_mad = np.zeros((dt_size, pt_size), dtype=bool)
+        for key, matrix in self._differences.items():
+            if matrix.dtype == bool:
+                _add_equalities(matrix[dt_slice, pt_slice], result, out_of_mad)
+            else:
+                low_level = self._low_levels.get(key)
+                _add_match_rewards(matrix[dt_slice, pt_slice],
+                                   low_level[dt_slice, pt_slice] if low_level is not None
+                                   else None,
+                                   float(mad[key]),
+                                   float(low) if low_level is not None else 1.0,
+                                   result, out_of_mad)
+        _normalize(result, out_of_mad, float(denominator))
+        return result
+
+    def close(self):
+        """
+        Deletes the memory-mapped matrices, if any.
+        """
+        self._differences, self._low_levels = None, None
+        for file in self._files:
+            file.close()
+        self._files = []
+
+
+@jit(nopython=True, cache=True)
+def _add_match_rewards(difference, low_level, mad, low, result, out_of_mad):
+    """
+    Adds the match reward of a numerical column to the similarities inside its mad, and
+    flags the pairs of snapshots outside it. The operations are the ones of
+    `SystemBase.snap_equals_matrix`, in float64.
+    """
+    for i in range(difference.shape[0]):
+        for j in range(difference.shape[1]):
+            value = np.float64(difference[i, j])
+            if value < mad:
+                match_reward = 1 - value / mad
+                if low_level is not None:
+                    if low_level[i, j] == 2:  # Both low complexity region
+                        match_reward = match_reward / (low * 2)
+                    elif low_level[i, j] == 1:  # One low complexity region
+                        match_reward = match_reward / low
+                result[i, j] += match_reward
+            else:
+                out_of_mad[i, j] = True
+
+
+@jit(nopython=True, cache=True)
+def _add_equalities(equal, result, out_of_mad):
+    for i in range(equal.shape[0]):
+        for j in range(equal.shape[1]):
+            if equal[i, j]:
+                result[i, j] += 1
+            else:
+                out_of_mad[i, j] = True
+
+
+@jit(nopython=True, cache=True)
+def _normalize(result, out_of_mad, denominator):
+    for i in range(result.shape[0]):
+        for j in range(result.shape[1]):
+            result[i, j] = 0.0 if out_of_mad[i, j] else result[i, j] / denominator
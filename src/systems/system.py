@@ -1,7 +1,14 @@
 from abc import ABC
 
+import numpy as np
 import pandas
 
+from util.trace import Trace
+
+# Number of cells of the (DT x PT) matrix evaluated at once by the vectorized comparison
+# functions. It bounds the size of the temporary arrays regardless of the trace lengths.
+CHUNK_CELLS = 2 ** 20
+
 
 class SystemBase(ABC):
 
@@ -39,6 +46,75 @@ class SystemBase(ABC):
 
         return result / (len(dt_snapshot) - (1 if not include_timestamp else 0))
 
+    def snap_equals_matrix(self, dt_trace: Trace, pt_trace: Trace, mad: dict, low: float,
+                           include_timestamp: bool = False,
+                           chunk_size: int = None) -> np.ndarray:
+        """
+        Vectorized version of `snap_equals` that compares every DT snapshot with every PT
+        snapshot at once. The result is bit-identical to calling `snap_equals` for each pair.
+
+        :param dt_trace: DT trace, with the same categories as the PT trace
+        :param pt_trace: PT trace
+        :param mad: Maximum Acceptable Distance of each numerical column
+        :param low: Weight of the snapshots in low complexity areas
+        :param include_timestamp: Whether the timestamp is compared as any other column
+        :param chunk_size: Number of DT snapshots processed at once. By default, it is
+            calculated so that each chunk has around `CHUNK_CELLS` cells.
+        :return: A (len(DT), len(PT)) matrix where [i, j] is the score of aligning the i-th
+            DT snapshot with the j-th PT snapshot
+        """
+        keys = [key for key in dt_trace.keys()
+                if include_timestamp or key != dt_trace.timestamp_label]
+        dt_size, pt_size = len(dt_trace), len(pt_trace)
+        denominator = len(dt_trace.keys()) - (1 if not include_timestamp else 0)
+        dt_arrays, pt_arrays = dt_trace.columns, pt_trace.columns
+
+        numeric = {key: not dt_trace.is_categorical(key) for key in keys}
+        dt_low = {key: self._low_complexity_column(dt_trace, key) for key in keys
+                  if numeric[key]}
+        pt_low = {key: self._low_complexity_column(pt_trace, key) for key in keys
+                  if numeric[key]}
+
+        if chunk_size is None:
+            chunk_size = max(1, CHUNK_CELLS // max(pt_size, 1))
+
+        result = np.zeros((dt_size, pt_size))
+        for start in range(0, dt_size, chunk_size):
+            end = min(start + chunk_size, dt_size)
+            chunk = result[start:end]
+            out_of_mad = np.zeros(chunk.shape, dtype=bool)
+
+            for key in keys:
+                dt_values = dt_arrays[key][start:end, np.newaxis]
+                pt_values = pt_arrays[key][np.newaxis, :]
+
+                if numeric[key]:
+                    difference = np.abs(dt_values - pt_values)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        match_reward = 1 - difference / mad[key]
+
+                    dt_key_low = dt_low[key][start:end, np.newaxis]
+                    pt_key_low = pt_low[key][np.newaxis, :]
+                    any_low = dt_key_low | pt_key_low
+                    if any_low.any():
+                        both_low = dt_key_low & pt_key_low
+                        match_reward = np.where(both_low, match_reward / (low * 2),
+                                                np.where(any_low, match_reward / low,
+                                                         match_reward))
+
+                    inside_mad = difference < mad[key]
+                    chunk += np.where(inside_mad, match_reward, 0)
+                    out_of_mad |= ~inside_mad
+                else:
+                    equal = dt_values == pt_values
+                    chunk += equal
+                    out_of_mad |= ~equal
+
+            chunk[out_of_mad] = 0
+            chunk /= denominator
+
+        return result
+
     def distance(self, dt_snapshot: dict, pt_snapshot: dict, timestamp_label: str,
                  include_timestamp: bool = False) -> float:
         result = 0.0
@@ -50,13 +126,57 @@ class SystemBase(ABC):
                 if isinstance(dt_snapshot[key], (float, int)):
                     result += abs(dt_value - pt_value)
                 else:
-                    if dt_value[key] == pt_value[key]:
+                    if dt_value != pt_value:
                         result += 1
 
         return result / (len(dt_snapshot) - (1 if not include_timestamp else 0))
 
+    def distance_matrix(self, dt_trace: Trace, pt_trace: Trace,
+                        include_timestamp: bool = False) -> np.ndarray:
+        """
+        Vectorized version of `distance` that compares every DT snapshot with every PT
+        snapshot at once. The result is bit-identical to calling `distance` for each pair.
+
+        :param dt_trace: DT trace, with the same categories as the PT trace
+        :param pt_trace: PT trace
+        :param include_timestamp: Whether the timestamp is compared as any other column
+        :return: A (len(DT), len(PT)) matrix where [i, j] is the distance between the i-th
+            DT snapshot and the j-th PT snapshot
+        """
+        keys = [key for key in dt_trace.keys()
+                if include_timestamp or key != dt_trace.timestamp_label]
+        denominator = len(dt_trace.keys()) - (1 if not include_timestamp else 0)
+
+        result = np.zeros((len(dt_trace), len(pt_trace)))
+        for key in keys:
+            dt_values = dt_trace.columns[key][:, np.newaxis]
+            pt_values = pt_trace.columns[key][np.newaxis, :]
+
+            if not dt_trace.is_categorical(key):
+                result += np.abs(dt_values - pt_values)
+            else:
+                result += dt_values != pt_values
+
+        result /= denominator
+        return result
+
     def is_low_complexity(self, key: str, value):
         return False
 
+    def low_complexity_mask(self, key: str, values: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of `is_low_complexity` for all the values of a column.
+        """
+        return np.fromiter((self.is_low_complexity(key, value) for value in values),
+                           dtype=bool, count=len(values))
+
+    def _low_complexity_column(self, trace: Trace, key: str) -> np.ndarray:
+        """
+        Low complexity mask of a column of the trace, calculated when it was built if possible.
+        """
+        if key in trace.low_complexity:
+            return trace.low_complexity[key]
+        return self.low_complexity_mask(key, trace.columns[key])
+
     def filter_low_complexity(self, df: pandas.DataFrame):
         return False
@@ -2,6 +2,7 @@ from .dataframe_util import clean_df
 from .file_util import list_directory_files, flatten_dictionary, get_property_values, get_property_methods, \
     generate_sublist
 from .float_util import get_input_values_list, max_tolerance
+from .trace import Trace, TraceBuffer, to_traces
 
 __all__ = ['clean_df',
            'list_directory_files',
@@ -10,4 +11,7 @@ __all__ = ['clean_df',
            'get_property_methods',
            'get_input_values_list',
            'max_tolerance',
-           'generate_sublist']
+           'generate_sublist',
+           'Trace',
+           'TraceBuffer',
+           'to_traces']
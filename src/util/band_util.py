@@ -0,0 +1,100 @@
+import numpy as np
+
+
+def time_window_band(dt_timestamps: np.ndarray, pt_timestamps: np.ndarray,
+                     window: float) -> (np.ndarray, np.ndarray):
+    """
+    For each DT snapshot, it returns the range [lower, upper) of PT snapshots whose timestamps
+    differ at most `window` from the DT one. Both traces must be sorted by timestamp.
+    """
+    for timestamps in (dt_timestamps, pt_timestamps):
+        if np.any(np.diff(timestamps) < 0):
+            raise ValueError('The traces must be sorted by timestamp to use a time window.')
+    lower = np.searchsorted(pt_timestamps, dt_timestamps - window, side='left')
+    upper = np.searchsorted(pt_timestamps, dt_timestamps + window, side='right')
+    return lower, upper
+
+
+def sakoe_chiba_band(dt_size: int, pt_size: int, width: float) -> (np.ndarray, np.ndarray):
+    """
+    For each DT snapshot, it returns the range [lower, upper) of PT snapshots within the
+    Sakoe-Chiba band around the diagonal of the table, whose half width is the fraction
+    `width` of the length of the longest trace. The diagonal joins the first and the last
+    snapshots of both traces when their lengths differ.
+    """
+    diagonal = np.arange(dt_size) * ((pt_size - 1) / max(dt_size - 1, 1))
+    radius = width * max(dt_size, pt_size)
+    # The rounding keeps at least the cells next to the diagonal of each row
+    lower = np.floor(diagonal - radius + 1e-9).astype(np.int64)
+    upper = np.ceil(diagonal + radius - 1e-9).astype(np.int64) + 1
+    return np.clip(lower, 0, pt_size), np.clip(upper, 0, pt_size)
+
+
+def itakura_band(dt_size: int, pt_size: int, slope: float) -> (np.ndarray, np.ndarray):
+    """
+    For each DT snapshot, it returns the range [lower, upper) of PT snapshots within the
+    Itakura parallelogram, whose sides join the first and the last snapshots of both traces
+    with slopes `slope` and 1 / `slope` relative to the diagonal of the table.
+    """
+    ratio = (pt_size - 1) / max(dt_size - 1, 1)
+    i = np.arange(dt_size)
+    remaining = dt_size - 1 - i
+    lower = np.maximum(i * ratio / slope, pt_size - 1 - remaining * ratio * slope)
+    upper = np.minimum(i * ratio * slope, pt_size - 1 - remaining * ratio / slope)
+    # The rounding keeps at least the cell of the diagonal of each row
+    lower = np.floor(lower + 1e-9).astype(np.int64)
+    upper = np.ceil(upper - 1e-9).astype(np.int64) + 1
+    return np.clip(lower, 0, pt_size), np.clip(upper, 0, pt_size)
+
+
+def band_offsets(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """
+    Position of the first cell of each row of a band, where row i has the cells from column
+    lo[i] to hi[i], when the band is stored row by row in a flat array. The last position is
+    the size of the band.
+    """
+    offsets = np.zeros(len(lo) + 1, dtype=np.int64)
+    np.cumsum(hi - lo + 1, out=offsets[1:])
+    return offsets
+
+
+def band_chunks(lo: np.ndarray, hi: np.ndarray, first_row: int, last_row: int,
+                max_cells: int):
+    """
+    Splits the rows [first_row, last_row) of a band in chunks of consecutive rows whose
+    bounding box has at most `max_cells` cells (or a single row).
+    """
+    start = first_row
+    while start < last_row:
+        end = start + 1
+        while end < last_row and \
+                (end + 1 - start) * (hi[end] - lo[start] + 1) <= max_cells:
+            end += 1
+        yield start, end
+        start = end
+
+
+def path_band(dt_indices: np.ndarray, pt_indices: np.ndarray, dt_size: int, pt_size: int,
+              radius: int) -> (np.ndarray, np.ndarray):
+    """
+    Projects the warping path of the coarsened traces (see `Trace.coarsen`), given as the
+    positions of the DT and PT snapshots of each pair, to traces of dt_size and pt_size
+    snapshots, where each coarse snapshot covers two snapshots. For each DT snapshot, it
+    returns the range [lower, upper) of PT snapshots of the projected path, widened by
+    `radius` snapshots in every direction, as in FastDTW.
+    """
+    lower = np.full(dt_size, pt_size, dtype=np.int64)
+    upper = np.zeros(dt_size, dtype=np.int64)
+    for shift in (0, 1):
+        rows = np.minimum(2 * dt_indices + shift, dt_size - 1)
+        np.minimum.at(lower, rows, 2 * pt_indices)
+        np.maximum.at(upper, rows, np.minimum(2 * pt_indices + 2, pt_size))
+
+    # Columns of the rows within the radius
+    wide_lower, wide_upper = lower.copy(), upper.copy()
+    for shift in range(1, min(radius, dt_size - 1) + 1):
+        np.minimum(wide_lower[shift:], lower[:-shift], out=wide_lower[shift:])
+        np.minimum(wide_lower[:-shift], lower[shift:], out=wide_lower[:-shift])
+        np.maximum(wide_upper[shift:], upper[:-shift], out=wide_upper[shift:])
+        np.maximum(wide_upper[:-shift], upper[shift:], out=wide_upper[:-shift])
+    return np.maximum(wide_lower - radius, 0), np.minimum(wide_upper + radius, pt_size)
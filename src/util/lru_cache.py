@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+import numpy as np
+
+
+class ArrayLRUCache:
+    """
+    Cache of NumPy arrays with a memory budget. When storing an array exceeds the budget, the
+    least recently used arrays are evicted. Arrays larger than the whole budget are not stored.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        :param max_bytes: Maximum number of bytes of the stored arrays
+        """
+        self._max_bytes = max_bytes
+        self._arrays = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def fits(self, nbytes: int) -> bool:
+        return nbytes <= self._max_bytes
+
+    def get(self, key) -> np.ndarray:
+        """
+        :return: The array stored with the key, or None if there is none
+        """
+        array = self._arrays.get(key)
+        if array is None:
+            self.misses += 1
+            return None
+        self._arrays.move_to_end(key)
+        self.hits += 1
+        return array
+
+    def put(self, key, array: np.ndarray):
+        if not self.fits(array.nbytes):
+            return
+        if key in self._arrays:
+            self._bytes -= self._arrays.pop(key).nbytes
+        while self._arrays and self._bytes + array.nbytes > self._max_bytes:
+            self._bytes -= self._arrays.popitem(last=False)[1].nbytes
+        self._arrays[key] = array
+        self._bytes += array.nbytes
+
+    def clear(self):
+        self._arrays.clear()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
@@ -0,0 +1,329 @@
+import numpy as np
+import pandas as pd
+
+# Initial number of snapshots of a `TraceBuffer`
+INITIAL_CAPACITY = 64
+
+
+class Trace:
+    """
+    Trace of snapshots stored by columns, with one contiguous NumPy array per column, instead
+    of a list of records (dictionaries).
+
+    Numerical and boolean columns are stored as float64 arrays, and the rest of the columns
+    (categorical) as int64 codes. The codes of each categorical column are given by
+    categories that must be shared by the traces that are compared, so that two snapshots have
+    the same code if and only if their values are equal (see `to_traces`). Values that are not
+    equal to themselves, like NaN, get a new code each time.
+    The original type of each column is kept to return the original values.
+
+    The low complexity masks of the numerical columns are calculated once, when the trace is
+    built with a system.
+
+    Slicing a trace (e.g., trace[10:20]) returns a trace that shares the arrays of this one,
+    without copying them. Indexing it with an integer returns the snapshot as a record.
+    """
+    __slots__ = ('_columns', '_dtypes', '_categories', '_timestamp_label', '_low_complexity')
+
+    def __init__(self, columns: dict, dtypes: dict, categories: dict,
+                 timestamp_label: str = 'timestamp(s)', low_complexity: dict = None):
+        """
+        :param columns: One array per column, float64 values or int64 codes
+        :param dtypes: Original type of each column, None for the categorical ones
+        :param categories: Code of each value and value of each code of each categorical
+            column
+        :param timestamp_label: Name of the timestamp column
+        :param low_complexity: Low complexity mask of each numerical column
+        """
+        self._columns = columns
+        self._dtypes = dtypes
+        self._categories = categories
+        self._timestamp_label = timestamp_label
+        self._low_complexity = low_complexity if low_complexity is not None else {}
+
+    @classmethod
+    def from_columns(cls, columns: dict, timestamp_label: str = 'timestamp(s)', system=None,
+                     categories: dict = None) -> 'Trace':
+        """
+        Builds a trace from the values of each column.
+        :param columns: One array (or list) of values per column
+        :param timestamp_label: Name of the timestamp column
+        :param system: System used to calculate the low complexity masks, if not None
+        :param categories: Code of each value and value of each code of each categorical
+            column. It is updated with the new values.
+        """
+        categories = {} if categories is None else categories
+        arrays, dtypes, low_complexity = {}, {}, {}
+        for key, values in columns.items():
+            array = np.asarray(values)
+            if array.dtype.kind in 'biuf':
+                arrays[key] = array.astype(np.float64)
+                dtypes[key] = array.dtype
+                if system is not None and key != timestamp_label:
+                    low_complexity[key] = system.low_complexity_mask(key, arrays[key])
+            else:
+                arrays[key] = _encode(values, *categories.setdefault(key, ({}, [])))
+                dtypes[key] = None
+        return cls(arrays, dtypes, categories, timestamp_label, low_complexity)
+
+    @classmethod
+    def from_records(cls, records: list, timestamp_label: str = 'timestamp(s)', system=None,
+                     categories: dict = None) -> 'Trace':
+        """
+        Builds a trace from a list of records, e.g., the output of DataFrame.to_dict('records').
+        See `from_columns` for the rest of the parameters.
+        """
+        keys = records[0].keys() if records else []
+        return cls.from_columns({key: [record[key] for record in records] for key in keys},
+                                timestamp_label, system, categories)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, timestamp_label: str = 'timestamp(s)',
+                       system=None, categories: dict = None) -> 'Trace':
+        """
+        Builds a trace from a DataFrame. See `from_columns` for the rest of the parameters.
+        """
+        return cls.from_columns({key: df[key].to_numpy() for key in df.columns},
+                                timestamp_label, system, categories)
+
+    def __len__(self) -> int:
+        return len(next(iter(self._columns.values()))) if self._columns else 0
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return Trace({key: values[item] for key, values in self._columns.items()},
+                         self._dtypes, self._categories, self._timestamp_label,
+                         {key: mask[item] for key, mask in self._low_complexity.items()})
+        return {key: self.values(key, np.array([item]))[0] for key in self._columns}
+
+    def keys(self):
+        return self._columns.keys()
+
+    @property
+    def columns(self) -> dict:
+        return self._columns
+
+    @property
+    def timestamp_label(self) -> str:
+        return self._timestamp_label
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._columns[self._timestamp_label]
+
+    @property
+    def categories(self) -> dict:
+        return self._categories
+
+    @property
+    def low_complexity(self) -> dict:
+        return self._low_complexity
+
+    def is_categorical(self, key: str) -> bool:
+        return self._dtypes[key] is None
+
+    def values(self, key: str, indices: np.ndarray = None) -> np.ndarray:
+        """
+        Original values of a column, as an object array.
+        :param indices: Positions of the snapshots to select, all of them if None. Negative
+            positions count from the end of the trace.
+        """
+        column = self._columns[key] if indices is None else self._columns[key].take(indices)
+        if self.is_categorical(key):
+            labels = self._categories[key][1]
+            return np.fromiter(labels, dtype=object, count=len(labels)).take(column)
+        return column.astype(self._dtypes[key]).astype(object)
+
+    def take(self, keys, indices: np.ndarray, fill=None) -> dict:
+        """
+        Original values of the snapshots at the given positions, for each key. Negative
+        positions are replaced by `fill` if it is not None, otherwise they count from the end
+        of the trace.
+        """
+        columns = {}
+        for key in keys:
+            selected = self.values(key, indices)
+            if fill is not None:
+                selected[indices < 0] = fill
+            columns[key] = selected
+        return columns
+
+    def to_records(self) -> list:
+        values = {key: self.values(key) for key in self._columns}
+        return [{key: values[key][i] for key in self._columns} for i in range(len(self))]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame({key: self.values(key) for key in self._columns}).infer_objects()
+
+    def with_categories(self, categories: dict) -> 'Trace':
+        """
+        This trace with the codes of its categorical columns given by other categories, which
+        are updated with the new values. The numerical columns are shared, not copied.
+        """
+        if categories is self._categories:
+            return self
+        columns = {}
+        for key, values in self._columns.items():
+            if self.is_categorical(key):
+                # New code of each code of this trace
+                codes = _encode(self._categories[key][1], *categories.setdefault(key, ({}, [])))
+                values = codes.take(values)
+            columns[key] = values
+        return Trace(columns, self._dtypes, categories, self._timestamp_label,
+                     self._low_complexity)
+
+    def coarsen(self) -> 'Trace':
+        """
+        Trace with half the snapshots (rounded up), where each snapshot merges two consecutive
+        snapshots of this one: the mean of the numerical columns and the first value of the
+        categorical ones. Used by the multiscale alignments, e.g., FastDTW.
+        """
+        columns = {key: values[::2].copy() if self.is_categorical(key) else coarsen_values(values)
+                   for key, values in self._columns.items()}
+        return Trace(columns, self._dtypes, self._categories, self._timestamp_label)
+
+
+class TraceBuffer:
+    """
+    Last snapshots of a stream stored by columns, in buffers with room to append snapshots in
+    amortized O(1) time and to drop the oldest ones.
+    """
+
+    def __init__(self, timestamp_label: str = 'timestamp(s)', system=None,
+                 categories: dict = None):
+        """
+        :param categories: Categories shared with the traces the snapshots are compared to,
+            see `Trace`
+        """
+        self._timestamp_label = timestamp_label
+        self._system = system
+        self._categories = {} if categories is None else categories
+        self._columns = None
+        self._dtypes = None
+        self._low_complexity = None
+        self._begin = 0
+        self._end = 0
+        # Position in the stream of the first kept snapshot
+        self.first_index = 0
+
+    def append(self, snapshot: dict) -> Trace:
+        """
+        :return: The trace of the new snapshot
+        """
+        trace = Trace.from_records([snapshot], self._timestamp_label, self._system,
+                                   self._categories)
+        if self._columns is None:
+            self._dtypes = trace._dtypes
+            self._columns = {key: np.empty(INITIAL_CAPACITY, dtype=values.dtype)
+                             for key, values in trace.columns.items()}
+            self._low_complexity = {key: np.empty(INITIAL_CAPACITY, dtype=bool)
+                                    for key in trace.low_complexity}
+        elif self._end == len(next(iter(self._columns.values()))):
+            self._reserve()
+
+        for key, values in trace.columns.items():
+            self._columns[key][self._end] = values[0]
+        for key, mask in trace.low_complexity.items():
+            self._low_complexity[key][self._end] = mask[0]
+        self._end += 1
+        return trace
+
+    def _reserve(self):
+        """
+        Moves the kept snapshots to the beginning of buffers with room for as many more.
+        """
+        size = self._end - self._begin
+        capacity = max(INITIAL_CAPACITY, 2 * size)
+        for buffers in (self._columns, self._low_complexity):
+            for key, values in buffers.items():
+                moved = np.empty(capacity, dtype=values.dtype)
+                moved[:size] = values[self._begin:self._end]
+                buffers[key] = moved
+        self._begin, self._end = 0, size
+
+    def drop(self, count: int = 1):
+        """
+        Drops the oldest snapshots.
+        """
+        count = min(count, len(self))
+        self._begin += count
+        self.first_index += count
+
+    @property
+    def trace(self) -> Trace:
+        """
+        The kept snapshots, sharing the buffers until the next append.
+        """
+        if self._columns is None:
+            return Trace({}, {}, self._categories, self._timestamp_label)
+        kept = slice(self._begin, self._end)
+        return Trace({key: values[kept] for key, values in self._columns.items()},
+                     self._dtypes, self._categories, self._timestamp_label,
+                     {key: mask[kept] for key, mask in self._low_complexity.items()})
+
+    def __len__(self) -> int:
+        return self._end - self._begin
+
+
+def _encode(values, codes: dict, labels: list) -> np.ndarray:
+    """
+    Code of each value, adding the new values to the codes and the labels.
+    """
+    encoded = np.empty(len(values), dtype=np.int64)
+    for i, value in enumerate(values):
+        code = codes.get(value) if value == value else None
+        if code is None:
+            code = len(labels)
+            labels.append(value)
+            if value == value:
+                codes[value] = code
+        encoded[i] = code
+    return encoded
+
+
+def coarsen_values(values: np.ndarray) -> np.ndarray:
+    """
+    Mean of each pair of consecutive values, keeping the last one alone if the length is odd.
+    """
+    pairs = len(values) // 2
+    coarse = np.empty(len(values) - pairs)
+    coarse[:pairs] = (values[:2 * pairs:2] + values[1:2 * pairs:2]) / 2
+    if len(values) % 2:
+        coarse[-1] = values[-1]
+    return coarse
+
+
+def to_traces(dt_trace, pt_trace, timestamp_label: str = 'timestamp(s)',
+              system=None) -> (Trace, Trace):
+    """
+    Converts the DT and PT traces, given as lists of records, DataFrames or traces, to traces
+    that share the codes of their categorical columns. A PT trace with other categories than
+    the DT one is encoded again with the categories of the DT trace.
+    """
+    categories = next((trace.categories for trace in (dt_trace, pt_trace)
+                       if isinstance(trace, Trace)), {})
+    traces = []
+    for trace in (dt_trace, pt_trace):
+        if isinstance(trace, pd.DataFrame):
+            trace = Trace.from_dataframe(trace, timestamp_label, system, categories)
+        elif not isinstance(trace, Trace):
+            trace = Trace.from_records(trace, timestamp_label, system, categories)
+        elif trace.categories is not categories:
+            trace = trace.with_categories(categories)
+        traces.append(trace)
+    return traces[0], traces[1]
+
+
+def trace_column(trace, key: str) -> np.ndarray:
+    """
+    Values of a column of a trace, given as a list of records, a DataFrame or a trace, without
+    converting the trace to records: the float64 array of a numerical column of a trace, or
+    the original values of a categorical one.
+    """
+    if isinstance(trace, Trace):
+        return trace.values(key) if trace.is_categorical(key) else trace.columns[key]
+    if isinstance(trace, pd.DataFrame):
+        return trace[key].to_numpy()
+    values = [record[key] for record in trace]
+    array = np.asarray(values)
+    return array if array.dtype.kind in 'biuf' else np.array(values, dtype=object)
@@ -0,0 +1,33 @@
+"""
+Traceback of the dynamic programming tables packed at 2 bits per cell (4 cells per byte).
+
+The operations of the tables (e.g., deletion : 0, insertion : 1, mismatch : 2, match : 3)
+fit in 2 bits, so storing them in a float or even a byte per cell wastes most of the memory.
+The cells are addressed by their position in the table (or in the band of the table) stored
+row by row.
+"""
+import numpy as np
+from numba import jit
+
+
+def new_traceback(size: int) -> np.ndarray:
+    """
+    Allocates the packed traceback of `size` cells, all of them with operation 0.
+    """
+    return np.zeros((size + 3) // 4, dtype=np.uint8)
+
+
+@jit(nopython=True, cache=True)
+def set_operation(traceback: np.ndarray, index: int, operation: int):
+    """
+    Stores the operation of a cell. Each cell can only be set once.
+    """
+    traceback[index >> 2] |= operation << ((index & 3) << 1)
+
+
+@jit(nopython=True, cache=True)
+def get_operation(traceback: np.ndarray, index: int) -> int:
+    """
+    Returns the operation of a cell.
+    """
+    return (traceback[index >> 2] >> ((index & 3) << 1)) & 3